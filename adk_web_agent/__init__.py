@@ -1 +1,7 @@
-from . import agent
+def __getattr__(name):
+    # ``adk web`` looks up ``adk_web_agent.agent``; import it (and google.adk)
+    # only then, so the API server and tooling can import submodules cheaply
+    if name == "agent":
+        from . import agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,18 +1,28 @@
+import os
+
 from google.adk.agents import LlmAgent
 from google.genai import types
 
-from adk_web_agent.tools.research_tools import search_knowledge_base, web_search
+from adk_web_agent.tools.research_tools import knowledge_base_version, search_knowledge_base, web_search
 from adk_web_agent.tools.analysis_tools import analyze_data, calculate_metrics
 from adk_web_agent.tools.summary_tools import format_report, extract_key_points
 from adk_web_agent.tools.thought_tools import emit_thought
+from adk_web_agent.tools.fanout import create_fan_out_tool
+from adk_web_agent.tools.tool_cache import cached_tool
 from adk_web_agent.tools.thinking_middleware import (
     after_model_callback,
     before_agent_callback,
     after_agent_callback,
+    before_model_callback,
+    on_model_error_callback,
+    before_tool_callback,
+    after_tool_callback,
+    on_tool_error_callback,
 )
 
 # --- Model & Thinking Configuration ---
-MODEL_NAME = "gemini-3-flash-preview"
+# AGENT_MODEL swaps the model for every agent (the benchmarks use a local fake)
+MODEL_NAME = os.environ.get("AGENT_MODEL", "gemini-3-flash-preview")
 THINKING_CONFIG = types.GenerateContentConfig(
     thinking_config=types.ThinkingConfig(
         include_thoughts=True,
@@ -20,6 +30,11 @@ THINKING_CONFIG = types.GenerateContentConfig(
     )
 )
 
+# --- Tool Result Caching (seconds a result stays valid) ---
+WEB_SEARCH_TTL = 300
+KNOWLEDGE_BASE_TTL = 3600
+KEY_POINTS_TTL = 3600
+
 # Sub-agent 1: Research Agent
 research_agent = LlmAgent(
     name="research_agent",
@@ -34,11 +49,19 @@ When given a query:
 3. Compile and present all findings clearly.
 
 Always cite your sources and indicate confidence levels.""",
-    tools=[search_knowledge_base, web_search],
+    tools=[
+        cached_tool(search_knowledge_base, ttl=KNOWLEDGE_BASE_TTL, casefold=True, version=knowledge_base_version),
+        cached_tool(web_search, ttl=WEB_SEARCH_TTL, casefold=True),
+    ],
     generate_content_config=THINKING_CONFIG,
     before_agent_callback=before_agent_callback,
     after_agent_callback=after_agent_callback,
+    before_model_callback=before_model_callback,
     after_model_callback=after_model_callback,
+    on_model_error_callback=on_model_error_callback,
+    before_tool_callback=before_tool_callback,
+    after_tool_callback=after_tool_callback,
+    on_tool_error_callback=on_tool_error_callback,
 )
 
 # Sub-agent 2: Analysis Agent
@@ -60,7 +83,12 @@ Always explain your reasoning and methodology.""",
     generate_content_config=THINKING_CONFIG,
     before_agent_callback=before_agent_callback,
     after_agent_callback=after_agent_callback,
+    before_model_callback=before_model_callback,
     after_model_callback=after_model_callback,
+    on_model_error_callback=on_model_error_callback,
+    before_tool_callback=before_tool_callback,
+    after_tool_callback=after_tool_callback,
+    on_tool_error_callback=on_tool_error_callback,
 )
 
 # Sub-agent 3: Summary Agent
@@ -77,13 +105,21 @@ When given content to summarize:
 3. Ensure the output is clear, concise, and well-organized.
 
 Always maintain accuracy while improving readability.""",
-    tools=[format_report, extract_key_points],
+    tools=[format_report, cached_tool(extract_key_points, ttl=KEY_POINTS_TTL)],
     generate_content_config=THINKING_CONFIG,
     before_agent_callback=before_agent_callback,
     after_agent_callback=after_agent_callback,
+    before_model_callback=before_model_callback,
     after_model_callback=after_model_callback,
+    on_model_error_callback=on_model_error_callback,
+    before_tool_callback=before_tool_callback,
+    after_tool_callback=after_tool_callback,
+    on_tool_error_callback=on_tool_error_callback,
 )
 
+# Parallel fan-out: runs independent sub-agent requests concurrently
+run_parallel = create_fan_out_tool([research_agent, analysis_agent, summary_agent])
+
 # Root orchestrator agent with sub-agents
 root_agent = LlmAgent(
     model=MODEL_NAME,
@@ -101,6 +137,7 @@ Strategy guidelines:
 - For simple factual questions: Use the Research Agent.
 - For questions requiring analysis: Use Research Agent first, then Analysis Agent.
 - For comprehensive requests: Use Research Agent → Analysis Agent → Summary Agent in sequence.
+- For independent requests (e.g. research on two separate topics, or research and analysis of data the user already provided): use the run_parallel tool to run the sub-agents at the same time instead of transferring to them one after another. Each request must be self-contained.
 - Always synthesize the results from sub-agents into a clear, helpful final response.
 
 **IMPORTANT - Thought Stream Reporting:**
@@ -115,59 +152,25 @@ After receiving results from sub-agents, emit a completed thought:
 - status: "completed"
 
 Be transparent about which agents you're using and why. Provide comprehensive, well-structured answers.""",
-    tools=[emit_thought],
+    tools=[emit_thought, run_parallel],
     sub_agents=[research_agent, analysis_agent, summary_agent],
     generate_content_config=THINKING_CONFIG,
     before_agent_callback=before_agent_callback,
     after_agent_callback=after_agent_callback,
+    # Times model calls; also serves the opt-in response cache
+    # (LLM_CACHE_ENABLED=1) for repeated opening prompts
+    before_model_callback=before_model_callback,
     after_model_callback=after_model_callback,
+    on_model_error_callback=on_model_error_callback,
+    before_tool_callback=before_tool_callback,
+    after_tool_callback=after_tool_callback,
+    on_tool_error_callback=on_tool_error_callback,
 )
 
 
 # --- FastAPI Server ---
 if __name__ == "__main__":
-    import logging
-    import asyncio
-    from contextlib import asynccontextmanager
-    from fastapi import FastAPI, Request
-    from ag_ui_adk import ADKAgent, add_adk_fastapi_endpoint
-    from dotenv import load_dotenv
-    import uvicorn
-
-    from adk_web_agent.database.db import init_db
-    from adk_web_agent.routes.auth import router as auth_router
-    from adk_web_agent.routes.sessions import router as sessions_router
-    from adk_web_agent.routes.admin import router as admin_router
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s %(name)s %(levelname)s %(message)s",
-    )
-
-    load_dotenv()
-
-    @asynccontextmanager
-    async def lifespan(app: FastAPI):
-        """Initialize database on startup."""
-        await init_db()
-        yield
-
-    adk_agent = ADKAgent(
-        adk_agent=root_agent,
-        app_name="agent_studio",
-        user_id="demo_user",
-        session_timeout_seconds=3600,
-        use_in_memory_services=True,
-    )
-
-    app = FastAPI(lifespan=lifespan)
-
-    # Include REST API routers
-    app.include_router(auth_router)
-    app.include_router(sessions_router)
-    app.include_router(admin_router)
-
-    # ADK agent endpoint
-    add_adk_fastapi_endpoint(app, adk_agent, path="/")
+    # Kept for ``python -m adk_web_agent.agent``; see adk_web_agent/server.py
+    from adk_web_agent.server import main
 
-    uvicorn.run(app, host="localhost", port=8000)
+    main()
@@ -1,6 +1,9 @@
 """JWT token creation and verification."""
 
+import hashlib
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 import jwt
@@ -8,6 +11,20 @@ import jwt
 SECRET_KEY = os.environ.get("JWT_SECRET", "dev-secret-change-in-production")
 ALGORITHM = "HS256"
 TOKEN_EXPIRE_HOURS = 24
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "4096"))
+
+# Verified claims keyed by token digest, held until the token's ``exp``.
+# Clients poll with the same bearer token many times a minute, so this
+# skips the HMAC check and JSON decode on almost every request.
+_token_cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+# Revoked token digests -> their ``exp``; entries are dropped once expired
+# since an expired token is rejected anyway.
+_revoked: dict[str, float] = {}
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
 def create_access_token(user_id: str, is_admin: bool) -> str:
@@ -22,11 +39,57 @@ def create_access_token(user_id: str, is_admin: bool) -> str:
 
 
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token. Raises on invalid/expired tokens."""
+    """Verify and decode a JWT token. Raises on invalid/expired/revoked tokens."""
+    digest = _digest(token)
+    if digest in _revoked:
+        raise ValueError("Token has been revoked")
+
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        payload, exp = cached
+        if time.time() < exp:
+            _token_cache.move_to_end(digest)
+            return dict(payload)
+        del _token_cache[digest]
+        raise ValueError("Token has expired")
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("Token has expired")
     except jwt.InvalidTokenError:
         raise ValueError("Invalid token")
+
+    _token_cache[digest] = (payload, float(payload["exp"]))
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return dict(payload)
+
+
+def revoke_token(token: str) -> tuple[str, float] | None:
+    """Add a token to the blocklist and drop it from the verified cache.
+
+    Returns the token's digest and expiry for sharing with other workers,
+    or None for a token that can't be decoded (and is rejected anyway).
+    """
+    digest = _digest(token)
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        exp = cached[1]
+    else:
+        try:
+            exp = float(jwt.decode(token, options={"verify_signature": False})["exp"])
+        except (jwt.InvalidTokenError, KeyError):
+            return None
+    mark_revoked(digest, exp)
+    return digest, exp
+
+
+def mark_revoked(digest: str, exp: float) -> None:
+    """Block a token by digest, e.g. one revoked by another worker."""
+    _token_cache.pop(digest, None)
+    _revoked[digest] = exp
+
+    now = time.time()
+    for key in [k for k, e in _revoked.items() if e <= now]:
+        del _revoked[key]
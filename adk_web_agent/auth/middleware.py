@@ -3,18 +3,24 @@
 from fastapi import Header, HTTPException, Depends
 
 from adk_web_agent.auth.jwt_helper import verify_token
+from adk_web_agent.auth.revocation import sync_revocations
 
 
-async def get_current_user(authorization: str = Header(default=None)) -> dict:
-    """Extract and validate user from JWT token in Authorization header.
-
-    Returns dict with 'user_id' and 'is_admin' keys.
-    """
+async def get_bearer_token(authorization: str = Header(default=None)) -> str:
+    """Extract the raw bearer token from the Authorization header."""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    token = authorization.removeprefix("Bearer ").strip()
+    return authorization.removeprefix("Bearer ").strip()
+
 
+async def get_current_user(token: str = Depends(get_bearer_token)) -> dict:
+    """Extract and validate user from JWT token in Authorization header.
+
+    Returns dict with 'user_id' and 'is_admin' keys.
+    """
+    # Pick up logouts handled by other worker processes
+    await sync_revocations()
     try:
         payload = verify_token(token)
         return {
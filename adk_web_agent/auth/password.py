@@ -1,11 +1,34 @@
-"""Password hashing and verification using bcrypt."""
+"""Password hashing and verification using bcrypt.
+
+bcrypt is deliberately slow (~250 ms at cost 12), so async handlers must use
+the ``*_async`` variants, which run on a small dedicated thread pool instead
+of blocking the event loop.  bcrypt releases the GIL while hashing, so the
+threads run truly in parallel.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import bcrypt
 
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.environ.get("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_QUEUE = int(os.environ.get("BCRYPT_MAX_QUEUE", "64"))
+
+_executor: ThreadPoolExecutor | None = None
+_stats = {"queued": 0, "in_flight": 0, "completed": 0, "rejected": 0, "max_queued": 0}
+_stats_lock = threading.Lock()
+
+
+class HashPoolBusy(RuntimeError):
+    """Raised when too many hashes are already waiting for a worker."""
+
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt with cost factor 12."""
-    salt = bcrypt.gensalt(rounds=12)
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """Hash a password using bcrypt with the configured cost factor."""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
     return hashed.decode("utf-8")
 
@@ -13,3 +36,81 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     """Verify a password against a bcrypt hash."""
     return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Return True if a stored hash was made with a different cost factor.
+
+    bcrypt hashes look like ``$2b$12$<salt+hash>``; the third field is the cost.
+    """
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+async def _run_in_pool(fn, *args):
+    """Run a bcrypt call on the worker pool, tracking queue depth."""
+
+    def task():
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["in_flight"] += 1
+        try:
+            return fn(*args)
+        finally:
+            with _stats_lock:
+                _stats["in_flight"] -= 1
+                _stats["completed"] += 1
+
+    def on_done(future):
+        # A job cancelled before a worker picked it up never runs ``task``.
+        if future.cancelled():
+            with _stats_lock:
+                _stats["queued"] -= 1
+
+    with _stats_lock:
+        if _stats["queued"] >= HASH_MAX_QUEUE:
+            _stats["rejected"] += 1
+            raise HashPoolBusy("Password hashing queue is full")
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+    future = _get_executor().submit(task)
+    future.add_done_callback(on_done)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str, rounds: int | None = None) -> str:
+    """Hash a password on the bcrypt worker pool."""
+    return await _run_in_pool(hash_password, password, rounds)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password on the bcrypt worker pool."""
+    return await _run_in_pool(verify_password, password, hashed)
+
+
+def get_hash_pool_stats() -> dict:
+    """Queue-depth and throughput counters for the bcrypt worker pool."""
+    with _stats_lock:
+        return {
+            "workers": HASH_WORKERS,
+            "max_queue": HASH_MAX_QUEUE,
+            "rounds": BCRYPT_ROUNDS,
+            **_stats,
+        }
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the worker pool, letting queued hashes finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,189 @@
+"""Bulk user creation for admin onboarding (``POST /api/admin/users/bulk``).
+
+An import is parsed from JSON or CSV, checked row by row, and the new
+users' passwords are hashed concurrently on the bcrypt worker pool.  At
+most ``BULK_HASH_CONCURRENCY`` hashes are queued at a time, so an import of
+thousands of users never fills the pool's queue and logins keep working.
+All new users are then inserted in one transaction with ``executemany``.
+
+``provision_users`` yields progress events while hashing and one result per
+input row at the end, so the route can stream them to the client.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator
+
+from adk_web_agent.auth.password import HASH_WORKERS, HashPoolBusy, hash_password_async
+from adk_web_agent.database.db import get_pool
+
+BULK_MAX_USERS = int(os.environ.get("ADMIN_BULK_MAX_USERS", "10000"))
+BULK_HASH_CONCURRENCY = HASH_WORKERS
+PROGRESS_EVERY = 50
+MAX_USER_ID_LENGTH = 254
+# Bound parameters per IN (...) query, well under SQLite's limit
+LOOKUP_CHUNK = 500
+
+_TRUE = {"1", "true", "yes", "y"}
+_FALSE = {"0", "false", "no", "n"}
+
+
+def parse_user_rows(body: bytes, content_type: str) -> list[dict]:
+    """Parse an import body: a JSON array (or ``{"users": [...]}``) or CSV with a header row.
+
+    CSV columns are ``user_id``, ``password`` and optionally ``is_admin`` and
+    ``is_active``.  Raises ValueError if the body can't be read at all;
+    problems with single rows are reported per row by ``provision_users``.
+    """
+    if "csv" in content_type:
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("CSV body must be UTF-8")
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or not {"user_id", "password"} <= set(reader.fieldnames):
+            raise ValueError("CSV header must include user_id and password")
+        return list(reader)
+
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Body must be a JSON array of users or CSV (Content-Type: text/csv)")
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list):
+        raise ValueError("Body must be a JSON array of users or an object with a users array")
+    return data
+
+
+def _parse_flag(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if not text:
+        return default  # Empty CSV cell
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"Invalid boolean: {value!r}")
+
+
+def _validate(row) -> tuple[str, str, bool, bool]:
+    """(user_id, password, is_admin, is_active) of a row; raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    user_id = row.get("user_id")
+    password = row.get("password")
+    if not isinstance(user_id, str) or not user_id.strip():
+        raise ValueError("user_id is required")
+    if len(user_id.strip()) > MAX_USER_ID_LENGTH:
+        raise ValueError("user_id is too long")
+    if not isinstance(password, str) or not password:
+        raise ValueError("password is required")
+    return (
+        user_id.strip(),
+        password,
+        _parse_flag(row.get("is_admin"), False),
+        _parse_flag(row.get("is_active"), True),
+    )
+
+
+async def _hash(password: str) -> str:
+    """Hash on the shared pool, waiting for room when interactive hashing fills it."""
+    while True:
+        try:
+            return await hash_password_async(password)
+        except HashPoolBusy:
+            await asyncio.sleep(0.05)
+
+
+async def _stored_hashes(user_ids: list[str], db) -> dict[str, str]:
+    """user_id -> password_hash of the given users that exist."""
+    found = {}
+    for start in range(0, len(user_ids), LOOKUP_CHUNK):
+        chunk = user_ids[start:start + LOOKUP_CHUNK]
+        cursor = await db.execute(
+            f"SELECT user_id, password_hash FROM users WHERE user_id IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
+        found.update({row["user_id"]: row["password_hash"] for row in await cursor.fetchall()})
+    return found
+
+
+async def provision_users(rows: list) -> AsyncIterator[dict]:
+    """Create the users of an import, yielding events.
+
+    Events are ``{"event": "progress", "hashed", "total"}`` while hashing,
+    then ``{"event": "result", "index", "user_id", "status", "detail"}`` for
+    every input row in order (status ``created``, ``exists`` or
+    ``invalid``), then ``{"event": "done", "created", "exists", "invalid"}``.
+    """
+    results: list[dict] = [{} for _ in rows]
+    pending: dict[str, tuple[int, str, bool, bool]] = {}  # user_id -> (index, password, is_admin, is_active)
+    for index, row in enumerate(rows):
+        try:
+            user_id, password, is_admin, is_active = _validate(row)
+        except ValueError as e:
+            user_id = row.get("user_id") if isinstance(row, dict) else None
+            user_id = user_id if isinstance(user_id, str) else None
+            results[index] = {"user_id": user_id, "status": "invalid", "detail": str(e)}
+            continue
+        if user_id in pending:
+            results[index] = {"user_id": user_id, "status": "invalid", "detail": "Duplicate user_id in import"}
+            continue
+        pending[user_id] = (index, password, is_admin, is_active)
+
+    async with get_pool().reader() as db:
+        existing = await _stored_hashes(list(pending), db)
+    for user_id in existing:
+        index = pending.pop(user_id)[0]
+        results[index] = {"user_id": user_id, "status": "exists", "detail": "User already exists"}
+
+    semaphore = asyncio.Semaphore(BULK_HASH_CONCURRENCY)
+
+    async def hash_one(user_id: str, password: str) -> tuple[str, str]:
+        async with semaphore:
+            return user_id, await _hash(password)
+
+    tasks = [asyncio.create_task(hash_one(user_id, entry[1])) for user_id, entry in pending.items()]
+    hashes: dict[str, str] = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            user_id, hashed = await next_done
+            hashes[user_id] = hashed
+            if len(hashes) % PROGRESS_EVERY == 0 or len(hashes) == len(tasks):
+                yield {"event": "progress", "hashed": len(hashes), "total": len(tasks)}
+    finally:
+        # The client went away or hashing failed: don't leave jobs queued
+        for task in tasks:
+            task.cancel()
+
+    if hashes:
+        async with get_pool().writer() as db:
+            # OR IGNORE: a user created since the check above keeps its row,
+            # which the hash comparison below then reports as existing
+            await db.executemany(
+                "INSERT OR IGNORE INTO users (user_id, password_hash, is_admin, is_active) VALUES (?, ?, ?, ?)",
+                [(user_id, hashes[user_id], pending[user_id][2], pending[user_id][3]) for user_id in hashes],
+            )
+            await db.commit()
+            stored = await _stored_hashes(list(hashes), db)
+        for user_id, hashed in hashes.items():
+            created = stored.get(user_id) == hashed
+            results[pending[user_id][0]] = {
+                "user_id": user_id,
+                "status": "created" if created else "exists",
+                "detail": None if created else "User already exists",
+            }
+
+    counts = {"created": 0, "exists": 0, "invalid": 0}
+    for index, result in enumerate(results):
+        counts[result["status"]] += 1
+        yield {"event": "result", "index": index, **result}
+    yield {"event": "done", **counts}
@@ -0,0 +1,58 @@
+"""Token revocations shared between worker processes.
+
+Logout blocks the token in the current process at once and records it in
+the ``revoked_tokens`` table.  Every worker pulls rows it hasn't seen yet
+(``seq`` greater than the last one it read) into its local blocklist before
+authenticating a request, at most once per ``REVOCATION_SYNC_INTERVAL``
+seconds, so a logout takes effect on every worker within that interval
+without a database lookup per request.
+"""
+
+import asyncio
+import os
+import time
+
+from adk_web_agent.auth.jwt_helper import mark_revoked, revoke_token
+from adk_web_agent.database.db import get_pool
+
+REVOCATION_SYNC_INTERVAL = float(os.environ.get("REVOCATION_SYNC_INTERVAL", "1"))
+
+_last_seq = 0
+_next_sync = 0.0
+_sync_lock = asyncio.Lock()
+
+
+async def revoke(token: str) -> None:
+    """Revoke a token here and, through the database, on every other worker."""
+    revoked = revoke_token(token)
+    if revoked is None:
+        return
+    digest, exp = revoked
+    async with get_pool().writer() as db:
+        await db.execute(
+            "INSERT OR IGNORE INTO revoked_tokens (token_digest, expires_at) VALUES (?, ?)",
+            (digest, exp),
+        )
+        # Expired tokens are rejected anyway
+        await db.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (time.time(),))
+        await db.commit()
+
+
+async def sync_revocations() -> None:
+    """Load revocations made by other workers since the last sync."""
+    global _last_seq, _next_sync
+    if time.monotonic() < _next_sync:
+        return
+    async with _sync_lock:
+        if time.monotonic() < _next_sync:
+            return
+        async with get_pool().reader() as db:
+            cursor = await db.execute(
+                "SELECT seq, token_digest, expires_at FROM revoked_tokens WHERE seq > ? ORDER BY seq",
+                (_last_seq,),
+            )
+            rows = await cursor.fetchall()
+        for seq, digest, exp in rows:
+            mark_revoked(digest, exp)
+            _last_seq = seq
+        _next_sync = time.monotonic() + REVOCATION_SYNC_INTERVAL
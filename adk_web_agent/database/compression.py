@@ -0,0 +1,33 @@
+"""zlib compression of cold JSON columns.
+
+``agent_executions.main_agent_data`` and ``sub_agents_data`` are written as
+JSON text.  Once a row is older than ``COMPRESS_AFTER_DAYS`` the maintenance
+task (``maintenance.py``) rewrites both values as zlib-compressed BLOBs in
+the same columns; SQLite's column types are only affinities, so no schema
+change is needed and ``typeof()`` tells the two forms apart.
+
+Readers see text either way: ``inflate_json`` in Python, or the
+``inflate_json()`` SQL function registered on every pooled connection, e.g.
+``SELECT json_extract(inflate_json(main_agent_data), '$.agent') ...``.
+"""
+
+import zlib
+
+# Columns that may hold compressed values
+COMPRESSED_COLUMNS = {"agent_executions": ("main_agent_data", "sub_agents_data")}
+
+COMPRESSION_LEVEL = 6
+
+
+def compress_json(text: str | None) -> bytes | None:
+    """Compress a JSON text value; None stays None."""
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def inflate_json(value: str | bytes | None) -> str | None:
+    """The JSON text of a column value, compressed or not."""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
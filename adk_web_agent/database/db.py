@@ -1,78 +1,268 @@
 """Async SQLite connection manager for application data."""
 
+import asyncio
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import aiosqlite
-from pathlib import Path
+
+from adk_web_agent.database.compression import inflate_json
+from adk_web_agent.database.migrate import migrate
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = os.environ.get("APP_DB_PATH", "./app_data.db")
-SCHEMA_PATH = Path(__file__).parent / "schema.sql"
 
+# Connection pool settings. SQLite in WAL mode allows many concurrent readers
+# but only one writer, so the pool keeps N read-only connections and a single
+# shared writer connection guarded by a lock.
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+POOL_DRAIN_TIMEOUT = float(os.environ.get("DB_POOL_DRAIN_TIMEOUT", "10"))
+BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
 
-async def get_db() -> aiosqlite.Connection:
-    """Get a new async database connection with WAL mode and foreign keys."""
+
+async def _connect(readonly: bool = False) -> aiosqlite.Connection:
+    """Open a connection with WAL mode, foreign keys and a busy timeout."""
     db = await aiosqlite.connect(DB_PATH)
     db.row_factory = aiosqlite.Row
+    # Only takes effect on a new file, and only before the WAL switch writes
+    # its header; existing databases keep their mode (see maintenance.py)
+    await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
     await db.execute("PRAGMA journal_mode=WAL")
     await db.execute("PRAGMA foreign_keys=ON")
+    await db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    if readonly:
+        await db.execute("PRAGMA query_only=ON")
+    await db.create_function("inflate_json", 1, inflate_json, deterministic=True)
     return db
 
 
+async def get_db() -> aiosqlite.Connection:
+    """Get a new standalone database connection (caller must close it).
+
+    Request handlers should use the pooled ``get_read_db`` / ``get_write_db``
+    dependencies instead; this is for startup tasks and scripts.
+    """
+    return await _connect()
+
+
+class PoolTimeout(TimeoutError):
+    """No pooled connection became free within ``DB_POOL_ACQUIRE_TIMEOUT``; answered with 503."""
+
+
+class _PooledConnection:
+    """A pooled connection and the time it was last checked out."""
+
+    __slots__ = ("conn", "last_used")
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived aiosqlite connections.
+
+    Readers are checked out from a queue of ``size`` read-only connections.
+    Writes go through a single writer connection serialized by a lock, which
+    matches SQLite's one-writer model and avoids SQLITE_BUSY churn between
+    our own connections.  Idle connections are health-checked before reuse
+    and replaced if broken.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self._size = max(1, size)
+        self._readers: asyncio.Queue[_PooledConnection] = asyncio.Queue()
+        self._writer: _PooledConnection | None = None
+        self._writer_lock = asyncio.Lock()
+        self._in_use = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+
+    async def open(self) -> None:
+        """Open the writer and all reader connections."""
+        self._writer = _PooledConnection(await _connect())
+        for _ in range(self._size):
+            self._readers.put_nowait(_PooledConnection(await _connect(readonly=True)))
+
+    async def _checked(self, pooled: _PooledConnection, readonly: bool) -> _PooledConnection:
+        """Return a usable connection, reconnecting if it fails a health check.
+
+        If reconnecting fails the stale entry stays marked for re-checking, so
+        it goes back into the pool and is retried on the next checkout.
+        """
+        now = time.monotonic()
+        if now - pooled.last_used >= POOL_HEALTH_CHECK_INTERVAL:
+            try:
+                await pooled.conn.execute("SELECT 1")
+            except Exception:
+                try:
+                    await pooled.conn.close()
+                except Exception:
+                    pass
+                pooled.last_used = float("-inf")
+                pooled = _PooledConnection(await _connect(readonly=readonly))
+        pooled.last_used = now
+        return pooled
+
+    def _acquired(self) -> None:
+        if self._closing:
+            raise RuntimeError("Connection pool is shutting down")
+        self._in_use += 1
+        self._idle.clear()
+
+    def _released(self) -> None:
+        self._in_use -= 1
+        if self._in_use == 0:
+            self._idle.set()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a read-only connection."""
+        self._acquired()
+        try:
+            pooled = await asyncio.wait_for(self._readers.get(), POOL_ACQUIRE_TIMEOUT)
+        except TimeoutError:
+            self._released()
+            raise PoolTimeout("No database reader available") from None
+        except BaseException:
+            self._released()
+            raise
+        try:
+            pooled = await self._checked(pooled, readonly=True)
+            yield pooled.conn
+        finally:
+            self._readers.put_nowait(pooled)
+            self._released()
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out the writer connection.
+
+        Any transaction left open by the caller (e.g. after an exception) is
+        rolled back so it cannot leak into the next request.
+        """
+        self._acquired()
+        try:
+            await asyncio.wait_for(self._writer_lock.acquire(), POOL_ACQUIRE_TIMEOUT)
+        except TimeoutError:
+            self._released()
+            raise PoolTimeout("Database writer busy") from None
+        except BaseException:
+            self._released()
+            raise
+        try:
+            self._writer = await self._checked(self._writer, readonly=False)
+            conn = self._writer.conn
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    await conn.rollback()
+        finally:
+            self._writer_lock.release()
+            self._released()
+
+    async def close(self, timeout: float = POOL_DRAIN_TIMEOUT) -> None:
+        """Stop handing out connections, wait for in-flight users, then close."""
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        while not self._readers.empty():
+            await self._readers.get_nowait().conn.close()
+        if self._writer is not None:
+            await self._writer.conn.close()
+            self._writer = None
+
+    def stats(self) -> dict:
+        """Current pool utilisation."""
+        return {
+            "size": self._size,
+            "in_use": self._in_use,
+            "idle_readers": self._readers.qsize(),
+            "writer_locked": self._writer_lock.locked(),
+        }
+
+
+_pool: ConnectionPool | None = None
+
+
+async def init_pool(size: int = POOL_SIZE) -> ConnectionPool:
+    """Create and open the global connection pool."""
+    global _pool
+    if _pool is None:
+        pool = ConnectionPool(size)
+        await pool.open()
+        _pool = pool
+    return _pool
+
+
+async def close_pool() -> None:
+    """Drain and close the global connection pool."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the global connection pool (``init_pool`` must have run)."""
+    if _pool is None:
+        raise RuntimeError("Database pool is not initialized")
+    return _pool
+
+
+async def get_read_db() -> AsyncIterator[aiosqlite.Connection]:
+    """FastAPI dependency yielding a pooled read-only connection."""
+    async with get_pool().reader() as db:
+        yield db
+
+
+async def get_write_db() -> AsyncIterator[aiosqlite.Connection]:
+    """FastAPI dependency yielding the pooled writer connection."""
+    async with get_pool().writer() as db:
+        yield db
+
+
 async def init_db():
-    """Initialize the database: create tables, run migrations, and seed default admin user."""
-    from adk_web_agent.auth.password import hash_password
+    """Bring the schema up to date and, when that changed it, seed the default admin user.
 
+    On a current database this is a single query (see ``migrate.py``).
+    """
     db = await get_db()
     try:
-        # Create tables from schema
-        schema_sql = SCHEMA_PATH.read_text()
-        await db.executescript(schema_sql)
-
-        # Run migrations for existing databases
-        await _run_migrations(db)
-
-        # Seed admin user if users table is empty
-        cursor = await db.execute("SELECT COUNT(*) FROM users")
-        row = await cursor.fetchone()
-        count = row[0] if row else 0
-
-        if count == 0:
-            admin_email = os.environ.get("ADMIN_EMAIL", "admin@example.com")
-            admin_password = os.environ.get("ADMIN_PASSWORD", "admin123")
-            hashed = hash_password(admin_password)
-
-            await db.execute(
-                """INSERT INTO users (user_id, password_hash, is_admin, is_active)
-                   VALUES (?, ?, TRUE, TRUE)""",
-                (admin_email, hashed),
-            )
-            await db.commit()
-            print(f"[init_db] Seeded admin user: {admin_email}")
-        else:
-            print(f"[init_db] Users table already has {count} user(s), skipping seed.")
+        applied = await migrate(db)
+        if applied:
+            await _seed_admin(db)
     finally:
         await db.close()
 
 
-async def _run_migrations(db: aiosqlite.Connection):
-    """Add columns that may be missing in older databases."""
-    migrations = [
-        # Messages table: thought summary & delegation columns
-        ("messages", "thought_summary", "ALTER TABLE messages ADD COLUMN thought_summary TEXT"),
-        ("messages", "delegated_agent", "ALTER TABLE messages ADD COLUMN delegated_agent TEXT"),
-        ("messages", "delegation_chain", "ALTER TABLE messages ADD COLUMN delegation_chain TEXT"),
-        # Agent executions table: thought & delegation columns
-        ("agent_executions", "thought_summary", "ALTER TABLE agent_executions ADD COLUMN thought_summary TEXT"),
-        ("agent_executions", "delegated_agent", "ALTER TABLE agent_executions ADD COLUMN delegated_agent TEXT"),
-        ("agent_executions", "delegation_chain", "ALTER TABLE agent_executions ADD COLUMN delegation_chain TEXT"),
-        ("agent_executions", "thinking_tokens", "ALTER TABLE agent_executions ADD COLUMN thinking_tokens INTEGER"),
-    ]
-    for table, column, sql in migrations:
-        try:
-            cursor = await db.execute(f"PRAGMA table_info({table})")
-            columns = [row[1] for row in await cursor.fetchall()]
-            if column not in columns:
-                await db.execute(sql)
-                print(f"[migration] Added column {table}.{column}")
-        except Exception as e:
-            print(f"[migration] Skipping {table}.{column}: {e}")
+async def _seed_admin(db: aiosqlite.Connection) -> None:
+    """Create the admin user from ADMIN_EMAIL / ADMIN_PASSWORD if there are no users."""
+    from adk_web_agent.auth.password import hash_password
+
+    cursor = await db.execute("SELECT 1 FROM users LIMIT 1")
+    if await cursor.fetchone():
+        return
+
+    admin_email = os.environ.get("ADMIN_EMAIL", "admin@example.com")
+    admin_password = os.environ.get("ADMIN_PASSWORD", "admin123")
+    hashed = hash_password(admin_password)
+
+    await db.execute(
+        # OR IGNORE: workers starting together may both see an empty table
+        """INSERT OR IGNORE INTO users (user_id, password_hash, is_admin, is_active)
+           VALUES (?, ?, TRUE, TRUE)""",
+        (admin_email, hashed),
+    )
     await db.commit()
+    logger.info("Seeded admin user %s", admin_email)
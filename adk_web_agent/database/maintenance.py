@@ -0,0 +1,342 @@
+"""Periodic upkeep that keeps app_data.db and its WAL bounded.
+
+Every ``DB_MAINTENANCE_INTERVAL`` seconds the maintenance task:
+
+1. Applies ``RETENTION_POLICY``: messages, agent executions and ADK events
+   older than their age limit, or beyond their row limit (oldest first), are
+   deleted.  Deleting a message also deletes its executions, and the
+   ``message_count`` / ``last_message_preview`` of its session are
+   recomputed.  A limit of 0 keeps everything, which is the default for all
+   of them.
+2. Compresses the JSON columns of executions older than
+   ``COMPRESS_AFTER_DAYS`` (see ``compression.py``).
+3. Once more than ``VACUUM_MIN_FREE_PAGES`` pages are free, returns them to
+   the filesystem with ``PRAGMA incremental_vacuum``.
+4. Truncates the WAL with ``PRAGMA wal_checkpoint(TRUNCATE)``.
+
+Like the reaper, every step works in batches of
+``DB_MAINTENANCE_BATCH_SIZE`` rows (``VACUUM_PAGES`` pages), committing
+and pausing in between, so the write lock is only held briefly.
+
+Incremental vacuum needs ``auto_vacuum=INCREMENTAL``, which new databases
+get (see ``db._connect``).  A database created before that is converted
+once, with the server stopped, by
+``python -m adk_web_agent.database.maintenance enable-incremental-vacuum``.
+That takes a full VACUUM, which may renumber ``messages`` rowids, so the
+command also rebuilds the external-content ``messages_fts`` index, which
+refers to messages by rowid; a plain ``VACUUM`` would leave search
+returning the wrong messages.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from adk_web_agent.database.compression import compress_json
+from adk_web_agent.database.db import DB_PATH, get_pool
+from adk_web_agent.database.persister import PREVIEW_LENGTH
+
+logger = logging.getLogger(__name__)
+
+DB_MAINTENANCE_INTERVAL = float(os.environ.get("DB_MAINTENANCE_INTERVAL", "3600"))
+DB_MAINTENANCE_BATCH_SIZE = int(os.environ.get("DB_MAINTENANCE_BATCH_SIZE", "500"))
+DB_MAINTENANCE_BATCH_PAUSE = float(os.environ.get("DB_MAINTENANCE_BATCH_PAUSE", "0.05"))
+COMPRESS_AFTER_DAYS = float(os.environ.get("COMPRESS_AFTER_DAYS", "7"))
+VACUUM_PAGES = int(os.environ.get("VACUUM_PAGES", "1000"))
+VACUUM_MIN_FREE_PAGES = int(os.environ.get("VACUUM_MIN_FREE_PAGES", "1000"))
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass(frozen=True)
+class RetentionRule:
+    """Age and row-count limits for one table; 0 disables a limit."""
+
+    table: str
+    time_column: str
+    max_age_days: float = 0
+    max_rows: int = 0
+    epoch_time: bool = False  # time_column holds Unix seconds, not ISO text
+    recount_sessions: bool = False  # Recompute the session counters of deleted rows
+
+
+RETENTION_POLICY = (
+    RetentionRule(
+        "agent_executions",
+        "started_at",
+        max_age_days=float(os.environ.get("RETENTION_EXECUTIONS_DAYS", "0")),
+        max_rows=int(os.environ.get("RETENTION_EXECUTIONS_MAX_ROWS", "0")),
+    ),
+    RetentionRule(
+        "messages",
+        "timestamp",
+        max_age_days=float(os.environ.get("RETENTION_MESSAGES_DAYS", "0")),
+        max_rows=int(os.environ.get("RETENTION_MESSAGES_MAX_ROWS", "0")),
+        recount_sessions=True,
+    ),
+    RetentionRule(
+        "adk_events",
+        "timestamp",
+        max_age_days=float(os.environ.get("RETENTION_ADK_EVENTS_DAYS", "0")),
+        max_rows=int(os.environ.get("RETENTION_ADK_EVENTS_MAX_ROWS", "0")),
+        epoch_time=True,
+    ),
+)
+
+# Counters the persister keeps per session, from the messages that are left
+_RECOUNT_SESSION = f"""
+    UPDATE sessions
+    SET message_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = sessions.session_id),
+        last_message_preview = (
+            SELECT substr(m.content, 1, {PREVIEW_LENGTH}) FROM messages m
+            WHERE m.session_id = sessions.session_id AND m.content != ''
+            ORDER BY m.timestamp DESC, m.rowid DESC LIMIT 1)
+    WHERE session_id = ?
+"""
+
+
+def _days_ago(days: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+def _compress_rows(rows) -> list[tuple]:
+    return [
+        (compress_json(row["main_agent_data"]), compress_json(row["sub_agents_data"]), row["rowid"])
+        for row in rows
+    ]
+
+
+class Maintenance:
+    """Single background task running retention, compression, vacuum and checkpoints."""
+
+    def __init__(
+        self,
+        policy: tuple[RetentionRule, ...] = RETENTION_POLICY,
+        interval: float = DB_MAINTENANCE_INTERVAL,
+        batch_size: int = DB_MAINTENANCE_BATCH_SIZE,
+        batch_pause: float = DB_MAINTENANCE_BATCH_PAUSE,
+        compress_after_days: float = COMPRESS_AFTER_DAYS,
+        vacuum_pages: int = VACUUM_PAGES,
+        vacuum_min_free_pages: int = VACUUM_MIN_FREE_PAGES,
+    ):
+        self._policy = policy
+        self._interval = interval
+        self._batch_size = batch_size
+        self._batch_pause = batch_pause
+        self._compress_after_days = compress_after_days
+        self._vacuum_pages = vacuum_pages
+        self._vacuum_min_free_pages = vacuum_min_free_pages
+        self._vacuum_disabled_logged = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="db-maintenance")
+
+    async def stop(self) -> None:
+        """Stop after the current batch; the next pass picks up where this one stopped."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Database maintenance failed")
+            await asyncio.sleep(self._interval)
+
+    async def run_once(self) -> dict:
+        """Run every step once and return what each did."""
+        summary = {}
+        for rule in self._policy:
+            summary[f"{rule.table}_deleted"] = await self._apply_retention(rule)
+        summary["executions_compressed"] = await self._compress_cold()
+        summary["pages_vacuumed"] = await self._incremental_vacuum()
+        summary["wal_checkpoint"] = await self._checkpoint()
+        logger.info("Database maintenance done", extra={"maintenance": summary})
+        return summary
+
+    async def _retention_cutoff(self, rule: RetentionRule) -> str | float | None:
+        """Rows with an earlier ``time_column`` value are past the rule's limits."""
+        cutoffs = []
+        if rule.max_age_days > 0:
+            if rule.epoch_time:
+                cutoffs.append(time.time() - rule.max_age_days * 86400)
+            else:
+                cutoffs.append(_days_ago(rule.max_age_days))
+        if rule.max_rows > 0:
+            async with get_pool().reader() as db:
+                # The oldest row to keep
+                cursor = await db.execute(
+                    f"SELECT {rule.time_column} FROM {rule.table} "
+                    f"ORDER BY {rule.time_column} DESC LIMIT 1 OFFSET ?",
+                    (rule.max_rows - 1,),
+                )
+                row = await cursor.fetchone()
+            if row is not None and row[0] is not None:
+                cutoffs.append(row[0])
+        return max(cutoffs, default=None)
+
+    async def _apply_retention(self, rule: RetentionRule) -> int:
+        cutoff = await self._retention_cutoff(rule)
+        if cutoff is None:
+            return 0
+        deleted = 0
+        while True:
+            async with get_pool().writer() as db:
+                cursor = await db.execute(
+                    f"""DELETE FROM {rule.table} WHERE rowid IN
+                        (SELECT rowid FROM {rule.table} WHERE {rule.time_column} < ?
+                         ORDER BY {rule.time_column} LIMIT ?)
+                        RETURNING session_id""",
+                    (cutoff, self._batch_size),
+                )
+                deleted_rows = await cursor.fetchall()
+                count = len(deleted_rows)
+                session_ids = {row[0] for row in deleted_rows}
+                if rule.recount_sessions:
+                    # In the same transaction, so listings never see stale counts
+                    await db.executemany(_RECOUNT_SESSION, [(session_id,) for session_id in session_ids])
+                await db.commit()
+            deleted += count
+            if count < self._batch_size:
+                return deleted
+            await asyncio.sleep(self._batch_pause)
+
+    async def _compress_cold(self) -> int:
+        if self._compress_after_days <= 0:
+            return 0
+        cutoff = _days_ago(self._compress_after_days)
+        compressed = 0
+        while True:
+            async with get_pool().reader() as db:
+                # Matches idx_executions_uncompressed, which only holds text rows
+                cursor = await db.execute(
+                    """SELECT rowid, main_agent_data, sub_agents_data FROM agent_executions
+                       WHERE typeof(main_agent_data) = 'text' AND started_at < ?
+                       ORDER BY started_at LIMIT ?""",
+                    (cutoff, self._batch_size),
+                )
+                rows = await cursor.fetchall()
+            if not rows:
+                return compressed
+            updates = await asyncio.to_thread(_compress_rows, rows)
+            async with get_pool().writer() as db:
+                # Skip rows another worker compressed in the meantime
+                await db.executemany(
+                    """UPDATE agent_executions SET main_agent_data = ?, sub_agents_data = ?
+                       WHERE rowid = ? AND typeof(main_agent_data) = 'text'""",
+                    updates,
+                )
+                await db.commit()
+            compressed += len(rows)
+            if len(rows) < self._batch_size:
+                return compressed
+            await asyncio.sleep(self._batch_pause)
+
+    async def _incremental_vacuum(self) -> int:
+        vacuumed = 0
+        while True:
+            async with get_pool().writer() as db:
+                cursor = await db.execute("PRAGMA auto_vacuum")
+                if (await cursor.fetchone())[0] != _AUTO_VACUUM_INCREMENTAL:
+                    if not self._vacuum_disabled_logged:
+                        self._vacuum_disabled_logged = True
+                        logger.info(
+                            "Incremental vacuum is off for this database; run "
+                            "'python -m adk_web_agent.database.maintenance enable-incremental-vacuum' "
+                            "with the server stopped"
+                        )
+                    return 0
+                cursor = await db.execute("PRAGMA freelist_count")
+                free = (await cursor.fetchone())[0]
+                if free == 0 or (vacuumed == 0 and free < self._vacuum_min_free_pages):
+                    return vacuumed
+                pages = min(free, self._vacuum_pages)
+                # Each step of the statement frees one page, so run it to the end
+                cursor = await db.execute(f"PRAGMA incremental_vacuum({pages})")
+                await cursor.fetchall()
+                await db.commit()
+            vacuumed += pages
+            await asyncio.sleep(self._batch_pause)
+
+    async def _checkpoint(self) -> dict:
+        """Copy the WAL into the database and truncate it to zero bytes.
+
+        Waits up to the busy timeout for readers of older snapshots; if they
+        are still reading, the WAL is left as it is until the next pass.
+        """
+        async with get_pool().writer() as db:
+            cursor = await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, wal_pages, checkpointed = await cursor.fetchone()
+        if busy:
+            logger.info("WAL checkpoint blocked by readers; retrying next pass")
+        return {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed": checkpointed}
+
+
+_maintenance: Maintenance | None = None
+
+
+def start_maintenance() -> Maintenance:
+    """Create and start the global maintenance task (call after ``init_pool``)."""
+    global _maintenance
+    if _maintenance is None:
+        _maintenance = Maintenance()
+        _maintenance.start()
+    return _maintenance
+
+
+async def stop_maintenance() -> None:
+    """Stop the global maintenance task (call before ``close_pool``)."""
+    global _maintenance
+    if _maintenance is not None:
+        maintenance, _maintenance = _maintenance, None
+        await maintenance.stop()
+
+
+def enable_incremental_vacuum(path: str = DB_PATH) -> bool:
+    """Switch an existing database to ``auto_vacuum=INCREMENTAL``; False if it already is.
+
+    Run with the server stopped: the VACUUM rewrites the whole file under
+    an exclusive lock.  It may also renumber ``messages`` rowids, so the
+    ``messages_fts`` index is rebuilt from the table afterwards.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+            return False
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        # Databases not yet migrated to 0002 get the index, built fresh, on next start
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone():
+            with conn:
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES('rebuild')")
+        return True
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline maintenance of the application database.")
+    parser.add_argument("command", choices=["enable-incremental-vacuum"])
+    parser.add_argument("--db", default=DB_PATH, help="Database file (default: APP_DB_PATH)")
+    args = parser.parse_args()
+    if enable_incremental_vacuum(args.db):
+        print(f"{args.db}: incremental vacuum enabled, search index rebuilt")
+    else:
+        print(f"{args.db}: incremental vacuum already enabled")
+
+
+if __name__ == "__main__":
+    main()
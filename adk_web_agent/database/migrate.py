@@ -0,0 +1,126 @@
+"""Versioned schema migrations for the application database.
+
+Migrations are the ``NNNN_name.sql`` files in ``migrations/``, applied in
+version order.  ``schema_version`` records every applied version, so
+startup on a current database costs a single query.
+
+Pending migrations run in one ``BEGIN IMMEDIATE`` transaction.  It takes
+SQLite's write lock up front, so workers starting together queue behind the
+first one (for up to the busy timeout).  Each worker re-reads the version
+once it holds the lock and finds nothing left to do.  A failing migration
+rolls back all of them.
+
+Databases created before versioning have the tables but no
+``schema_version``.  They get the columns older releases lacked and are
+then recorded as up to date.
+"""
+
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+_MIGRATION_NAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+_CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Columns added to existing tables before migrations were versioned
+LEGACY_COLUMNS = [
+    ("messages", "thought_summary", "TEXT"),
+    ("messages", "delegated_agent", "TEXT"),
+    ("messages", "delegation_chain", "TEXT"),
+    ("agent_executions", "thought_summary", "TEXT"),
+    ("agent_executions", "delegated_agent", "TEXT"),
+    ("agent_executions", "delegation_chain", "TEXT"),
+    ("agent_executions", "thinking_tokens", "INTEGER"),
+]
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[tuple[int, str, str]]:
+    """(version, name, sql) of every migration file, oldest first."""
+    migrations = []
+    for path in directory.iterdir():
+        match = _MIGRATION_NAME.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path.read_text()))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def _statements(sql: str) -> Iterator[str]:
+    """Split a script into statements (``executescript`` would commit first)."""
+    statement = ""
+    for line in sql.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement
+            statement = ""
+    # Anything left besides comments is incomplete: let SQLite report it
+    if any(line.strip() and not line.strip().startswith("--") for line in statement.splitlines()):
+        yield statement
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    try:
+        cursor = await db.execute("SELECT MAX(version) FROM schema_version")
+    except sqlite3.OperationalError:
+        return 0  # No schema_version table yet
+    row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def _upgrade_legacy(db: aiosqlite.Connection) -> None:
+    """Add the columns an unversioned database may lack."""
+    for table in dict.fromkeys(table for table, _, _ in LEGACY_COLUMNS):
+        cursor = await db.execute(f"PRAGMA table_info({table})")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if not columns:
+            continue  # Table doesn't exist; the baseline migration creates it
+        for name, column, column_type in LEGACY_COLUMNS:
+            if name == table and column not in columns:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                logger.info("Migration added column %s.%s", table, column)
+
+
+async def migrate(db: aiosqlite.Connection) -> list[int]:
+    """Apply pending migrations; returns the versions applied (usually none)."""
+    migrations = load_migrations()
+    if await current_version(db) >= migrations[-1][0]:
+        return []
+
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        await db.execute(_CREATE_VERSION_TABLE)
+        # Another worker may have migrated while this one waited for the lock
+        current = await current_version(db)
+        pending = [m for m in migrations if m[0] > current]
+        if current == 0:
+            await _upgrade_legacy(db)
+        for version, name, sql in pending:
+            for statement in _statements(sql):
+                await db.execute(statement)
+            await db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name)
+            )
+            logger.info("Applied migration %04d_%s", version, name)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    return [version for version, _, _ in pending]
@@ -1,3 +1,5 @@
+-- Baseline schema.  Never edit an applied migration: add a new numbered file.
+
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
     user_id TEXT PRIMARY KEY,          -- Email address
@@ -67,3 +69,56 @@ CREATE TABLE IF NOT EXISTS agent_executions (
 
 CREATE INDEX IF NOT EXISTS idx_executions_session ON agent_executions(session_id);
 CREATE INDEX IF NOT EXISTS idx_executions_user ON agent_executions(user_id);
+
+-- Full text of thought summaries that the live thought stream truncated
+CREATE TABLE IF NOT EXISTS thought_texts (
+    session_id TEXT NOT NULL,
+    thought_id TEXT NOT NULL,          -- Id of the entry in the thought stream
+    agent_name TEXT,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, thought_id),
+    FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Revoked JWTs (logout), shared by all worker processes
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- Never reused, so workers sync by "seq > last seen"
+    token_digest TEXT NOT NULL UNIQUE,      -- SHA-256 of the token
+    expires_at REAL NOT NULL                -- Token exp; the row is purged after this
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at);
+
+-- ADK session service tables (persistent replacement for in-memory sessions)
+CREATE TABLE IF NOT EXISTS adk_sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,             -- ADK user id (not necessarily a users row)
+    session_id TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,         -- Timestamp of the last appended event
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+
+-- One row per state key; app-scoped keys use user_id = '' and session_id = '',
+-- user-scoped keys use session_id = ''
+CREATE TABLE IF NOT EXISTS adk_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL DEFAULT '',
+    session_id TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,               -- JSON-encoded value
+    PRIMARY KEY (app_name, user_id, session_id, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS adk_events (
+    event_id TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    invocation_id TEXT,
+    timestamp REAL NOT NULL,
+    event_data TEXT NOT NULL           -- JSON: serialized ADK Event
+);
+
+CREATE INDEX IF NOT EXISTS idx_adk_events_session ON adk_events(app_name, user_id, session_id, timestamp);
@@ -0,0 +1,41 @@
+-- Full-text index over message text and thought summaries (GET /api/sessions/search).
+--
+-- External content: the index reads the text back from messages for snippets
+-- instead of storing a second copy.  user_id is indexed so a search can be
+-- restricted to one user's postings; it is not meant for ranking (bm25 weight 0).
+-- A full VACUUM may renumber messages rowids: run
+--   INSERT INTO messages_fts(messages_fts) VALUES('rebuild');
+-- afterwards.
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content,
+    thought_summary,
+    user_id,
+    content='messages',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content, thought_summary, user_id)
+    VALUES (new.rowid, new.content, new.thought_summary, new.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, thought_summary, user_id)
+    VALUES ('delete', old.rowid, old.content, old.thought_summary, old.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS messages_fts_update
+AFTER UPDATE OF content, thought_summary, user_id ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, thought_summary, user_id)
+    VALUES ('delete', old.rowid, old.content, old.thought_summary, old.user_id);
+    INSERT INTO messages_fts (rowid, content, thought_summary, user_id)
+    VALUES (new.rowid, new.content, new.thought_summary, new.user_id);
+END;
+
+-- Default ranking for ORDER BY rank: text over thought summaries, never user_id
+INSERT INTO messages_fts (messages_fts, rank) VALUES ('rank', 'bm25(1.0, 0.5, 0.0)');
+
+-- Index messages stored before this migration
+INSERT INTO messages_fts (messages_fts) VALUES ('rebuild');
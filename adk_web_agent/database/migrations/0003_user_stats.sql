@@ -0,0 +1,62 @@
+-- Per-user usage counters for the admin console (GET /api/admin/users/stats),
+-- maintained by triggers so reading them never scans messages or executions.
+
+CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at, user_id);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    execution_count INTEGER NOT NULL DEFAULT 0,
+    thinking_tokens INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE TRIGGER IF NOT EXISTS user_stats_user_insert AFTER INSERT ON users BEGIN
+    INSERT OR IGNORE INTO user_stats (user_id) VALUES (new.user_id);
+END;
+
+-- Inserts upsert the user's row.  Deletes only update it: when a user is
+-- deleted the cascade may already have removed the row, and it must not
+-- come back.
+CREATE TRIGGER IF NOT EXISTS user_stats_session_insert AFTER INSERT ON sessions BEGIN
+    INSERT INTO user_stats (user_id, session_count) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET session_count = session_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_session_delete AFTER DELETE ON sessions BEGIN
+    UPDATE user_stats SET session_count = session_count - 1 WHERE user_id = old.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_message_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO user_stats (user_id, message_count) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET message_count = message_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_message_delete AFTER DELETE ON messages BEGIN
+    UPDATE user_stats SET message_count = message_count - 1 WHERE user_id = old.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_execution_insert AFTER INSERT ON agent_executions BEGIN
+    INSERT INTO user_stats (user_id, execution_count, thinking_tokens)
+    VALUES (new.user_id, 1, COALESCE(new.thinking_tokens, 0))
+    ON CONFLICT (user_id) DO UPDATE SET
+        execution_count = execution_count + 1,
+        thinking_tokens = thinking_tokens + excluded.thinking_tokens;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_execution_delete AFTER DELETE ON agent_executions BEGIN
+    UPDATE user_stats
+    SET execution_count = execution_count - 1,
+        thinking_tokens = thinking_tokens - COALESCE(old.thinking_tokens, 0)
+    WHERE user_id = old.user_id;
+END;
+
+-- Counters for data stored before this migration
+INSERT OR REPLACE INTO user_stats (user_id, session_count, message_count, execution_count, thinking_tokens)
+SELECT u.user_id,
+       (SELECT COUNT(*) FROM sessions WHERE user_id = u.user_id),
+       (SELECT COUNT(*) FROM messages WHERE user_id = u.user_id),
+       (SELECT COUNT(*) FROM agent_executions WHERE user_id = u.user_id),
+       (SELECT COALESCE(SUM(thinking_tokens), 0) FROM agent_executions WHERE user_id = u.user_id)
+FROM users u;
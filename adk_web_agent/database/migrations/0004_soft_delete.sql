@@ -0,0 +1,8 @@
+-- Soft delete: DELETE endpoints set deleted_at, which hides the row at once;
+-- the background reaper (database/reaper.py) removes it and its children later.
+ALTER TABLE sessions ADD COLUMN deleted_at TIMESTAMP;
+ALTER TABLE users ADD COLUMN deleted_at TIMESTAMP;
+
+-- Only deleted rows are indexed, so the reaper finds its work without a scan
+CREATE INDEX IF NOT EXISTS idx_sessions_deleted ON sessions(deleted_at) WHERE deleted_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_users_deleted ON users(deleted_at) WHERE deleted_at IS NOT NULL;
@@ -0,0 +1,10 @@
+-- Indexes for the retention and compression passes of the maintenance task
+-- (database/maintenance.py), which delete and compress rows oldest first.
+
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_executions_started ON agent_executions(started_at);
+
+-- Executions whose JSON columns are still uncompressed text; rows leave the
+-- index as they are compressed, so finding the next batch never rescans them
+CREATE INDEX IF NOT EXISTS idx_executions_uncompressed ON agent_executions(started_at)
+WHERE typeof(main_agent_data) = 'text';
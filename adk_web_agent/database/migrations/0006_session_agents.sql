@@ -0,0 +1,17 @@
+-- Distinct agents that took part in each session.  sessions.agent_count is
+-- the number of rows here; adding each turn's agents to it counted an agent
+-- again on every turn it was delegated to.
+CREATE TABLE IF NOT EXISTS session_agents (
+    session_id TEXT NOT NULL,
+    agent_name TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_name),
+    FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO session_agents (session_id, agent_name)
+SELECT m.session_id, j.value
+FROM messages m, json_each(m.delegation_chain) j
+WHERE m.delegation_chain IS NOT NULL AND json_valid(m.delegation_chain);
+
+UPDATE sessions
+SET agent_count = (SELECT COUNT(*) FROM session_agents a WHERE a.session_id = sessions.session_id);
@@ -0,0 +1,5 @@
+-- The ADK conversation behind an app session is found through its
+-- _ag_ui_thread_id state, whose value is the JSON-quoted sessions.session_id;
+-- the reaper looks it up when deleting a session.
+CREATE INDEX IF NOT EXISTS idx_adk_state_thread ON adk_state(value)
+WHERE key = '_ag_ui_thread_id';
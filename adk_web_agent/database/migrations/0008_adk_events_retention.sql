@@ -0,0 +1,3 @@
+-- Lets the maintenance task's retention pass delete the oldest ADK events
+-- without scanning the table; timestamps are Unix epoch seconds.
+CREATE INDEX IF NOT EXISTS idx_adk_events_timestamp ON adk_events(timestamp);
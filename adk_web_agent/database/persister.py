@@ -0,0 +1,268 @@
+"""Write-behind persistence of chat turns produced by the live agent stream.
+
+Agent callbacks hand finished turns to ``TurnPersister.submit``.  A single
+writer task drains the queue and coalesces whatever has accumulated into one
+transaction on the pooled writer connection, so a busy server does a handful
+of commits per second instead of one per message.  The queue is bounded:
+when the writer falls behind, ``submit`` waits, which slows producers down
+instead of growing memory without limit.
+
+The full text of truncated thought summaries (``ThoughtTextRecord``) goes
+through the same queue as soon as the summary is produced, so it can be
+fetched while the turn is still running.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+
+from adk_web_agent.database.db import get_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUE = 1000
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.25  # seconds to wait for more records before committing
+PREVIEW_LENGTH = 120
+
+
+@dataclass
+class TurnRecord:
+    """One user turn: the prompt, the final answer and its agent execution."""
+
+    session_id: str
+    user_message_id: str
+    user_text: str
+    assistant_message_id: str
+    assistant_text: str
+    execution_id: str
+    started_at: str
+    completed_at: str
+    duration_ms: int
+    status: str = "completed"
+    thought_summary: str | None = None
+    delegated_agent: str | None = None
+    delegation_chain: list[str] = field(default_factory=list)
+    thinking_tokens: int = 0
+    main_agent_data: dict = field(default_factory=dict)
+    sub_agents_data: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class ThoughtTextRecord:
+    """Full text of a thought summary the live thought stream truncated."""
+
+    session_id: str
+    thought_id: str
+    agent_name: str | None
+    content: str
+    created_at: str
+
+
+# Rows are inserted with INSERT ... SELECT from sessions so the owning user_id
+# comes from the sessions table, and turns for unknown or deleted sessions are
+# skipped instead of failing the whole batch on a foreign key.
+_INSERT_MESSAGE = """
+    INSERT INTO messages (message_id, session_id, user_id, role, content,
+                          thought_summary, delegated_agent, delegation_chain,
+                          timestamp, agent_execution_id)
+    SELECT ?, session_id, user_id, ?, ?, ?, ?, ?, ?, ?
+    FROM sessions WHERE session_id = ? AND deleted_at IS NULL
+"""
+
+_INSERT_EXECUTION = """
+    INSERT INTO agent_executions (execution_id, session_id, message_id, user_id,
+                                  main_agent_data, sub_agents_data, thought_summary,
+                                  delegated_agent, delegation_chain, thinking_tokens,
+                                  started_at, completed_at, duration_ms, status)
+    SELECT ?, session_id, ?, user_id, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+    FROM sessions WHERE session_id = ? AND deleted_at IS NULL
+"""
+
+_INSERT_THOUGHT_TEXT = """
+    INSERT OR REPLACE INTO thought_texts (session_id, thought_id, agent_name, content, created_at)
+    SELECT session_id, ?, ?, ?, ?
+    FROM sessions WHERE session_id = ? AND deleted_at IS NULL
+"""
+
+_INSERT_SESSION_AGENT = """
+    INSERT OR IGNORE INTO session_agents (session_id, agent_name)
+    SELECT session_id, ?
+    FROM sessions WHERE session_id = ? AND deleted_at IS NULL
+"""
+
+# agent_count is the number of distinct agents in session_agents, which the
+# statement above has already updated for this batch
+_UPDATE_SESSION = """
+    UPDATE sessions
+    SET message_count = message_count + ?,
+        agent_count = (SELECT COUNT(*) FROM session_agents a WHERE a.session_id = sessions.session_id),
+        last_message_preview = ?,
+        updated_at = ?
+    WHERE session_id = ? AND deleted_at IS NULL
+"""
+
+
+class TurnPersister:
+    """Bounded queue plus a single writer task that batches turn inserts."""
+
+    def __init__(
+        self,
+        max_queue: int = MAX_QUEUE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self._queue: asyncio.Queue[TurnRecord | ThoughtTextRecord] = asyncio.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="turn-persister")
+
+    async def submit(self, record: TurnRecord | ThoughtTextRecord) -> None:
+        """Queue a record for writing; waits if the queue is full."""
+        if self._stopping:
+            logger.warning("Persister is stopping; dropping %s for session %s",
+                           type(record).__name__, record.session_id)
+            return
+        await self._queue.put(record)
+
+    def submit_nowait(self, record: TurnRecord | ThoughtTextRecord) -> bool:
+        """Queue a record from synchronous code; returns False if the queue is full."""
+        if self._stopping:
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        """Stop accepting turns and flush everything already queued."""
+        self._stopping = True
+        if self._task is not None:
+            await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _next_batch(self) -> list[TurnRecord | ThoughtTextRecord]:
+        """Wait for one record, then gather more for up to ``flush_interval``."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._persist(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _persist(self, batch: list[TurnRecord | ThoughtTextRecord]) -> None:
+        """Write a batch in one transaction; if that fails, retry record by record.
+
+        The failed transaction is rolled back as a whole, so the retry loses
+        only the records that fail on their own.
+        """
+        try:
+            await self._write_batch(batch)
+            return
+        except Exception:
+            if len(batch) == 1:
+                logger.exception("Failed to persist %s for session %s",
+                                 type(batch[0]).__name__, batch[0].session_id)
+                return
+            logger.warning("Failed to persist a batch of %d records; retrying one by one",
+                           len(batch), exc_info=True)
+        for record in batch:
+            try:
+                await self._write_batch([record])
+            except Exception:
+                logger.exception("Failed to persist %s for session %s",
+                                 type(record).__name__, record.session_id)
+
+    async def _write_batch(self, batch: list[TurnRecord | ThoughtTextRecord]) -> None:
+        messages = []
+        executions = []
+        session_agents = []
+        session_updates = []
+        thought_texts = []
+        for r in batch:
+            if isinstance(r, ThoughtTextRecord):
+                thought_texts.append((r.thought_id, r.agent_name, r.content, r.created_at, r.session_id))
+                continue
+            chain = json.dumps(r.delegation_chain)
+            messages.append((
+                r.user_message_id, "user", r.user_text, None, None, None,
+                r.started_at, None, r.session_id,
+            ))
+            messages.append((
+                r.assistant_message_id, "assistant", r.assistant_text,
+                r.thought_summary, r.delegated_agent, chain,
+                r.completed_at, r.execution_id, r.session_id,
+            ))
+            executions.append((
+                r.execution_id, r.assistant_message_id,
+                json.dumps(r.main_agent_data), json.dumps(r.sub_agents_data),
+                r.thought_summary, r.delegated_agent, chain, r.thinking_tokens,
+                r.started_at, r.completed_at, r.duration_ms, r.status,
+                r.session_id,
+            ))
+            session_agents.extend((agent, r.session_id) for agent in dict.fromkeys(r.delegation_chain))
+            session_updates.append((
+                2,
+                r.assistant_text[:PREVIEW_LENGTH] or r.user_text[:PREVIEW_LENGTH],
+                r.completed_at, r.session_id,
+            ))
+
+        async with get_pool().writer() as db:
+            await db.executemany(_INSERT_MESSAGE, messages)
+            await db.executemany(_INSERT_EXECUTION, executions)
+            await db.executemany(_INSERT_SESSION_AGENT, session_agents)
+            await db.executemany(_UPDATE_SESSION, session_updates)
+            await db.executemany(_INSERT_THOUGHT_TEXT, thought_texts)
+            await db.commit()
+
+
+_persister: TurnPersister | None = None
+
+
+def start_persister() -> TurnPersister:
+    """Create and start the global persister (call after ``init_pool``)."""
+    global _persister
+    if _persister is None:
+        _persister = TurnPersister()
+        _persister.start()
+    return _persister
+
+
+async def stop_persister() -> None:
+    """Flush and stop the global persister (call before ``close_pool``)."""
+    global _persister
+    if _persister is not None:
+        persister, _persister = _persister, None
+        await persister.stop()
+
+
+def get_persister() -> TurnPersister | None:
+    """Return the running persister, or None when persistence is disabled."""
+    return _persister
@@ -0,0 +1,273 @@
+"""Background removal of soft-deleted sessions and users.
+
+The DELETE endpoints only set ``deleted_at``, which hides the row at once.
+The reaper then deletes a session's executions, messages and thought texts,
+and the ADK conversation behind it (events, session and session state), in
+batches of ``REAPER_BATCH_SIZE`` rows, committing and pausing after each
+batch.  The write lock is never held for more than one small batch, so
+other writers (the persister, logins) interleave with a large delete.  A
+deleted user is reaped session by session, and the user row goes last.
+
+With ``REAPER_ARCHIVE_DIR`` set, a session's rows are first written to
+``session-<id>.jsonl.gz`` in that directory, one ``{"table", "row"}``
+object per line (``user-<id>.jsonl.gz`` for the user row, without its
+password hash).
+
+The reaper is woken after each delete and also polls every
+``REAPER_INTERVAL`` seconds, which picks up deletes made on other workers
+and work left over from a restart.  Deleting is idempotent, so several
+workers reaping the same session only repeat empty batches.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from adk_web_agent.database.compression import COMPRESSED_COLUMNS, inflate_json
+from adk_web_agent.database.db import get_pool
+
+logger = logging.getLogger(__name__)
+
+REAPER_BATCH_SIZE = int(os.environ.get("REAPER_BATCH_SIZE", "500"))
+REAPER_BATCH_PAUSE = float(os.environ.get("REAPER_BATCH_PAUSE", "0.05"))
+REAPER_INTERVAL = float(os.environ.get("REAPER_INTERVAL", "60"))
+REAPER_ARCHIVE_DIR = os.environ.get("REAPER_ARCHIVE_DIR") or None
+
+# Tables holding a session's rows -> key used to batch them, in deletion
+# order: executions reference messages, which would cascade otherwise
+SESSION_TABLES = {
+    "agent_executions": "rowid",
+    "messages": "rowid",
+    "thought_texts": "thought_id",  # WITHOUT ROWID
+}
+
+# ADK tables of the conversation behind a session -> key used to batch them,
+# in deletion order.  The conversation is found through the _ag_ui_thread_id
+# row in adk_state, so that table goes last.  User- and app-scoped state is
+# shared by all conversations and is kept.
+ADK_TABLES = {
+    "adk_events": "rowid",
+    "adk_sessions": "rowid",
+    "adk_state": "key",  # WITHOUT ROWID
+}
+ADK_THREAD_KEY = "_ag_ui_thread_id"
+
+
+class Reaper:
+    """Single background task deleting soft-deleted rows in small batches."""
+
+    def __init__(
+        self,
+        batch_size: int = REAPER_BATCH_SIZE,
+        batch_pause: float = REAPER_BATCH_PAUSE,
+        interval: float = REAPER_INTERVAL,
+        archive_dir: str | None = REAPER_ARCHIVE_DIR,
+    ):
+        self._batch_size = batch_size
+        self._batch_pause = batch_pause
+        self._interval = interval
+        self._archive_dir = Path(archive_dir) if archive_dir else None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="reaper")
+
+    def wake(self) -> None:
+        """Start reaping now instead of at the next poll."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop after the current batch; the rest is picked up on the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.reap_next():
+                    pass
+            except Exception:
+                logger.exception("Reaper failed; retrying in %.0fs", self._interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def reap_next(self) -> bool:
+        """Reap one deleted session, or finish one deleted user; False if there was nothing to do."""
+        async with get_pool().reader() as db:
+            cursor = await db.execute(
+                "SELECT session_id FROM sessions WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT 1"
+            )
+            session = await cursor.fetchone()
+            cursor = await db.execute(
+                "SELECT user_id FROM users WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT 1"
+            )
+            user = await cursor.fetchone()
+        if session is not None:
+            await self._reap_session(session["session_id"])
+            return True
+        if user is not None:
+            await self._reap_user(user["user_id"])
+            return True
+        return False
+
+    async def _delete_batches(self, table: str, key: str, where: str, params: tuple) -> int:
+        deleted = 0
+        while True:
+            async with get_pool().writer() as db:
+                cursor = await db.execute(
+                    f"""DELETE FROM {table} WHERE {where} AND {key} IN
+                        (SELECT {key} FROM {table} WHERE {where} LIMIT ?)""",
+                    (*params, *params, self._batch_size),
+                )
+                count = cursor.rowcount
+                await db.commit()
+            deleted += count
+            if count < self._batch_size:
+                return deleted
+            await asyncio.sleep(self._batch_pause)
+
+    @staticmethod
+    async def _adk_sessions(session_id: str) -> list[tuple[str, str, str]]:
+        """(app_name, user_id, session_id) of the ADK sessions behind an app session."""
+        async with get_pool().reader() as db:
+            # The key is a literal so idx_adk_state_thread applies; values are
+            # stored with json.dumps by SqliteSessionService
+            cursor = await db.execute(
+                f"SELECT app_name, user_id, session_id FROM adk_state WHERE key = '{ADK_THREAD_KEY}' AND value = ?",
+                (json.dumps(session_id),),
+            )
+            return [tuple(row) for row in await cursor.fetchall()]
+
+    async def _reap_session(self, session_id: str) -> None:
+        adk_sessions = await self._adk_sessions(session_id)
+        if self._archive_dir is not None:
+            await self._archive_session(session_id, adk_sessions)
+        counts = {}
+        for table, key in SESSION_TABLES.items():
+            counts[table] = await self._delete_batches(table, key, "session_id = ?", (session_id,))
+        for adk_key in adk_sessions:
+            for table, key in ADK_TABLES.items():
+                counts[table] = counts.get(table, 0) + await self._delete_batches(
+                    table, key, "app_name = ? AND user_id = ? AND session_id = ?", adk_key
+                )
+        async with get_pool().writer() as db:
+            await db.execute("DELETE FROM sessions WHERE session_id = ? AND deleted_at IS NOT NULL", (session_id,))
+            await db.commit()
+        logger.info("Reaped session %s", session_id, extra={"deleted_rows": counts})
+
+    async def _reap_user(self, user_id: str) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        async with get_pool().writer() as db:
+            # Sessions created with a token issued before the delete
+            cursor = await db.execute(
+                "UPDATE sessions SET deleted_at = ? WHERE user_id = ? AND deleted_at IS NULL", (now, user_id)
+            )
+            late_sessions = cursor.rowcount
+            await db.commit()
+        if late_sessions:
+            return  # Reaped first, like the others
+        if self._archive_dir is not None:
+            await self._archive_user(user_id)
+        async with get_pool().writer() as db:
+            await db.execute("DELETE FROM users WHERE user_id = ? AND deleted_at IS NOT NULL", (user_id,))
+            await db.commit()
+        logger.info("Reaped user %s", user_id)
+
+    # -- Archival -----------------------------------------------------------
+
+    def _archive_path(self, kind: str, key: str) -> Path:
+        safe_key = re.sub(r"[^\w.@-]", "_", key)
+        return self._archive_dir / f"{kind}-{safe_key}.jsonl.gz"
+
+    async def _write_archive(self, path: Path, batches) -> None:
+        """Write JSON lines from an async iterator of line lists, off the event loop.
+
+        An existing archive is kept: it was completed before an interrupted
+        reap, and the rows deleted since then are no longer there to rewrite.
+        """
+        if await asyncio.to_thread(path.exists):
+            return
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".partial")
+        archive = await asyncio.to_thread(gzip.open, partial, "wt", encoding="utf-8")
+        try:
+            async for lines in batches:
+                await asyncio.to_thread(archive.writelines, lines)
+        finally:
+            await asyncio.to_thread(archive.close)
+        # Rename only once complete, so an interrupted archive is redone
+        await asyncio.to_thread(os.replace, partial, path)
+
+    async def _archive_session(self, session_id: str, adk_sessions: list[tuple[str, str, str]]) -> None:
+        async def batches():
+            async with get_pool().reader() as db:
+                for table in ("sessions", *SESSION_TABLES):
+                    cursor = await db.execute(f"SELECT * FROM {table} WHERE session_id = ?", (session_id,))
+                    while rows := await cursor.fetchmany(self._batch_size):
+                        yield [_line(table, row) for row in rows]
+                for adk_key in adk_sessions:
+                    for table in ADK_TABLES:
+                        cursor = await db.execute(
+                            f"SELECT * FROM {table} WHERE app_name = ? AND user_id = ? AND session_id = ?", adk_key
+                        )
+                        while rows := await cursor.fetchmany(self._batch_size):
+                            yield [_line(table, row) for row in rows]
+
+        await self._write_archive(self._archive_path("session", session_id), batches())
+
+    async def _archive_user(self, user_id: str) -> None:
+        async def batches():
+            async with get_pool().reader() as db:
+                cursor = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+                rows = await cursor.fetchall()
+            yield [_line("users", row, exclude=("password_hash",)) for row in rows]
+
+        await self._write_archive(self._archive_path("user", user_id), batches())
+
+
+def _line(table: str, row, exclude: tuple[str, ...] = ()) -> str:
+    values = {key: row[key] for key in row.keys() if key not in exclude}
+    for key in COMPRESSED_COLUMNS.get(table, ()):
+        if key in values:
+            values[key] = inflate_json(values[key])
+    return json.dumps({"table": table, "row": values}, default=str) + "\n"
+
+
+_reaper: Reaper | None = None
+
+
+def start_reaper() -> Reaper:
+    """Create and start the global reaper (call after ``init_pool``)."""
+    global _reaper
+    if _reaper is None:
+        _reaper = Reaper()
+        _reaper.start()
+    return _reaper
+
+
+async def stop_reaper() -> None:
+    """Stop the global reaper (call before ``close_pool``)."""
+    global _reaper
+    if _reaper is not None:
+        reaper, _reaper = _reaper, None
+        await reaper.stop()
+
+
+def get_reaper() -> Reaper | None:
+    """Return the running reaper, or None outside the server."""
+    return _reaper
@@ -0,0 +1,74 @@
+"""Ownership-checked CRUD for the ``sessions`` table, one statement per operation.
+
+Every statement filters on ``user_id`` and returns the affected row with
+``RETURNING``, so the ownership check, the change and reading back the
+result are a single round-trip.  Callers treat ``None`` as "not found or
+not yours" (404); soft-deleted sessions count as not found.  The SQL
+texts are constants, which lets sqlite3's per-connection statement cache
+reuse the prepared statements on pooled connections.
+
+Mutations don't commit: the caller commits on the pooled writer.
+"""
+
+import aiosqlite
+
+SESSION_COLUMNS = (
+    "session_id, user_id, session_name, created_at, updated_at, "
+    "message_count, last_message_preview, agent_count"
+)
+
+_INSERT = f"""
+    INSERT INTO sessions (session_id, user_id, session_name, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    RETURNING {SESSION_COLUMNS}
+"""
+
+_SELECT = f"""
+    SELECT {SESSION_COLUMNS} FROM sessions
+    WHERE session_id = ? AND user_id = ? AND deleted_at IS NULL
+"""
+
+# A NULL name leaves the current one, so renaming and touching share a statement
+_UPDATE = f"""
+    UPDATE sessions
+    SET updated_at = ?, session_name = COALESCE(?, session_name)
+    WHERE session_id = ? AND user_id = ? AND deleted_at IS NULL
+    RETURNING {SESSION_COLUMNS}
+"""
+
+# Soft delete: hidden at once, removed with its messages by the reaper
+_DELETE = """
+    UPDATE sessions SET deleted_at = ?
+    WHERE session_id = ? AND user_id = ? AND deleted_at IS NULL
+    RETURNING session_id
+"""
+
+
+async def _one(db: aiosqlite.Connection, sql: str, params: tuple) -> aiosqlite.Row | None:
+    cursor = await db.execute(sql, params)
+    row = await cursor.fetchone()
+    # Finish the statement so it is reset for reuse before the caller commits
+    await cursor.close()
+    return row
+
+
+async def create_session(
+    db: aiosqlite.Connection, session_id: str, user_id: str, name: str, now: str
+) -> aiosqlite.Row:
+    return await _one(db, _INSERT, (session_id, user_id, name, now, now))
+
+
+async def get_session(db: aiosqlite.Connection, session_id: str, user_id: str) -> aiosqlite.Row | None:
+    return await _one(db, _SELECT, (session_id, user_id))
+
+
+async def update_session(
+    db: aiosqlite.Connection, session_id: str, user_id: str, now: str, name: str | None = None
+) -> aiosqlite.Row | None:
+    """Set ``updated_at`` (and the name, if given); None if not the user's session."""
+    return await _one(db, _UPDATE, (now, name, session_id, user_id))
+
+
+async def delete_session(db: aiosqlite.Connection, session_id: str, user_id: str, now: str) -> bool:
+    """Mark the session deleted (see ``reaper.py``); False if not the user's."""
+    return await _one(db, _DELETE, (now, session_id, user_id)) is not None
@@ -0,0 +1,366 @@
+"""Persistent ADK session service on top of the pooled aiosqlite layer.
+
+Replaces ``InMemorySessionService`` so conversations survive restarts and
+can be served by any worker process:
+
+- State is stored one row per key in ``adk_state``; each event upserts only
+  the keys in its ``state_delta`` instead of rewriting a state snapshot.
+- Events are stored one row each in ``adk_events``.  A read without a
+  ``GetSessionConfig`` (how the Runner reads a session every turn) loads the
+  full history by default.  Setting ``SESSION_EVENT_WINDOW`` opts in to
+  loading only the newest events, cut back to the start of an invocation so
+  no function response loses its call; that window is then also all the
+  model sees of older turns.  Pass a config to read further back: its limits
+  are applied in SQL, and ``GetSessionConfig()`` returns the full history.
+- Recently used sessions are kept in an in-process LRU.  A cached session is
+  revalidated against ``adk_sessions.update_time`` (a primary-key lookup)
+  before reuse, so writes made by other workers are never missed.
+"""
+
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+from adk_web_agent.database.db import get_pool
+
+CACHE_SIZE = 256
+# Opt-in cap on the events a plain get_session() loads; 0 loads the whole history
+SESSION_EVENT_WINDOW = int(os.environ.get("SESSION_EVENT_WINDOW", "0"))
+
+# Session-state keys ag_ui_adk needs from list_sessions() to map an AG-UI
+# thread back to its session; listing does not load any other state.
+_LIST_STATE_PREFIX = "_ag_ui_"
+
+_UPSERT_STATE = """
+    INSERT INTO adk_state (app_name, user_id, session_id, key, value)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (app_name, user_id, session_id, key) DO UPDATE SET value = excluded.value
+"""
+
+
+def _recent(events: list[Event], window: int) -> list[Event]:
+    """The newest ``window`` events, starting at an invocation's user message."""
+    if not window or len(events) <= window:
+        return events
+    events = events[-window:]
+    for i, event in enumerate(events):
+        if event.author == "user":
+            return events[i:]
+    return events  # One invocation longer than the window: keep its tail
+
+
+def _state_rows(app_name: str, user_id: str, session_id: str, state: dict[str, Any]) -> list[tuple]:
+    """Split a (prefixed) state dict into adk_state rows for each scope."""
+    deltas = _session_util.extract_state_delta(state)
+    rows = [(app_name, "", "", k, json.dumps(v)) for k, v in deltas["app"].items()]
+    rows += [(app_name, user_id, "", k, json.dumps(v)) for k, v in deltas["user"].items()]
+    rows += [(app_name, user_id, session_id, k, json.dumps(v)) for k, v in deltas["session"].items()]
+    return rows
+
+
+class SqliteSessionService(BaseSessionService):
+    """ADK session service persisting sessions, state and events in SQLite."""
+
+    def __init__(self, cache_size: int = CACHE_SIZE, event_window: int = SESSION_EVENT_WINDOW):
+        self._cache_size = cache_size
+        self._event_window = event_window
+        # (app_name, user_id, session_id) -> (Session with the recent events,
+        # whether those are all of its events)
+        self._cache: OrderedDict[tuple[str, str, str], tuple[Session, bool]] = OrderedDict()
+
+    # -- cache -------------------------------------------------------------
+
+    def _remember(self, session: Session, complete: bool) -> None:
+        key = (session.app_name, session.user_id, session.id)
+        self._cache[key] = (session, complete)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _forget_scope(self, app_name: str, user_id: str | None = None) -> None:
+        """Drop cached sessions whose merged app/user state just changed."""
+        for key in [k for k in self._cache if k[0] == app_name and (user_id is None or k[1] == user_id)]:
+            del self._cache[key]
+
+    @staticmethod
+    def _copy(session: Session, config: Optional[GetSessionConfig] = None) -> Session:
+        """Hand out a copy so callers never mutate the cached object.
+
+        Events are immutable once appended, so the list is copied but the
+        events themselves are shared.
+        """
+        events = session.events
+        if config is not None:
+            if config.after_timestamp:
+                events = [e for e in events if e.timestamp >= config.after_timestamp]
+            if config.num_recent_events:
+                events = events[-config.num_recent_events:]
+        return Session(
+            id=session.id,
+            app_name=session.app_name,
+            user_id=session.user_id,
+            state=dict(session.state),
+            events=list(events),
+            last_update_time=session.last_update_time,
+        )
+
+    # -- BaseSessionService ------------------------------------------------
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        now = time.time()
+        state = state or {}
+
+        async with get_pool().writer() as db:
+            cursor = await db.execute(
+                """INSERT INTO adk_sessions (app_name, user_id, session_id, create_time, update_time)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT DO NOTHING""",
+                (app_name, user_id, session_id, now, now),
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"Session with id {session_id} already exists.")
+            await db.executemany(_UPSERT_STATE, _state_rows(app_name, user_id, session_id, state))
+            await db.commit()
+
+        if any(k.startswith(State.APP_PREFIX) for k in state):
+            self._forget_scope(app_name)
+        elif any(k.startswith(State.USER_PREFIX) for k in state):
+            self._forget_scope(app_name, user_id)
+
+        async with get_pool().reader() as db:
+            merged = await self._load_state(db, app_name, user_id, session_id)
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=merged,
+            last_update_time=now,
+        )
+        self._remember(session, complete=True)
+        return self._copy(session)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        async with get_pool().reader() as db:
+            cursor = await db.execute(
+                "SELECT update_time FROM adk_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                self._cache.pop(key, None)
+                return None
+
+            cached = self._cache.get(key)
+            if cached is not None and cached[0].last_update_time == row["update_time"]:
+                self._cache.move_to_end(key)
+                session, complete = cached
+                if config is None or complete:
+                    return self._copy(session, config)
+                # Asked for more than the cached window
+                state = dict(session.state)
+            else:
+                state = await self._load_state(db, app_name, user_id, session_id)
+
+            complete = True
+            if config is not None:
+                events = await self._load_events(db, app_name, user_id, session_id, config)
+            elif self._event_window:
+                # One extra row tells whether anything is left out
+                window = GetSessionConfig(num_recent_events=self._event_window + 1)
+                events = await self._load_events(db, app_name, user_id, session_id, window)
+                complete = len(events) <= self._event_window
+                events = _recent(events, self._event_window)
+            else:
+                events = await self._load_events(db, app_name, user_id, session_id, None)
+
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=state,
+            events=events,
+            last_update_time=row["update_time"],
+        )
+        if config is None:
+            self._remember(session, complete)
+            return self._copy(session)
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        sql = """SELECT s.user_id, s.session_id, s.update_time, st.key, st.value
+                 FROM adk_sessions s
+                 LEFT JOIN adk_state st
+                   ON st.app_name = s.app_name AND st.user_id = s.user_id
+                  AND st.session_id = s.session_id AND st.key >= ? AND st.key < ?
+                 WHERE s.app_name = ?"""
+        params: list = [_LIST_STATE_PREFIX, _LIST_STATE_PREFIX + "\uffff", app_name]
+        if user_id is not None:
+            sql += " AND s.user_id = ?"
+            params.append(user_id)
+
+        sessions: dict[tuple[str, str], Session] = {}
+        async with get_pool().reader() as db:
+            cursor = await db.execute(sql, params)
+            for row in await cursor.fetchall():
+                key = (row["user_id"], row["session_id"])
+                session = sessions.get(key)
+                if session is None:
+                    session = sessions[key] = Session(
+                        id=row["session_id"],
+                        app_name=app_name,
+                        user_id=row["user_id"],
+                        last_update_time=row["update_time"],
+                    )
+                if row["key"] is not None:
+                    session.state[row["key"]] = json.loads(row["value"])
+        return ListSessionsResponse(sessions=list(sessions.values()))
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        key = (app_name, user_id, session_id)
+        async with get_pool().writer() as db:
+            await db.execute(
+                "DELETE FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+            await db.execute(
+                "DELETE FROM adk_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+            await db.execute(
+                "DELETE FROM adk_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+            await db.commit()
+        self._cache.pop(key, None)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = self._trim_temp_delta_state(event)
+        key = (session.app_name, session.user_id, session.id)
+        state_delta = event.actions.state_delta if event.actions else None
+        cached = self._cache.get(key)
+
+        async with get_pool().writer() as db:
+            cursor = await db.execute(
+                "SELECT update_time FROM adk_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Session {session.id} not found.")
+            if row["update_time"] > session.last_update_time:
+                raise ValueError(
+                    "The last_update_time provided in the session object is"
+                    " earlier than the update_time in storage."
+                    " Please check if it is a stale session."
+                )
+
+            await db.execute(
+                """INSERT INTO adk_events (event_id, app_name, user_id, session_id,
+                                           invocation_id, timestamp, event_data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (event.id, *key, event.invocation_id, event.timestamp,
+                 event.model_dump_json(exclude_none=True)),
+            )
+            if state_delta:
+                await db.executemany(_UPSERT_STATE, _state_rows(*key, state_delta))
+            await db.execute(
+                "UPDATE adk_sessions SET update_time = ? WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (event.timestamp, *key),
+            )
+            await db.commit()
+        previous_update = row["update_time"]
+
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        if state_delta and any(k.startswith(State.APP_PREFIX) for k in state_delta):
+            self._forget_scope(session.app_name)
+        elif state_delta and any(k.startswith(State.USER_PREFIX) for k in state_delta):
+            self._forget_scope(session.app_name, session.user_id)
+
+        # Extend the cached window, which the caller's events may not match
+        # (e.g. read with a config); if it is stale, the next read reloads it
+        if cached is not None and cached[0].last_update_time == previous_update:
+            events = cached[0].events + [event]
+            recent = _recent(events, self._event_window)
+            updated = self._copy(session)
+            updated.events = recent
+            self._remember(updated, complete=cached[1] and len(recent) == len(events))
+        else:
+            self._cache.pop(key, None)
+        return event
+
+    # -- loading -----------------------------------------------------------
+
+    @staticmethod
+    async def _load_state(db, app_name: str, user_id: str, session_id: str) -> dict[str, Any]:
+        """Merge app-, user- and session-scoped state into one prefixed dict."""
+        cursor = await db.execute(
+            """SELECT user_id, session_id, key, value FROM adk_state
+               WHERE app_name = ? AND (
+                     (user_id = '' AND session_id = '')
+                  OR (user_id = ? AND session_id = '')
+                  OR (user_id = ? AND session_id = ?))""",
+            (app_name, user_id, user_id, session_id),
+        )
+        state: dict[str, Any] = {}
+        for row in await cursor.fetchall():
+            if not row["user_id"]:
+                name = State.APP_PREFIX + row["key"]
+            elif not row["session_id"]:
+                name = State.USER_PREFIX + row["key"]
+            else:
+                name = row["key"]
+            state[name] = json.loads(row["value"])
+        return state
+
+    @staticmethod
+    async def _load_events(
+        db, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]
+    ) -> list[Event]:
+        sql = """SELECT rowid AS seq, timestamp, event_data FROM adk_events
+                 WHERE app_name = ? AND user_id = ? AND session_id = ?"""
+        params: list = [app_name, user_id, session_id]
+        if config is not None and config.after_timestamp:
+            sql += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        if config is not None and config.num_recent_events:
+            # Newest N in SQL, then back to chronological order
+            sql = f"SELECT * FROM ({sql} ORDER BY timestamp DESC, seq DESC LIMIT ?) ORDER BY timestamp, seq"
+            params.append(config.num_recent_events)
+        else:
+            sql += " ORDER BY timestamp, seq"
+        cursor = await db.execute(sql, params)
+        return [Event.model_validate_json(row["event_data"]) for row in await cursor.fetchall()]
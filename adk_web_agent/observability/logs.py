@@ -0,0 +1,211 @@
+"""Non-blocking, structured logging with correlation ids.
+
+``configure_logging()`` routes every log record through a bounded queue to
+a background thread, so the event loop only pays for creating the record;
+formatting and writing happen off the loop.  When the queue is full records
+are dropped and counted in ``log_records_dropped_total`` instead of
+blocking.
+
+Records carry the correlation ids bound in the current context:
+``request_id`` (set per HTTP request by ``RequestContextMiddleware``) and
+``session_id`` / ``invocation_id`` / ``agent`` (set by the agent callbacks).
+Context variables follow asyncio tasks, so tool and fan-out logs get them
+too.
+
+Configuration:
+
+- ``LOG_LEVEL``: root level (default ``INFO``)
+- ``LOG_LEVELS``: per-logger levels, e.g. ``google_adk=DEBUG,adk_web_agent=DEBUG``
+  (noisy libraries default to ``WARNING``)
+- ``LOG_FORMAT``: ``json`` (default) or ``text``
+- ``LOG_QUEUE_SIZE``: records buffered before dropping (default 10000)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator
+
+from adk_web_agent.observability.metrics import REGISTRY
+
+# Libraries that log heavily at DEBUG/INFO; LOG_LEVELS overrides these
+DEFAULT_LEVELS = {
+    "google_adk": "WARNING",
+    "google_genai": "WARNING",
+    "ag_ui_adk": "WARNING",
+    "httpx": "WARNING",
+    "httpcore": "WARNING",
+    "aiosqlite": "WARNING",
+    "uvicorn.access": "WARNING",
+}
+
+REQUEST_ID_HEADER = "x-request-id"
+
+RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+)
+
+_log_context: ContextVar[dict[str, str]] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+
+
+# ---------------------------------------------------------------------------
+# Correlation context
+# ---------------------------------------------------------------------------
+
+def bind_log_context(**fields: str | None) -> None:
+    """Add correlation fields to every record logged from the current context on."""
+    current = _log_context.get()
+    updated = {**current, **{k: v for k, v in fields.items() if v is not None}}
+    if updated != current:
+        _log_context.set(updated)
+
+
+@contextmanager
+def log_context(**fields: str | None) -> Iterator[None]:
+    """Add correlation fields for the duration of the block."""
+    token = _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class RequestContextMiddleware:
+    """ASGI middleware giving each HTTP request a correlation id.
+
+    Uses the client's ``X-Request-ID`` header when present, and echoes the
+    id back on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((REQUEST_ID_HEADER.encode(), request_id.encode("latin-1")))
+            await send(message)
+
+        with log_context(request_id=request_id):
+            await self.app(scope, receive, send_with_id)
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class _ContextQueueHandler(QueueHandler):
+    """Queue handler that captures the correlation context and never blocks."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs in the caller's thread: resolve the message and traceback now
+        # (args may change later) and leave the formatting to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.context = _log_context.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            RECORDS_DROPPED.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context, extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "context":
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous plain-text layout, with the correlation ids appended."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " [" + " ".join(f"{k}={v}" for k, v in context.items()) + "]"
+        return line
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging() -> None:
+    """Install the queue handler on the root logger (once per process).
+
+    The settings are read from the environment here rather than at import,
+    since the server entry point loads ``.env`` after importing this module.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if os.environ.get("LOG_FORMAT", "json") == "json" else TextFormatter())
+    records: queue.Queue = queue.Queue(int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(records))
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    for name, level in {**DEFAULT_LEVELS, **_parse_levels(os.environ.get("LOG_LEVELS", ""))}.items():
+        logging.getLogger(name).setLevel(level)
+    # Let uvicorn's loggers reach the root handler instead of their own
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers.clear()
+        logging.getLogger(name).propagate = True
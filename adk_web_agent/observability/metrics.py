@@ -0,0 +1,186 @@
+"""In-process metrics exposed in the Prometheus text exposition format.
+
+A deliberately small registry (counters, histograms and gauge and counter
+callbacks)
+so the agent pipeline can be scraped without adding a client library.
+Metrics are per process; with several workers, scrape each one or
+aggregate in Prometheus.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Seconds: model calls and agent runs span milliseconds to minutes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series[:-1]):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeCallback(_Metric):
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str], read: Callable[[], dict]):
+        super().__init__(name, help_text, labelnames)
+        self._read = read
+
+    def _samples(self) -> list[str]:
+        values = self._read()
+        lines = []
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class CounterCallback(GaugeCallback):
+    """Counter kept elsewhere (e.g. a pool's own tallies), read at scrape time.
+
+    The name must end in ``_total`` and the values must only ever grow.
+    """
+
+    kind = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, labelnames: Iterable[str], read: Callable[[], dict]) -> GaugeCallback:
+        return self.register(GaugeCallback(name, help_text, labelnames, read))
+
+    def counter_callback(
+        self, name: str, help_text: str, labelnames: Iterable[str], read: Callable[[], dict]
+    ) -> CounterCallback:
+        return self.register(CounterCallback(name, help_text, labelnames, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Agent pipeline --------------------------------------------------------
+
+TURN_DURATION = REGISTRY.histogram(
+    "agent_turn_duration_seconds", "Wall-clock time of a whole user turn.", ["entry_agent"]
+)
+AGENT_DURATION = REGISTRY.histogram(
+    "agent_run_duration_seconds", "Wall-clock time of one agent run within a turn.", ["agent", "status"]
+)
+MODEL_CALL_DURATION = REGISTRY.histogram(
+    "agent_model_call_duration_seconds", "Wall-clock time of one model call.", ["agent", "status"]
+)
+TOOL_CALL_DURATION = REGISTRY.histogram(
+    "agent_tool_call_duration_seconds", "Wall-clock time of one tool call.", ["tool", "status"]
+)
+MODEL_CALL_TOKENS = REGISTRY.histogram(
+    "agent_model_call_tokens", "Tokens per model call by kind (prompt, candidates, thoughts).",
+    ["agent", "kind"], buckets=TOKEN_BUCKETS,
+)
+MODEL_TOKENS = REGISTRY.counter(
+    "agent_model_tokens_total", "Tokens used by model calls by kind (prompt, candidates, thoughts).", ["agent", "kind"]
+)
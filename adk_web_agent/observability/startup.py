@@ -0,0 +1,41 @@
+"""Cold-start timing: how long each startup phase of the server took.
+
+Phases are logged as they finish and exported as the
+``app_startup_seconds{phase=...}`` gauge, so slow starts on autoscaled pods
+show up in the same dashboards as request latency.  For a per-module
+breakdown run the server with ``python -X importtime``.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from adk_web_agent.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_phases: dict[str, float] = {}
+
+REGISTRY.gauge_callback(
+    "app_startup_seconds", "Duration of each server startup phase.", ["phase"], lambda: dict(_phases)
+)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    _phases[phase] = seconds
+    logger.info("Startup phase %s took %.3fs", phase, seconds)
+
+
+@contextmanager
+def startup_phase(phase: str) -> Iterator[None]:
+    """Time the enclosed block as a startup phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
+
+
+def startup_phases() -> dict[str, float]:
+    return {phase: round(seconds, 3) for phase, seconds in _phases.items()}
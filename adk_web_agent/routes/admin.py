@@ -1,11 +1,20 @@
 """Admin routes for user management. All endpoints require admin privileges."""
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import datetime, timezone
+from typing import Literal
+
+import aiosqlite
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from adk_web_agent.auth.middleware import require_admin
-from adk_web_agent.auth.password import hash_password
-from adk_web_agent.database.db import get_db
+from adk_web_agent.auth.password import HashPoolBusy, hash_password_async
+from adk_web_agent.auth.provisioning import BULK_MAX_USERS, parse_user_rows, provision_users
+from adk_web_agent.database.db import get_pool, get_read_db, get_write_db
+from adk_web_agent.database.reaper import get_reaper
+from adk_web_agent.routes.pagination import decode_cursor, encode_cursor, etag_matches, rows_etag
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -26,6 +35,15 @@ class ResetPasswordRequest(BaseModel):
     new_password: str
 
 
+# ``sort`` values of the stats endpoint -> user_stats column
+STATS_SORT_COLUMNS = {
+    "messages": "message_count",
+    "sessions": "session_count",
+    "executions": "execution_count",
+    "thinking_tokens": "thinking_tokens",
+}
+
+
 def _format_user(row) -> dict:
     """Convert a database row to a user dict (no password_hash)."""
     return {
@@ -37,159 +55,329 @@ def _format_user(row) -> dict:
     }
 
 
+def _format_stats(row) -> dict:
+    return {
+        "user_id": row["user_id"],
+        "sessions": row["session_count"],
+        "messages": row["message_count"],
+        "executions": row["execution_count"],
+        "thinking_tokens": row["thinking_tokens"],
+    }
+
+
 @router.get("/users")
-async def list_users(admin: dict = Depends(require_admin)):
-    """List all users."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT user_id, is_active, is_admin, created_at, last_login FROM users ORDER BY created_at"
+async def list_users(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    is_active: bool | None = None,
+    is_admin: bool | None = None,
+    if_none_match: str | None = Header(default=None),
+    admin: dict = Depends(require_admin),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
+    """List users, oldest first, optionally filtered by active / admin status.
+
+    Keyset-paginated on (created_at, user_id): pass the returned
+    ``next_cursor`` back as ``cursor`` to fetch the next page.  Responses
+    carry an ETag; a matching ``If-None-Match`` gets a 304.
+    """
+    sql = "SELECT user_id, is_active, is_admin, created_at, last_login FROM users WHERE deleted_at IS NULL"
+    params: list = []
+    if is_active is not None:
+        sql += " AND is_active = ?"
+        params.append(is_active)
+    if is_admin is not None:
+        sql += " AND is_admin = ?"
+        params.append(is_admin)
+    if cursor:
+        created_at, user_id = decode_cursor(cursor, 2)
+        sql += " AND (created_at, user_id) > (?, ?)"
+        params.extend([created_at, user_id])
+    sql += " ORDER BY created_at, user_id LIMIT ?"
+    params.append(limit + 1)
+
+    db_cursor = await db.execute(sql, params)
+    rows = await db_cursor.fetchall()
+
+    etag = rows_etag(rows, cursor, limit, is_active, is_admin)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["user_id"])
+
+    return {"users": [_format_user(r) for r in rows], "next_cursor": next_cursor}
+
+
+@router.get("/users/stats")
+async def user_stats(
+    response: Response,
+    sort: Literal["messages", "sessions", "executions", "thinking_tokens"] = "messages",
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    admin: dict = Depends(require_admin),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
+    """Per-user session, message, execution and thinking-token totals, heaviest users first.
+
+    The counters are kept up to date by triggers (``user_stats``), so this
+    reads one row per user.  The first page also reports the totals over
+    all users.  Keyset-paginated on (``sort`` column, user_id).
+    """
+    column = STATS_SORT_COLUMNS[sort]
+    # Deleted users keep their counters until the reaper removes them
+    sql = """SELECT s.user_id, session_count, message_count, execution_count, thinking_tokens
+             FROM user_stats s JOIN users u ON u.user_id = s.user_id
+             WHERE u.deleted_at IS NULL"""
+    params: list = []
+    if cursor:
+        value, user_id = decode_cursor(cursor, 2)
+        sql += f" AND ({column}, s.user_id) < (?, ?)"
+        params.extend([value, user_id])
+    sql += f" ORDER BY {column} DESC, s.user_id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    db_cursor = await db.execute(sql, params)
+    rows = await db_cursor.fetchall()
+
+    totals = None
+    if not cursor:
+        db_cursor = await db.execute(
+            """SELECT COUNT(*),
+                      COALESCE(SUM(session_count), 0),
+                      COALESCE(SUM(message_count), 0),
+                      COALESCE(SUM(execution_count), 0),
+                      COALESCE(SUM(thinking_tokens), 0)
+               FROM user_stats s JOIN users u ON u.user_id = s.user_id
+               WHERE u.deleted_at IS NULL"""
         )
-        rows = await cursor.fetchall()
-        return {"users": [_format_user(r) for r in rows]}
-    finally:
-        await db.close()
+        row = await db_cursor.fetchone()
+        totals = dict(zip(("users", "sessions", "messages", "executions", "thinking_tokens"), row))
+
+    etag = rows_etag(rows, sort, cursor, limit, totals)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][column], rows[-1]["user_id"])
+
+    return {"users": [_format_stats(r) for r in rows], "totals": totals, "next_cursor": next_cursor}
 
 
 @router.post("/users")
-async def create_user(req: CreateUserRequest, admin: dict = Depends(require_admin)):
+async def create_user(
+    req: CreateUserRequest,
+    admin: dict = Depends(require_admin),
+):
     """Create a new user."""
-    db = await get_db()
-    try:
-        # Check if user already exists
+    # Check if user already exists; the reader goes back to the pool before hashing
+    async with get_pool().reader() as db:
         cursor = await db.execute(
             "SELECT user_id FROM users WHERE user_id = ?", (req.user_id,)
         )
-        if await cursor.fetchone():
-            raise HTTPException(status_code=409, detail="User already exists")
+        exists = await cursor.fetchone() is not None
+    if exists:
+        raise HTTPException(status_code=409, detail="User already exists")
 
-        hashed = hash_password(req.password)
-        await db.execute(
-            """INSERT INTO users (user_id, password_hash, is_admin, is_active)
-               VALUES (?, ?, ?, ?)""",
-            (req.user_id, hashed, req.is_admin, req.is_active),
-        )
-        await db.commit()
+    # Hash holding no connection, so bcrypt never ties up a reader or the write lock
+    try:
+        hashed = await hash_password_async(req.password)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+    async with get_pool().writer() as writer:
+        try:
+            await writer.execute(
+                """INSERT INTO users (user_id, password_hash, is_admin, is_active)
+                   VALUES (?, ?, ?, ?)""",
+                (req.user_id, hashed, req.is_admin, req.is_active),
+            )
+        except aiosqlite.IntegrityError:
+            raise HTTPException(status_code=409, detail="User already exists")
+        await writer.commit()
 
-        cursor = await db.execute(
+        cursor = await writer.execute(
             "SELECT user_id, is_active, is_admin, created_at, last_login FROM users WHERE user_id = ?",
             (req.user_id,),
         )
         row = await cursor.fetchone()
-        return {"user": _format_user(row)}
-    finally:
-        await db.close()
+    return {"user": _format_user(row)}
+
+
+@router.post("/users/bulk")
+async def bulk_create_users(
+    request: Request,
+    stream: bool = False,
+    admin: dict = Depends(require_admin),
+):
+    """Create many users at once from a JSON array or CSV (``Content-Type: text/csv``).
+
+    Rows have ``user_id``, ``password`` and optionally ``is_admin`` /
+    ``is_active``.  The result lists every row in input order with status
+    ``created``, ``exists`` or ``invalid``; one bad row doesn't fail the
+    others.  With ``stream=true`` the response is NDJSON: progress events
+    while passwords are hashed, then the per-row results and a summary
+    (see ``provisioning.provision_users``).
+    """
+    try:
+        rows = parse_user_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > BULK_MAX_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_USERS} users per import")
+
+    events = provision_users(rows)
+    if stream:
+        return StreamingResponse(
+            (json.dumps(event) + "\n" async for event in events),
+            media_type="application/x-ndjson",
+        )
+
+    results = []
+    summary = {}
+    async for event in events:
+        kind = event.pop("event")
+        if kind == "result":
+            results.append(event)
+        elif kind == "done":
+            summary = event
+    return {"results": results, **summary}
 
 
 @router.put("/users/{user_id}")
 async def update_user(
-    user_id: str, req: UpdateUserRequest, admin: dict = Depends(require_admin)
+    user_id: str,
+    req: UpdateUserRequest,
+    admin: dict = Depends(require_admin),
+    db: aiosqlite.Connection = Depends(get_write_db),
 ):
     """Update user flags (admin, active)."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT user_id, is_admin FROM users WHERE user_id = ?", (user_id,)
+    cursor = await db.execute(
+        "SELECT user_id, is_admin FROM users WHERE user_id = ? AND deleted_at IS NULL", (user_id,)
+    )
+    existing = await cursor.fetchone()
+    if not existing:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Cannot remove own admin flag
+    if user_id == admin["user_id"] and req.is_admin is False:
+        raise HTTPException(
+            status_code=400, detail="Cannot remove your own admin privileges"
         )
-        existing = await cursor.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Cannot remove own admin flag
-        if user_id == admin["user_id"] and req.is_admin is False:
-            raise HTTPException(
-                status_code=400, detail="Cannot remove your own admin privileges"
-            )
 
-        updates = []
-        params: list = []
-        if req.is_admin is not None:
-            updates.append("is_admin = ?")
-            params.append(req.is_admin)
-        if req.is_active is not None:
-            updates.append("is_active = ?")
-            params.append(req.is_active)
-
-        if not updates:
-            raise HTTPException(status_code=400, detail="No fields to update")
-
-        params.append(user_id)
-        await db.execute(
-            f"UPDATE users SET {', '.join(updates)} WHERE user_id = ?", params
-        )
-        await db.commit()
+    updates = []
+    params: list = []
+    if req.is_admin is not None:
+        updates.append("is_admin = ?")
+        params.append(req.is_admin)
+    if req.is_active is not None:
+        updates.append("is_active = ?")
+        params.append(req.is_active)
 
-        cursor = await db.execute(
-            "SELECT user_id, is_active, is_admin, created_at, last_login FROM users WHERE user_id = ?",
-            (user_id,),
-        )
-        row = await cursor.fetchone()
-        return {"user": _format_user(row)}
-    finally:
-        await db.close()
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    params.append(user_id)
+    await db.execute(
+        f"UPDATE users SET {', '.join(updates)} WHERE user_id = ?", params
+    )
+    await db.commit()
+
+    cursor = await db.execute(
+        "SELECT user_id, is_active, is_admin, created_at, last_login FROM users WHERE user_id = ?",
+        (user_id,),
+    )
+    row = await cursor.fetchone()
+    return {"user": _format_user(row)}
 
 
 @router.post("/users/{user_id}/reset-password")
 async def reset_password(
-    user_id: str, req: ResetPasswordRequest, admin: dict = Depends(require_admin)
+    user_id: str,
+    req: ResetPasswordRequest,
+    admin: dict = Depends(require_admin),
 ):
     """Reset a user's password."""
-    db = await get_db()
-    try:
+    async with get_pool().reader() as db:
         cursor = await db.execute(
-            "SELECT user_id FROM users WHERE user_id = ?", (user_id,)
+            "SELECT user_id FROM users WHERE user_id = ? AND deleted_at IS NULL", (user_id,)
         )
-        if not await cursor.fetchone():
-            raise HTTPException(status_code=404, detail="User not found")
+        exists = await cursor.fetchone() is not None
+    if not exists:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        hashed = await hash_password_async(req.new_password)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
 
-        hashed = hash_password(req.new_password)
-        await db.execute(
-            "UPDATE users SET password_hash = ? WHERE user_id = ?",
+    async with get_pool().writer() as writer:
+        await writer.execute(
+            "UPDATE users SET password_hash = ? WHERE user_id = ? AND deleted_at IS NULL",
             (hashed, user_id),
         )
-        await db.commit()
-        return {"success": True}
-    finally:
-        await db.close()
+        await writer.commit()
+    return {"success": True}
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: str, admin: dict = Depends(require_admin)):
-    """Delete a user and cascade-delete their sessions."""
-    db = await get_db()
-    try:
-        # Cannot delete self
-        if user_id == admin["user_id"]:
-            raise HTTPException(
-                status_code=400, detail="Cannot delete your own account"
-            )
-
-        cursor = await db.execute(
-            "SELECT user_id FROM users WHERE user_id = ?", (user_id,)
-        )
-        if not await cursor.fetchone():
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Ensure at least one admin remains
-        cursor = await db.execute(
-            "SELECT COUNT(*) FROM users WHERE is_admin = TRUE AND user_id != ?",
-            (user_id,),
+async def delete_user(
+    user_id: str,
+    admin: dict = Depends(require_admin),
+    db: aiosqlite.Connection = Depends(get_write_db),
+):
+    """Delete a user and their sessions.
+
+    The user can no longer log in and disappears from listings at once; the
+    rows are removed in the background (see ``database/reaper.py``).
+    """
+    # Cannot delete self
+    if user_id == admin["user_id"]:
+        raise HTTPException(
+            status_code=400, detail="Cannot delete your own account"
         )
-        row = await cursor.fetchone()
-        admin_count = row[0] if row else 0
 
-        cursor2 = await db.execute(
-            "SELECT is_admin FROM users WHERE user_id = ?", (user_id,)
+    cursor = await db.execute(
+        "SELECT user_id FROM users WHERE user_id = ? AND deleted_at IS NULL", (user_id,)
+    )
+    if not await cursor.fetchone():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Ensure at least one admin remains
+    cursor = await db.execute(
+        "SELECT COUNT(*) FROM users WHERE is_admin = TRUE AND user_id != ? AND deleted_at IS NULL",
+        (user_id,),
+    )
+    row = await cursor.fetchone()
+    admin_count = row[0] if row else 0
+
+    cursor2 = await db.execute(
+        "SELECT is_admin FROM users WHERE user_id = ?", (user_id,)
+    )
+    target = await cursor2.fetchone()
+    if target and target["is_admin"] and admin_count < 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot delete the last admin user",
         )
-        target = await cursor2.fetchone()
-        if target and target["is_admin"] and admin_count < 1:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot delete the last admin user",
-            )
 
-        await db.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-        await db.commit()
-        return {"success": True}
-    finally:
-        await db.close()
+    now = datetime.now(timezone.utc).isoformat()
+    await db.execute(
+        "UPDATE users SET deleted_at = ?, is_active = FALSE WHERE user_id = ?", (now, user_id)
+    )
+    await db.execute(
+        "UPDATE sessions SET deleted_at = ? WHERE user_id = ? AND deleted_at IS NULL", (now, user_id)
+    )
+    await db.commit()
+    reaper = get_reaper()
+    if reaper is not None:
+        reaper.wake()
+    return {"success": True}
@@ -6,9 +6,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from adk_web_agent.auth.jwt_helper import create_access_token
-from adk_web_agent.auth.middleware import get_current_user
-from adk_web_agent.auth.password import verify_password
-from adk_web_agent.database.db import get_db
+from adk_web_agent.auth.middleware import get_bearer_token, get_current_user
+from adk_web_agent.auth.password import (
+    HashPoolBusy,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
+)
+from adk_web_agent.auth.revocation import revoke
+from adk_web_agent.database.db import get_pool
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -20,44 +26,64 @@ class LoginRequest(BaseModel):
 
 @router.post("/login")
 async def login(req: LoginRequest):
-    """Authenticate user and return JWT token."""
-    db = await get_db()
-    try:
+    """Authenticate user and return JWT token.
+
+    No connection is held while bcrypt runs: the user is read with a short
+    reader checkout, the password verified (and rehashed if needed) on the
+    hash pool, and the writer is taken only for the final UPDATE.
+    """
+    async with get_pool().reader() as db:
         cursor = await db.execute(
-            "SELECT user_id, password_hash, is_active, is_admin, last_login FROM users WHERE user_id = ?",
+            "SELECT user_id, password_hash, is_active, is_admin, last_login FROM users WHERE user_id = ? AND deleted_at IS NULL",
             (req.user_id,),
         )
         row = await cursor.fetchone()
 
-        if not row:
-            raise HTTPException(status_code=401, detail="Invalid email or password")
+    if not row:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        if not row["is_active"]:
-            raise HTTPException(status_code=401, detail="Account is disabled")
+    if not row["is_active"]:
+        raise HTTPException(status_code=401, detail="Account is disabled")
 
-        if not verify_password(req.password, row["password_hash"]):
+    try:
+        if not await verify_password_async(req.password, row["password_hash"]):
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        # Update last_login
-        now = datetime.now(timezone.utc).isoformat()
-        await db.execute(
-            "UPDATE users SET last_login = ? WHERE user_id = ?",
-            (now, req.user_id),
-        )
-        await db.commit()
-
-        token = create_access_token(row["user_id"], bool(row["is_admin"]))
+        # Transparently upgrade hashes made with a different cost factor
+        new_hash = None
+        if needs_rehash(row["password_hash"]):
+            new_hash = await hash_password_async(req.password)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+    now = datetime.now(timezone.utc).isoformat()
+    async with get_pool().writer() as writer:
+        if new_hash:
+            # Only if the hash is still the one verified: a concurrent reset wins
+            await writer.execute(
+                """UPDATE users
+                   SET last_login = ?,
+                       password_hash = CASE WHEN password_hash = ? THEN ? ELSE password_hash END
+                   WHERE user_id = ?""",
+                (now, row["password_hash"], new_hash, req.user_id),
+            )
+        else:
+            await writer.execute(
+                "UPDATE users SET last_login = ? WHERE user_id = ?",
+                (now, req.user_id),
+            )
+        await writer.commit()
+
+    token = create_access_token(row["user_id"], bool(row["is_admin"]))
 
-        return {
-            "token": token,
-            "user": {
-                "user_id": row["user_id"],
-                "is_admin": bool(row["is_admin"]),
-                "last_login": now,
-            },
-        }
-    finally:
-        await db.close()
+    return {
+        "token": token,
+        "user": {
+            "user_id": row["user_id"],
+            "is_admin": bool(row["is_admin"]),
+            "last_login": now,
+        },
+    }
 
 
 @router.get("/validate")
@@ -71,6 +97,10 @@ async def validate(user: dict = Depends(get_current_user)):
 
 
 @router.post("/logout")
-async def logout(user: dict = Depends(get_current_user)):
-    """Logout (stateless — placeholder for future token blocklist)."""
+async def logout(
+    user: dict = Depends(get_current_user),
+    token: str = Depends(get_bearer_token),
+):
+    """Logout by revoking the current token on every worker."""
+    await revoke(token)
     return {"success": True}
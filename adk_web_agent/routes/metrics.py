@@ -0,0 +1,91 @@
+"""Prometheus scrape endpoint for the agent pipeline and server internals.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on
+``GET /metrics``; without it the endpoint is open, so keep it off the public
+interface.
+"""
+
+import hmac
+import os
+import sys
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from adk_web_agent.auth.password import get_hash_pool_stats
+from adk_web_agent.database.db import get_pool
+from adk_web_agent.observability.metrics import REGISTRY
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(tags=["metrics"])
+
+
+def _db_pool() -> dict:
+    try:
+        stats = get_pool().stats()
+    except RuntimeError:
+        return {}  # not initialized yet
+    return {"size": stats["size"], "in_use": stats["in_use"], "idle_readers": stats["idle_readers"]}
+
+
+def _hash_pool() -> dict:
+    stats = get_hash_pool_stats()
+    return {key: stats[key] for key in ("queued", "in_flight")}
+
+
+def _hash_pool_finished() -> dict:
+    stats = get_hash_pool_stats()
+    return {key: stats[key] for key in ("completed", "rejected")}
+
+
+# The caches live in the agent's tool modules, which load with the agent
+# (see server.py); until then there is nothing to report
+
+
+def _tool_cache() -> dict:
+    module = sys.modules.get("adk_web_agent.tools.tool_cache")
+    tools = module.get_tool_cache_stats().get("tools", {}) if module else {}
+    return {(tool, counter): value for tool, counters in tools.items() for counter, value in counters.items()}
+
+
+_RESPONSE_CACHE_SIZE = ("entries", "max_entries")
+
+
+def _response_cache_stats() -> dict:
+    module = sys.modules.get("adk_web_agent.tools.response_cache")
+    cache = module.get_response_cache() if module else None
+    return cache.stats() if cache is not None else {}
+
+
+def _response_cache_size() -> dict:
+    return {key: value for key, value in _response_cache_stats().items() if key in _RESPONSE_CACHE_SIZE}
+
+
+def _response_cache() -> dict:
+    return {key: value for key, value in _response_cache_stats().items() if key not in _RESPONSE_CACHE_SIZE}
+
+
+REGISTRY.gauge_callback("db_pool_connections", "SQLite connection pool state.", ["state"], _db_pool)
+REGISTRY.gauge_callback("bcrypt_pool_jobs", "bcrypt jobs waiting or running.", ["state"], _hash_pool)
+REGISTRY.counter_callback(
+    "bcrypt_pool_jobs_finished_total", "bcrypt jobs completed or rejected as overloaded.", ["outcome"], _hash_pool_finished
+)
+REGISTRY.counter_callback(
+    "tool_cache_events_total", "Tool result cache hits, misses and evictions per tool.", ["tool", "event"], _tool_cache
+)
+REGISTRY.gauge_callback("response_cache_size", "Response cache entries and capacity.", ["state"], _response_cache_size)
+REGISTRY.counter_callback(
+    "response_cache_events_total", "Response cache hits, misses and evictions.", ["event"], _response_cache
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(authorization: str = Header(default=None)):
+    """Current metrics in the Prometheus text exposition format."""
+    if METRICS_TOKEN:
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
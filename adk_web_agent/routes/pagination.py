@@ -0,0 +1,68 @@
+"""Shared helpers for keyset pagination, field projection and ETags."""
+
+import base64
+import hashlib
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by ``encode_cursor``. Raises 400 if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def parse_fields(fields: str | None, allowed: tuple[str, ...]) -> list[str]:
+    """Parse a comma-separated ``fields`` parameter against an allow-list.
+
+    Returns all allowed fields when ``fields`` is empty.
+    """
+    if not fields:
+        return list(allowed)
+    selected = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        if name not in selected:
+            selected.append(name)
+    return selected or list(allowed)
+
+
+def rows_etag(rows, *extra) -> str:
+    """Weak ETag over raw row values, computed without building the response.
+
+    ``extra`` carries request parameters that change the response shape
+    (selected fields, cursor, limit) so different views never share a tag.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(extra).encode("utf-8"))
+    for row in rows:
+        h.update(repr(tuple(row)).encode("utf-8"))
+    return f'W/"{h.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Return True if an ``If-None-Match`` header matches ``etag``.
+
+    Uses the weak comparison required for ``If-None-Match``.
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
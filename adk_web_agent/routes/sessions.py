@@ -1,13 +1,25 @@
 """Session management routes with user isolation."""
 
+import html
+import re
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+import aiosqlite
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 
 from adk_web_agent.auth.middleware import get_current_user
-from adk_web_agent.database.db import get_db
+from adk_web_agent.database import session_repository as repo
+from adk_web_agent.database.db import get_read_db, get_write_db
+from adk_web_agent.database.reaper import get_reaper
+from adk_web_agent.routes.pagination import (
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+    parse_fields,
+    rows_etag,
+)
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
@@ -20,6 +32,53 @@ class UpdateSessionRequest(BaseModel):
     session_name: str | None = None
 
 
+SESSION_FIELDS = (
+    "session_id",
+    "user_id",
+    "session_name",
+    "created_at",
+    "updated_at",
+    "message_count",
+    "last_message_preview",
+    "agent_count",
+)
+
+
+SEARCH_MAX_TERMS = 16
+SNIPPET_TOKENS = 12
+# Snippet highlight markers: control characters that can't occur in the
+# escaped text, replaced with <mark> tags after HTML-escaping it
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def _search_expression(user_id: str, query: str) -> str:
+    """Build an FTS5 query from free text, restricted to the user's messages.
+
+    Every word is quoted so user input can't use FTS5 syntax; the last one
+    matches as a prefix, for search-as-you-type.  The user_id phrase only
+    narrows the index scan (e-mail addresses can tokenize alike); the SQL
+    filter on messages.user_id is what enforces isolation.
+    """
+    terms = _SEARCH_TERM.findall(query)[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable words")
+    words = " ".join(f'"{term}"' for term in terms) + "*"
+    owner = " ".join(_SEARCH_TERM.findall(user_id))
+    return f'user_id : "{owner}" AND {{content thought_summary}} : ({words})'
+
+
+def _highlight(snippet: str | None) -> str | None:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def _project_session(row, fields: list[str]) -> dict:
+    """Convert a database row to a session dict with only the selected fields."""
+    return {name: row[name] for name in fields}
+
+
 def _format_session(row) -> dict:
     """Convert a database row to a session dict."""
     return {
@@ -35,79 +94,172 @@ def _format_session(row) -> dict:
 
 
 @router.get("")
-async def list_sessions(user: dict = Depends(get_current_user)):
-    """List all sessions for the authenticated user."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            """SELECT session_id, user_id, session_name, created_at, updated_at,
-                      message_count, last_message_preview, agent_count
-               FROM sessions
-               WHERE user_id = ?
-               ORDER BY updated_at DESC""",
-            (user["user_id"],),
-        )
-        rows = await cursor.fetchall()
-        return {"sessions": [_format_session(r) for r in rows]}
-    finally:
-        await db.close()
+async def list_sessions(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
+    """List sessions for the authenticated user, newest first.
+
+    Keyset-paginated on (updated_at, session_id): pass the returned
+    ``next_cursor`` back as ``cursor`` to fetch the next page.  ``fields``
+    optionally restricts each session to a comma-separated subset of keys.
+    """
+    selected = parse_fields(fields, SESSION_FIELDS)
+    # The sort key is always needed to build the next cursor
+    columns = list(dict.fromkeys([*selected, "updated_at", "session_id"]))
+
+    sql = f"SELECT {', '.join(columns)} FROM sessions WHERE user_id = ? AND deleted_at IS NULL"
+    params: list = [user["user_id"]]
+    if cursor:
+        updated_at, session_id = decode_cursor(cursor, 2)
+        sql += " AND (updated_at, session_id) < (?, ?)"
+        params.extend([updated_at, session_id])
+    sql += " ORDER BY updated_at DESC, session_id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    db_cursor = await db.execute(sql, params)
+    rows = await db_cursor.fetchall()
+
+    etag = rows_etag(rows, columns, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["updated_at"], rows[-1]["session_id"])
+
+    return {
+        "sessions": [_project_session(r, selected) for r in rows],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("")
 async def create_session(
     req: CreateSessionRequest = CreateSessionRequest(),
     user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_write_db),
 ):
     """Create a new session for the authenticated user."""
     session_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
     name = req.session_name or f"New Chat - {datetime.now(timezone.utc).strftime('%b %d')}"
 
-    db = await get_db()
-    try:
-        await db.execute(
-            """INSERT INTO sessions (session_id, user_id, session_name, created_at, updated_at)
-               VALUES (?, ?, ?, ?, ?)""",
-            (session_id, user["user_id"], name, now, now),
-        )
-        await db.commit()
-
-        return {
-            "session": {
-                "session_id": session_id,
-                "user_id": user["user_id"],
-                "session_name": name,
-                "created_at": now,
-                "updated_at": now,
-                "message_count": 0,
-                "last_message_preview": None,
-                "agent_count": 0,
-            }
-        }
-    finally:
-        await db.close()
+    row = await repo.create_session(db, session_id, user["user_id"], name, now)
+    await db.commit()
+
+    return {"session": _format_session(row)}
+
+
+@router.get("/search")
+async def search_messages(
+    q: str = Query(min_length=1, max_length=500),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
+    """Search the authenticated user's messages and thought summaries, best match first.
+
+    Each result has HTML-escaped snippets of the message text and of the
+    thought summary with the matched words in ``<mark>`` tags (``None`` for a
+    column with no match).  Keyset-paginated on (rank, rowid) like
+    ``list_sessions``: pass ``next_cursor`` back as ``cursor``.
+    """
+    params: list = [_MARK_OPEN, _MARK_CLOSE, SNIPPET_TOKENS] * 2
+    params += [_search_expression(user["user_id"], q), user["user_id"]]
+    sql = """
+        SELECT m.message_id, m.session_id, m.role, m.timestamp, s.session_name,
+               f.rank, f.rowid,
+               snippet(messages_fts, 0, ?, ?, '…', ?) AS content_snippet,
+               snippet(messages_fts, 1, ?, ?, '…', ?) AS thought_snippet
+        FROM messages_fts f
+        JOIN messages m ON m.rowid = f.rowid
+        JOIN sessions s ON s.session_id = m.session_id
+        WHERE messages_fts MATCH ? AND m.user_id = ? AND s.deleted_at IS NULL"""
+    if cursor:
+        rank, rowid = decode_cursor(cursor, 2)
+        sql += " AND (f.rank, f.rowid) > (?, ?)"
+        params.extend([rank, rowid])
+    sql += " ORDER BY f.rank, f.rowid LIMIT ?"
+    params.append(limit + 1)
+
+    db_cursor = await db.execute(sql, params)
+    rows = await db_cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["rowid"])
+
+    results = []
+    for row in rows:
+        thought = row["thought_snippet"]
+        results.append({
+            "message_id": row["message_id"],
+            "session_id": row["session_id"],
+            "session_name": row["session_name"],
+            "role": row["role"],
+            "timestamp": row["timestamp"],
+            "snippet": _highlight(row["content_snippet"] if _MARK_OPEN in row["content_snippet"] else None),
+            "thought_snippet": _highlight(thought if thought and _MARK_OPEN in thought else None),
+        })
+    return {"results": results, "next_cursor": next_cursor}
 
 
 @router.get("/{session_id}")
-async def get_session(session_id: str, user: dict = Depends(get_current_user)):
+async def get_session(
+    session_id: str,
+    user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
     """Get a session by ID, verifying ownership."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            """SELECT session_id, user_id, session_name, created_at, updated_at,
-                      message_count, last_message_preview, agent_count
-               FROM sessions
-               WHERE session_id = ? AND user_id = ?""",
-            (session_id, user["user_id"]),
-        )
-        row = await cursor.fetchone()
+    row = await repo.get_session(db, session_id, user["user_id"])
+    if not row:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return {"session": _format_session(row)}
+
+
+@router.get("/{session_id}/thoughts/{thought_id}")
+async def get_thought(
+    session_id: str,
+    thought_id: str,
+    user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_read_db),
+):
+    """Get the full text of a thought summary the live thought stream truncated.
 
-        if not row:
-            raise HTTPException(status_code=404, detail="Session not found")
+    Stream entries with ``truncated: true`` carry only a preview; their full
+    text is stored a moment after the summary is produced.
+    """
+    cursor = await db.execute(
+        """SELECT t.thought_id, t.agent_name, t.content, t.created_at
+           FROM thought_texts t
+           JOIN sessions s ON s.session_id = t.session_id
+           WHERE t.session_id = ? AND t.thought_id = ? AND s.user_id = ? AND s.deleted_at IS NULL""",
+        (session_id, thought_id, user["user_id"]),
+    )
+    row = await cursor.fetchone()
 
-        return {"session": _format_session(row)}
-    finally:
-        await db.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Thought not found")
+
+    return {
+        "thought": {
+            "id": row["thought_id"],
+            "agent_name": row["agent_name"],
+            "message": row["content"],
+            "timestamp": row["created_at"],
+        }
+    }
 
 
 @router.put("/{session_id}")
@@ -115,66 +267,35 @@ async def update_session(
     session_id: str,
     req: UpdateSessionRequest,
     user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_write_db),
 ):
     """Update a session (rename), verifying ownership."""
-    db = await get_db()
-    try:
-        # Verify ownership
-        cursor = await db.execute(
-            "SELECT session_id FROM sessions WHERE session_id = ? AND user_id = ?",
-            (session_id, user["user_id"]),
-        )
-        if not await cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Session not found")
-
-        now = datetime.now(timezone.utc).isoformat()
-        updates = ["updated_at = ?"]
-        params: list = [now]
-
-        if req.session_name is not None:
-            updates.append("session_name = ?")
-            params.append(req.session_name)
-
-        params.extend([session_id, user["user_id"]])
-
-        await db.execute(
-            f"UPDATE sessions SET {', '.join(updates)} WHERE session_id = ? AND user_id = ?",
-            params,
-        )
-        await db.commit()
-
-        # Return updated session
-        cursor = await db.execute(
-            """SELECT session_id, user_id, session_name, created_at, updated_at,
-                      message_count, last_message_preview, agent_count
-               FROM sessions
-               WHERE session_id = ? AND user_id = ?""",
-            (session_id, user["user_id"]),
-        )
-        row = await cursor.fetchone()
-        return {"session": _format_session(row)}
-    finally:
-        await db.close()
+    now = datetime.now(timezone.utc).isoformat()
+    row = await repo.update_session(db, session_id, user["user_id"], now, req.session_name)
+    if not row:
+        raise HTTPException(status_code=404, detail="Session not found")
+    await db.commit()
+
+    return {"session": _format_session(row)}
 
 
 @router.delete("/{session_id}")
-async def delete_session(session_id: str, user: dict = Depends(get_current_user)):
-    """Delete a session, verifying ownership. Cascade deletes messages/executions."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT session_id FROM sessions WHERE session_id = ? AND user_id = ?",
-            (session_id, user["user_id"]),
-        )
-        if not await cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Session not found")
-
-        await db.execute(
-            "DELETE FROM sessions WHERE session_id = ? AND user_id = ?",
-            (session_id, user["user_id"]),
-        )
-        await db.commit()
-
-        return {"success": True}
-    finally:
-        await db.close()
+async def delete_session(
+    session_id: str,
+    user: dict = Depends(get_current_user),
+    db: aiosqlite.Connection = Depends(get_write_db),
+):
+    """Delete a session, verifying ownership.
+
+    The session disappears at once; its messages and executions are removed
+    in the background (see ``database/reaper.py``).
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    if not await repo.delete_session(db, session_id, user["user_id"], now):
+        raise HTTPException(status_code=404, detail="Session not found")
+    await db.commit()
+    reaper = get_reaper()
+    if reaper is not None:
+        reaper.wake()
+
+    return {"success": True}
@@ -0,0 +1 @@
+# Knowledge base search package: BM25 inverted index over memory-mapped segments
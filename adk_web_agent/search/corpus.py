@@ -0,0 +1,120 @@
+"""Loading the knowledge base corpus from disk into the search index.
+
+The corpus directory has one sub-directory per source (for example
+``internal_docs/``, ``faq_database/``, ``product_catalog/``).  Inside it:
+
+- ``*.md`` / ``*.txt`` files are one document each; the first Markdown
+  heading (or the file name) is the title.
+- ``*.jsonl`` files hold one document per line, e.g. FAQ entries
+  (``question`` / ``answer``) or catalog items (``name`` / ``description``).
+
+``sync_corpus`` is incremental: files whose size and mtime are unchanged since
+the last sync are not even parsed, changed files are re-indexed and documents
+from deleted files are removed.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator
+
+from adk_web_agent.search.index import KnowledgeIndex, get_index
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_DIR = os.environ.get("KNOWLEDGE_BASE_DIR", "./knowledge_base")
+DEFAULT_SOURCE = "internal_docs"
+TEXT_SUFFIXES = (".md", ".txt")
+
+
+def _fingerprint(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _file_id(doc_id: str) -> str:
+    """Corpus-relative file a document id came from."""
+    return doc_id.split("#", 1)[0]
+
+
+def corpus_files(directory: str) -> dict[str, Path]:
+    """Corpus-relative path -> absolute path of every indexable file."""
+    root = Path(directory)
+    if not root.is_dir():
+        return {}
+    return {
+        path.relative_to(root).as_posix(): path
+        for path in sorted(root.rglob("*"))
+        if path.is_file() and (path.suffix in TEXT_SUFFIXES or path.suffix == ".jsonl")
+    }
+
+
+def read_documents(relative: str, path: Path, fingerprint: str) -> Iterator[dict]:
+    """Parse one corpus file into index documents."""
+    parts = relative.split("/")
+    source = parts[0] if len(parts) > 1 else DEFAULT_SOURCE
+
+    if path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed line %d in %s", line_number, relative)
+                    continue
+                yield {
+                    "id": f"{relative}#{item.get('id', line_number)}",
+                    "title": item.get("title") or item.get("question") or item.get("name") or "",
+                    "source": item.get("source", source),
+                    "text": item.get("text") or item.get("answer") or item.get("description") or "",
+                    "fingerprint": fingerprint,
+                }
+        return
+
+    text = path.read_text(encoding="utf-8", errors="replace")
+    title = path.stem.replace("_", " ").replace("-", " ")
+    for line in text.splitlines():
+        if line.startswith("#"):
+            title = line.lstrip("#").strip() or title
+            break
+    yield {"id": relative, "title": title, "source": source, "text": text, "fingerprint": fingerprint}
+
+
+def sync_corpus(index: KnowledgeIndex, directory: str) -> dict:
+    """Bring ``index`` up to date with the files under ``directory``."""
+    indexed: dict[str, dict[str, str]] = {}
+    for doc_id, fingerprint in index.fingerprints().items():
+        indexed.setdefault(_file_id(doc_id), {})[doc_id] = fingerprint
+
+    files = corpus_files(directory)
+    add = []
+    delete = [doc_id for file_id, docs in indexed.items() if file_id not in files for doc_id in docs]
+    changed_files = 0
+    for relative, path in files.items():
+        fingerprint = _fingerprint(path)
+        previous = indexed.get(relative, {})
+        if previous and all(fp == fingerprint for fp in previous.values()):
+            continue
+        changed_files += 1
+        docs = list(read_documents(relative, path, fingerprint))
+        add.extend(docs)
+        current = {doc["id"] for doc in docs}
+        delete.extend(doc_id for doc_id in previous if doc_id not in current)
+
+    if add or delete:
+        index.update(add=add, delete=delete)
+    stats = {"files": len(files), "changed_files": changed_files, "added": len(add),
+             "deleted": len(delete), "documents": len(index)}
+    logger.info("Knowledge base sync: %s", stats)
+    return stats
+
+
+def sync_knowledge_base() -> dict:
+    """Sync the process-wide index with ``KNOWLEDGE_BASE_DIR``.
+
+    Blocking; run it in a thread from async code.
+    """
+    return sync_corpus(get_index(), KNOWLEDGE_BASE_DIR)
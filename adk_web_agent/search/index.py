@@ -0,0 +1,310 @@
+"""BM25 retrieval over a segmented, memory-mapped inverted index.
+
+The index directory holds immutable segment files (see ``segment.py``) and a
+small JSON manifest naming the live segments and, for every live document,
+the segment slot it occupies and a fingerprint of its source.  Ingestion is
+incremental: a batch of new or changed documents becomes one new segment and
+the slots they replace become tombstones.  When too many segments pile up
+they are merged into one.
+
+Readers work from an immutable snapshot of (segments, live slots, corpus
+statistics), so a search never sees a half-applied update.  Writers are
+serialised with a lock file, and readers reload the manifest when it is
+replaced, so several worker processes can share one index directory.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+from adk_web_agent.search.segment import Segment, tokenize, write_segment
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_DIR = os.environ.get("SEARCH_INDEX_DIR", "./search_index")
+MAX_SEGMENTS = int(os.environ.get("SEARCH_MAX_SEGMENTS", "8"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_LENGTH = 240
+
+_MANIFEST = "manifest.json"
+_LOCK = ".lock"
+
+
+@dataclass
+class SearchHit:
+    doc_id: str
+    title: str
+    source: str
+    score: float
+    snippet: str
+    # Share of the query's IDF weight this document matched (0..1)
+    coverage: float
+
+
+@dataclass
+class SearchResults:
+    query: str
+    total_matches: int
+    hits: list[SearchHit] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    segments: dict[str, Segment]
+    live: dict[str, frozenset[int]]
+    documents: dict[str, list]  # doc_id -> [segment, slot, fingerprint]
+    doc_count: int
+    avg_length: float
+    version: tuple | None
+    generation: str
+
+
+def _snippet(text: str, terms: set[str]) -> str:
+    """A window of ``text`` around the first query term it contains."""
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t) for t in terms) if p >= 0]
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4) if positions else 0
+    snippet = " ".join(text[start:start + SNIPPET_LENGTH].split())
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + SNIPPET_LENGTH < len(text) else ""
+    return f"{prefix}{snippet}{suffix}"
+
+
+class KnowledgeIndex:
+    """Inverted index with BM25 scoring and incremental ingestion."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._snapshot = self._load()
+
+    # -- snapshot ----------------------------------------------------------
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, _MANIFEST)
+
+    def _manifest_version(self) -> tuple | None:
+        # A commit replaces the manifest file, so the inode changes even when
+        # two commits land within the filesystem's mtime granularity
+        try:
+            st = os.stat(self._manifest_path())
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self, previous: _Snapshot | None = None) -> _Snapshot:
+        reuse = previous.segments if previous else {}
+        for _ in range(5):
+            version = self._manifest_version()
+            if version is None:
+                return self._snapshot_of({}, {}, 0, None, "")
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                manifest = json.load(f)
+            try:
+                segments = {
+                    name: reuse.get(name) or Segment(os.path.join(self.directory, name))
+                    for name in manifest["segments"]
+                }
+            except FileNotFoundError:
+                # A writer replaced the manifest and dropped a segment between
+                # our two reads; read the new manifest
+                continue
+            return self._snapshot_of(
+                segments, manifest["documents"], manifest["total_length"], version, manifest.get("generation", "")
+            )
+        raise RuntimeError(f"Index at {self.directory} kept changing while loading")
+
+    @staticmethod
+    def _snapshot_of(
+        segments: dict[str, Segment], documents: dict[str, list], total_length: int, version, generation: str
+    ) -> _Snapshot:
+        live: dict[str, set[int]] = {name: set() for name in segments}
+        for segment_name, slot, _ in documents.values():
+            live[segment_name].add(slot)
+        return _Snapshot(
+            segments=segments,
+            live={name: frozenset(slots) for name, slots in live.items()},
+            documents=documents,
+            doc_count=len(documents),
+            avg_length=total_length / len(documents) if documents else 0.0,
+            version=version,
+            generation=generation,
+        )
+
+    def refresh(self) -> None:
+        """Pick up changes written by another process (one ``stat`` call)."""
+        if self._manifest_version() != self._snapshot.version:
+            with self._write_lock:
+                if self._manifest_version() != self._snapshot.version:
+                    self._snapshot = self._load(self._snapshot)
+
+    def __len__(self) -> int:
+        return self._snapshot.doc_count
+
+    @property
+    def generation(self) -> str:
+        """Id of the current index contents; every commit, from any process, changes it."""
+        self.refresh()
+        return self._snapshot.generation
+
+    def fingerprints(self) -> dict[str, str]:
+        """doc_id -> fingerprint of every live document."""
+        return {doc_id: entry[2] for doc_id, entry in self._snapshot.documents.items()}
+
+    # -- search ------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 3) -> SearchResults:
+        """Rank live documents against ``query`` with BM25."""
+        self.refresh()
+        snapshot = self._snapshot
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not snapshot.doc_count:
+            return SearchResults(query=query, total_matches=0)
+
+        n = snapshot.doc_count
+        idf = {}
+        total_idf = 0.0
+        for term in terms:
+            df = sum(seg.doc_freq(term) for seg in snapshot.segments.values())
+            weight = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            # Terms missing from the corpus still count against coverage
+            total_idf += weight
+            if df:
+                idf[term] = weight
+
+        scores: dict[tuple[str, int], float] = {}
+        matched: dict[tuple[str, int], float] = {}
+        avg_length = snapshot.avg_length or 1.0
+        for name, segment in snapshot.segments.items():
+            live = snapshot.live[name]
+            for term, weight in idf.items():
+                for slot, tf in segment.postings(term):
+                    if slot not in live:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doc_length(slot) / avg_length)
+                    key = (name, slot)
+                    scores[key] = scores.get(key, 0.0) + weight * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched[key] = matched.get(key, 0.0) + weight
+
+        hits = []
+        for key, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            doc = snapshot.segments[key[0]].document(key[1])
+            hits.append(SearchHit(
+                doc_id=doc["id"],
+                title=doc["title"],
+                source=doc["source"],
+                score=round(score, 4),
+                snippet=_snippet(doc["text"], set(terms)),
+                coverage=round(matched[key] / total_idf, 4) if total_idf else 0.0,
+            ))
+        return SearchResults(query=query, total_matches=len(scores), hits=hits)
+
+    # -- ingestion ---------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialise writers within this process and across processes."""
+        with self._write_lock:
+            with open(os.path.join(self.directory, _LOCK), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another process may have committed while we waited
+                if self._manifest_version() != self._snapshot.version:
+                    self._snapshot = self._load(self._snapshot)
+                yield
+
+    def update(self, add: Iterable[dict] = (), delete: Iterable[str] = ()) -> None:
+        """Add or replace documents and delete others in one commit.
+
+        Each added document is a dict with ``id``, ``title``, ``source``,
+        ``text`` and an optional ``fingerprint`` used by ``sync_corpus`` to
+        detect changes.  Adding an existing id replaces it.
+        """
+        with self._locked():
+            snapshot = self._snapshot
+            segments = dict(snapshot.segments)
+            documents = dict(snapshot.documents)
+            for doc_id in delete:
+                documents.pop(doc_id, None)
+
+            # Later duplicates in the batch win
+            batch = list({doc["id"]: doc for doc in add}.values())
+            if batch:
+                name = f"seg-{uuid.uuid4().hex[:12]}.kbx"
+                path = os.path.join(self.directory, name)
+                write_segment(path, batch)
+                segments[name] = Segment(path)
+                for slot, doc in enumerate(batch):
+                    documents[doc["id"]] = [name, slot, doc.get("fingerprint")]
+
+            if len(segments) > MAX_SEGMENTS:
+                segments, documents = self._merge(segments, documents)
+            self._commit(segments, documents)
+
+    def _merge(
+        self, segments: dict[str, Segment], documents: dict[str, list]
+    ) -> tuple[dict[str, Segment], dict[str, list]]:
+        """Rewrite all live documents into a single segment."""
+        batch = []
+        for doc_id, (segment_name, slot, fingerprint) in documents.items():
+            doc = segments[segment_name].document(slot)
+            doc["fingerprint"] = fingerprint
+            batch.append(doc)
+        name = f"seg-{uuid.uuid4().hex[:12]}.kbx"
+        path = os.path.join(self.directory, name)
+        write_segment(path, batch)
+        logger.info("Merged %d index segments into %s (%d documents)", len(segments), name, len(batch))
+        merged = {doc["id"]: [name, slot, doc["fingerprint"]] for slot, doc in enumerate(batch)}
+        return {name: Segment(path)}, merged
+
+    def _commit(self, segments: dict[str, Segment], documents: dict[str, list]) -> None:
+        """Atomically publish a new manifest and drop segments with no live docs."""
+        in_use = {segment_name for segment_name, _, _ in documents.values()}
+        segments = {name: seg for name, seg in segments.items() if name in in_use}
+        total_length = sum(segments[name].doc_length(slot) for name, slot, _ in documents.values())
+
+        # Random rather than a counter, so a rebuilt index never reuses one
+        generation = uuid.uuid4().hex
+        tmp_path = f"{self._manifest_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            manifest = {"segments": list(segments), "total_length": total_length, "documents": documents,
+                        "generation": generation}
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+
+        # Unlinking is safe while older snapshots still map the file.  We hold
+        # the writer lock, so any *.tmp left behind is from a crashed writer.
+        for name in os.listdir(self.directory):
+            if (name.endswith(".kbx") and name not in segments) or name.endswith(".kbx.tmp"):
+                os.remove(os.path.join(self.directory, name))
+        self._snapshot = self._snapshot_of(segments, documents, total_length, self._manifest_version(), generation)
+
+
+_index: KnowledgeIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> KnowledgeIndex:
+    """Return the process-wide index, opening it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = KnowledgeIndex(SEARCH_INDEX_DIR)
+    return _index
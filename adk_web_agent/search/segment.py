@@ -0,0 +1,172 @@
+"""Immutable, memory-mapped index segments.
+
+A segment is written once from a batch of documents and never modified;
+deletes are recorded as tombstones in the index manifest.  Opening a segment
+only maps the file and reads a fixed-size header, so cold start cost does not
+grow with the corpus: term lookups binary-search the sorted term table and
+postings are decoded straight out of the mapping.
+
+File layout (all integers little-endian)::
+
+    header       MAGIC, doc_count, term_count, total_length, 6 section offsets
+    terms        term_count x (blob_offset u32, blob_length u16, df u32, postings_offset u64)
+    term blob    UTF-8 terms, sorted by their encoded bytes
+    postings     per term, df x (doc u32, tf u32), ascending doc
+    doc lengths  doc_count x u32 (tokens per document)
+    stored index (doc_count + 1) x u64 offsets into stored fields
+    stored       one JSON object per document (id, title, source, text)
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from collections import Counter
+from typing import Iterator
+
+MAGIC = b"KBSEG001"
+_HEADER = struct.Struct("<8sIIQ6Q")
+_TERM = struct.Struct("<IHIQ")
+_POSTING = struct.Struct("<II")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+MAX_TOKEN_LENGTH = 64  # longer "words" are hashes, base64 and the like
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its "
+    "of on or that the their there these this to was were what when where which "
+    "who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [
+        t for t in _TOKEN_RE.findall(text.lower())
+        if t not in STOPWORDS and len(t) <= MAX_TOKEN_LENGTH
+    ]
+
+
+def document_terms(doc: dict) -> list[str]:
+    """Tokens indexed for a document (the title counts as body text)."""
+    return tokenize(f"{doc.get('title', '')}\n{doc.get('text', '')}")
+
+
+def write_segment(path: str, docs: list[dict]) -> None:
+    """Build a segment file from ``docs`` (dicts with id, title, source, text).
+
+    The file is written to a temporary name and renamed into place, so a
+    crash never leaves a partial segment behind.
+    """
+    postings: dict[bytes, list[tuple[int, int]]] = {}
+    lengths = []
+    for doc_index, doc in enumerate(docs):
+        terms = document_terms(doc)
+        lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            postings.setdefault(term.encode("utf-8"), []).append((doc_index, tf))
+
+    terms = sorted(postings)
+    term_table = bytearray()
+    term_blob = bytearray()
+    postings_blob = bytearray()
+    for term in terms:
+        entries = postings[term]
+        term_table += _TERM.pack(len(term_blob), len(term), len(entries), len(postings_blob))
+        term_blob += term
+        for entry in entries:
+            postings_blob += _POSTING.pack(*entry)
+
+    stored_index = bytearray()
+    stored = bytearray()
+    for doc in docs:
+        stored_index += _U64.pack(len(stored))
+        fields = {k: doc.get(k, "") for k in ("id", "title", "source", "text")}
+        stored += json.dumps(fields, ensure_ascii=False).encode("utf-8")
+    stored_index += _U64.pack(len(stored))
+
+    sections = [term_table, term_blob, postings_blob, b"".join(_U32.pack(n) for n in lengths),
+                stored_index, stored]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(docs), len(terms), sum(lengths), *offsets))
+        for section in sections:
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """Read-only view of a segment file through ``mmap``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Truncated index segment: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.doc_count, self.term_count, self.total_length,
+         self._terms_off, self._blob_off, self._postings_off,
+         self._lengths_off, self._stored_index_off, self._stored_off) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"Not an index segment: {path}")
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _term_entry(self, i: int) -> tuple[bytes, int, int]:
+        blob_offset, blob_length, df, postings_offset = _TERM.unpack_from(
+            self._map, self._terms_off + i * _TERM.size
+        )
+        start = self._blob_off + blob_offset
+        return self._map[start:start + blob_length], df, postings_offset
+
+    def _find(self, term: bytes) -> tuple[int, int] | None:
+        """Binary search the term table; returns (df, postings_offset)."""
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, df, postings_offset = self._term_entry(mid)
+            if found < term:
+                lo = mid + 1
+            elif found > term:
+                hi = mid
+            else:
+                return df, postings_offset
+        return None
+
+    def doc_freq(self, term: str) -> int:
+        entry = self._find(term.encode("utf-8"))
+        return entry[0] if entry else 0
+
+    def postings(self, term: str) -> Iterator[tuple[int, int]]:
+        """Yield (doc_index, term_frequency) pairs for ``term``."""
+        entry = self._find(term.encode("utf-8"))
+        if entry is None:
+            return iter(())
+        df, postings_offset = entry
+        start = self._postings_off + postings_offset
+        return _POSTING.iter_unpack(self._map[start:start + df * _POSTING.size])
+
+    def doc_length(self, doc_index: int) -> int:
+        return _U32.unpack_from(self._map, self._lengths_off + doc_index * _U32.size)[0]
+
+    def document(self, doc_index: int) -> dict:
+        """Stored fields of one document."""
+        start, end = struct.unpack_from("<2Q", self._map, self._stored_index_off + doc_index * _U64.size)
+        return json.loads(self._map[self._stored_off + start:self._stored_off + end])
+
+    def documents(self) -> Iterator[tuple[int, dict]]:
+        for doc_index in range(self.doc_count):
+            yield doc_index, self.document(doc_index)
@@ -0,0 +1,219 @@
+"""ASGI app factory and server entry point.
+
+    adk-web-agent                                        # console script
+    uvicorn adk_web_agent.server:create_app --factory
+
+The REST API (auth, sessions, admin, metrics) only needs FastAPI and the
+database layer.  The AG-UI agent endpoint needs google.adk, google.genai,
+ag_ui_adk and every agent and tool module, which take seconds to import, so
+it is mounted behind ``LazyAgentApp`` and built when first needed.
+``AGENT_WARMUP`` chooses when:
+
+- ``background`` (default): right after startup, without holding it up
+- ``eager``: during startup, before the server accepts requests
+- ``lazy``: on the first agent request
+
+``main()`` binds ``HOST``:``PORT`` and runs ``WEB_CONCURRENCY`` worker
+processes.  Workers share nothing in memory that a request depends on:
+sessions, state and events live in SQLite (``SqliteSessionService``), the
+thought stream is reloaded from session state at the start of every turn
+and logouts reach every worker through ``revoked_tokens``.  Any worker can
+therefore serve any request of any session, with no sticky routing.  Caches
+and metrics are per worker.
+
+Startup phase timings are logged and exported on ``/metrics``
+(see ``observability/startup.py``); ``GET /healthz`` reports whether the
+agent is loaded yet.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Iterable
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from adk_web_agent.observability.logs import RequestContextMiddleware, configure_logging
+from adk_web_agent.observability.startup import startup_phase, startup_phases
+
+logger = logging.getLogger(__name__)
+
+
+def _import_agent_modules() -> None:
+    import ag_ui_adk  # noqa: F401
+    import adk_web_agent.agent  # noqa: F401
+
+
+def _create_agent_app() -> FastAPI:
+    from ag_ui_adk import ADKAgent, add_adk_fastapi_endpoint
+
+    from adk_web_agent.agent import root_agent
+    from adk_web_agent.database.session_service import SqliteSessionService
+
+    adk_agent = ADKAgent(
+        adk_agent=root_agent,
+        app_name="agent_studio",
+        user_id="demo_user",
+        session_timeout_seconds=3600,
+        # Sessions live in SQLite, so idle cleanup must not delete them
+        session_service=SqliteSessionService(),
+        delete_session_on_cleanup=False,
+        use_in_memory_services=True,
+    )
+    agent_app = FastAPI()
+    add_adk_fastapi_endpoint(agent_app, adk_agent, path="/")
+    return agent_app
+
+
+class LazyAgentApp:
+    """ASGI app for the AG-UI agent endpoint, built on first use."""
+
+    def __init__(self):
+        self._app: FastAPI | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._app is not None
+
+    async def load(self) -> FastAPI:
+        if self._app is None:
+            async with self._lock:
+                if self._app is None:
+                    with startup_phase("agent_load"):
+                        # The imports are the slow part; keep them off the event loop
+                        await asyncio.to_thread(_import_agent_modules)
+                        self._app = _create_agent_app()
+        return self._app
+
+    async def warm(self) -> None:
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("Agent warm-up failed; retrying on the first agent request")
+
+    async def __call__(self, scope, receive, send):
+        app = await self.load()
+        await app(scope, receive, send)
+
+
+def create_app(routers: Iterable[APIRouter] = ()) -> FastAPI:
+    """Build the API server app.
+
+    Args:
+        routers: Extra routers to serve, e.g. benchmark probes.  They are
+            included before the agent endpoint, which handles every path
+            not matched earlier.
+    """
+    # Each worker process builds its own app, so set up its logging here
+    configure_logging()
+    with startup_phase("create_app"):
+        from adk_web_agent.auth.password import shutdown_hash_pool
+        from adk_web_agent.database.db import PoolTimeout, close_pool, init_db, init_pool
+        from adk_web_agent.database.maintenance import start_maintenance, stop_maintenance
+        from adk_web_agent.database.persister import start_persister, stop_persister
+        from adk_web_agent.database.reaper import start_reaper, stop_reaper
+        from adk_web_agent.routes.admin import router as admin_router
+        from adk_web_agent.routes.auth import router as auth_router
+        from adk_web_agent.routes.metrics import router as metrics_router
+        from adk_web_agent.routes.sessions import router as sessions_router
+        from adk_web_agent.search.corpus import sync_knowledge_base
+
+        agent_app = LazyAgentApp()
+        # Read here, not at import: main() loads .env after importing this module
+        warmup_mode = os.environ.get("AGENT_WARMUP", "background")
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            """Start the database, pool and background writers; flush and drain on shutdown."""
+            with startup_phase("startup"):
+                await init_db()
+                await asyncio.to_thread(sync_knowledge_base)
+                await init_pool()
+                start_persister()
+                start_reaper()
+                start_maintenance()
+                if warmup_mode == "eager":
+                    await agent_app.load()
+            warmup = asyncio.create_task(agent_app.warm()) if warmup_mode == "background" else None
+            try:
+                yield
+            finally:
+                if warmup is not None and not warmup.done():
+                    warmup.cancel()
+                await stop_maintenance()
+                await stop_reaper()
+                await stop_persister()
+                await close_pool()
+                shutdown_hash_pool()
+
+        app = FastAPI(lifespan=lifespan)
+        app.add_middleware(RequestContextMiddleware)
+
+        @app.exception_handler(PoolTimeout)
+        async def pool_timeout(request: Request, exc: PoolTimeout):
+            # Overload, like a full hash pool: ask the client to retry
+            return JSONResponse(status_code=503, content={"detail": "Server busy, please retry"})
+
+        # Include REST API routers
+        app.include_router(auth_router)
+        app.include_router(sessions_router)
+        app.include_router(admin_router)
+        app.include_router(metrics_router)
+        for router in routers:
+            app.include_router(router)
+
+        @app.get("/healthz")
+        async def healthz():
+            return {"status": "ok", "agent_loaded": agent_app.loaded, "startup": startup_phases()}
+
+        # ADK agent endpoint; mounted last so the routes above take precedence
+        app.mount("/", agent_app)
+    return app
+
+
+def _prepare() -> None:
+    """One-time setup run before starting several workers.
+
+    Migrations are serialized by a database lock, but building the search
+    index races when every worker does it at once on a fresh install;
+    afterwards each worker's startup finds both done.
+    """
+    from adk_web_agent.database.db import init_db
+    from adk_web_agent.search.corpus import sync_knowledge_base
+
+    with startup_phase("prepare"):
+        asyncio.run(init_db())
+        sync_knowledge_base()
+
+
+def main() -> None:
+    """Console entry point: load .env, then serve ``create_app()``."""
+    from dotenv import load_dotenv
+
+    # Before create_app imports the modules that read their config from the environment
+    load_dotenv()
+
+    import uvicorn
+
+    configure_logging()
+    host = os.environ.get("HOST", "localhost")
+    port = int(os.environ.get("PORT", "8000"))
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        _prepare()
+    uvicorn.run(
+        "adk_web_agent.server:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        # Logging is configured by configure_logging(), in every worker
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
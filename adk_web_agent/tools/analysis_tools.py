@@ -2,8 +2,11 @@ import json
 import random
 
 from google.adk.tools import ToolContext
+from adk_web_agent.tools.stats import NumericParseError, summarize
 from adk_web_agent.tools.thought_tools import _emit_tool_thought, _complete_tool_thought
 
+MAX_BINS = 50
+
 
 def analyze_data(data: str, tool_context: ToolContext, analysis_type: str = "general") -> str:
     """Analyze the provided data and extract key insights.
@@ -46,15 +49,21 @@ def analyze_data(data: str, tool_context: ToolContext, analysis_type: str = "gen
     return json.dumps(insights, indent=2)
 
 
-def calculate_metrics(values: str, tool_context: ToolContext) -> str:
-    """Calculate basic statistical metrics from a comma-separated list of values.
+def calculate_metrics(values: str, tool_context: ToolContext, bins: int = 10) -> str:
+    """Calculate statistical metrics from a list of numeric values.
+
+    Reports count, sum, mean, min, max, range, standard deviation, median,
+    percentiles and a histogram.  Very large inputs are processed in chunks;
+    beyond 100,000 values the median, percentiles and histogram are estimated
+    from a uniform sample and flagged as approximate.
 
     Args:
-        values: Comma-separated numeric values to analyze.
+        values: Numeric values separated by commas, spaces or newlines.
         tool_context: The tool context for accessing shared state.
+        bins: Number of equal-width histogram bins.
 
     Returns:
-        A JSON string with calculated metrics.
+        A JSON string with calculated metrics, or an error if a value is not a number.
     """
     # Emit "running" thought
     thought_id = _emit_tool_thought(
@@ -63,20 +72,13 @@ def calculate_metrics(values: str, tool_context: ToolContext) -> str:
     )
 
     try:
-        nums = [float(v.strip()) for v in values.split(",") if v.strip()]
-    except ValueError:
-        nums = [random.uniform(1, 100) for _ in range(5)]
-
-    if not nums:
-        nums = [random.uniform(1, 100) for _ in range(5)]
-
-    result = {
-        "count": len(nums),
-        "mean": round(sum(nums) / len(nums), 2),
-        "min": round(min(nums), 2),
-        "max": round(max(nums), 2),
-        "range": round(max(nums) - min(nums), 2),
-    }
+        result = summarize(values, bins=max(1, min(int(bins), MAX_BINS)))
+    except NumericParseError as e:
+        _complete_tool_thought(tool_context, thought_id, f"Metrics failed — {e}", status="error")
+        return json.dumps({"error": str(e), "token": e.token, "position": e.position}, indent=2)
+    except (ValueError, ArithmeticError) as e:
+        _complete_tool_thought(tool_context, thought_id, f"Metrics failed — {e}", status="error")
+        return json.dumps({"error": str(e)}, indent=2)
 
     # Emit "completed" thought
     _complete_tool_thought(
@@ -0,0 +1,203 @@
+"""Parallel fan-out of independent sub-agent requests.
+
+``create_fan_out_tool(agents)`` builds the ``run_parallel`` tool for the
+root agent.  Each request runs as a branch: a copy of the sub-agent in its
+own runner and throwaway session (the same approach as ADK's ``AgentTool``),
+seeded with a copy of the parent's state.  Branches run concurrently, at
+most ``FANOUT_MAX_CONCURRENCY`` at a time, and each is cancelled after
+``FANOUT_BRANCH_TIMEOUT`` seconds.
+
+Branches report back to the parent turn through the ``BRANCH_STATE_KEY``
+marker in their session state: their agents join the turn's delegation tree
+in their own lane and their thoughts go to the parent's thought stream.
+When all branches are done their state deltas are merged into the parent in
+request order (later requests win on conflicting keys), so the result does
+not depend on which branch happened to finish first.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable
+
+from google.adk.agents import LlmAgent
+from google.adk.tools import ToolContext
+from google.genai import types
+
+from adk_web_agent.tools.thinking_middleware import current_node, finish_branch
+from adk_web_agent.tools.thought_tools import (
+    BRANCH_STATE_KEY,
+    _complete_tool_thought,
+    _emit_tool_thought,
+    get_thought_stream,
+    publish_thought_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+FANOUT_MAX_CONCURRENCY = int(os.environ.get("FANOUT_MAX_CONCURRENCY", "3"))
+FANOUT_BRANCH_TIMEOUT = float(os.environ.get("FANOUT_BRANCH_TIMEOUT", "120"))
+MAX_BRANCHES = 8
+
+# Keys the parent turn maintains itself; never copied back from a branch
+_PARENT_ONLY_KEYS = {
+    "thought_stream",
+    "delegation_tree",
+    "delegation_chain",
+    "delegated_agent",
+    "thinking_tokens_total",
+    BRANCH_STATE_KEY,
+}
+
+
+def _mergeable(key: str) -> bool:
+    return key not in _PARENT_ONLY_KEYS and not key.startswith(("_adk", "_ag_ui", "temp:"))
+
+
+async def _run_branch(
+    agent: LlmAgent,
+    request: str,
+    lane: str,
+    tool_context: ToolContext,
+    semaphore: asyncio.Semaphore,
+) -> dict:
+    """Run one request on a copy of ``agent``; returns its result and state delta."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    invocation_context = tool_context._invocation_context
+    state = {k: v for k, v in tool_context.state.to_dict().items() if not k.startswith("_adk")}
+    state[BRANCH_STATE_KEY] = {
+        "session_id": invocation_context.session.id,
+        "invocation_id": tool_context.invocation_id,
+        "lane": lane,
+        "parent_node": current_node(tool_context),
+    }
+
+    async with semaphore:
+        started = time.monotonic()
+        runner = Runner(
+            app_name=invocation_context.app_name,
+            agent=agent,
+            session_service=InMemorySessionService(),
+        )
+        delta: dict = {}
+        final_text = ""
+        status = "completed"
+        error = None
+        try:
+            session = await runner.session_service.create_session(
+                app_name=invocation_context.app_name,
+                user_id=invocation_context.user_id,
+                state=state,
+            )
+            async with asyncio.timeout(FANOUT_BRANCH_TIMEOUT):
+                async for event in runner.run_async(
+                    user_id=session.user_id,
+                    session_id=session.id,
+                    new_message=types.Content(role="user", parts=[types.Part(text=request)]),
+                ):
+                    if event.actions and event.actions.state_delta:
+                        delta.update(event.actions.state_delta)
+                    if event.content and event.content.parts and not event.partial:
+                        text = "".join(
+                            p.text for p in event.content.parts if p.text and not p.thought
+                        )
+                        if text:
+                            final_text = text
+        except TimeoutError:
+            status, error = "timeout", f"Timed out after {FANOUT_BRANCH_TIMEOUT:g}s"
+        except Exception as e:
+            logger.exception("Fan-out branch %s (%s) failed", lane, agent.name)
+            status, error = "error", str(e)
+        finally:
+            await runner.close()
+
+    result = {
+        "agent": agent.name,
+        "request": request,
+        "status": status,
+        "duration_ms": int((time.monotonic() - started) * 1000),
+    }
+    if error:
+        result["error"] = error
+    else:
+        result["response"] = final_text
+    # Only completed branches contribute state
+    return {"result": result, "delta": delta if status == "completed" else {}}
+
+
+def create_fan_out_tool(agents: list[LlmAgent]) -> Callable:
+    """Build the ``run_parallel`` tool over copies of ``agents``.
+
+    The copies may not transfer control: a branch has no parent or peers to
+    transfer to, and must finish with its own answer.
+    """
+    branch_agents = {
+        agent.name: agent.clone(update={
+            "disallow_transfer_to_parent": True,
+            "disallow_transfer_to_peers": True,
+        })
+        for agent in agents
+    }
+
+    async def run_parallel(agents: list[str], requests: list[str], tool_context: ToolContext) -> str:
+        """Run several independent sub-agent requests at the same time.
+
+        Use this instead of transferring to agents one after another when the
+        requests do not depend on each other, e.g. researching two separate
+        topics.  agents[i] handles requests[i].
+
+        Args:
+            agents: Sub-agent name for each request (research_agent, analysis_agent or summary_agent).
+            requests: The self-contained request text for each sub-agent.
+            tool_context: The tool context for accessing shared state.
+
+        Returns:
+            A JSON string with each agent's response, in request order.
+        """
+        if len(agents) != len(requests):
+            return json.dumps({"error": "agents and requests must have the same length"})
+        if not agents or len(agents) > MAX_BRANCHES:
+            return json.dumps({"error": f"Provide between 1 and {MAX_BRANCHES} requests"})
+        unknown = sorted(set(agents) - set(branch_agents))
+        if unknown:
+            return json.dumps({"error": f"Unknown agents: {', '.join(unknown)}"})
+
+        semaphore = asyncio.Semaphore(FANOUT_MAX_CONCURRENCY)
+        call_id = tool_context.function_call_id or tool_context.invocation_id
+        lanes = [f"{call_id}:{i}" for i in range(len(agents))]
+        thought_ids = [
+            _emit_tool_thought(tool_context, "root_agent", f"Running {name} in parallel: {request[:80]}")
+            for name, request in zip(agents, requests)
+        ]
+
+        outcomes = await asyncio.gather(*(
+            _run_branch(branch_agents[name], request, lane, tool_context, semaphore)
+            for name, request, lane in zip(agents, requests, lanes)
+        ))
+
+        merged: dict = {}
+        thinking_tokens = 0
+        for lane, thought_id, outcome in zip(lanes, thought_ids, outcomes):
+            result = outcome["result"]
+            merged.update({k: v for k, v in outcome["delta"].items() if _mergeable(k)})
+            thinking_tokens += finish_branch(tool_context, lane, result["status"])
+            _complete_tool_thought(
+                tool_context, thought_id,
+                f"{result['agent']} {result['status']} in {result['duration_ms']} ms",
+                status="completed" if result["status"] == "completed" else "error",
+            )
+        if merged:
+            tool_context.state.update(merged)
+        if thinking_tokens:
+            total = tool_context.state.get("thinking_tokens_total", 0)
+            tool_context.state["thinking_tokens_total"] = total + thinking_tokens
+        # Branch thoughts were held back until now (see publish_thought_stream)
+        publish_thought_stream(tool_context, get_thought_stream(tool_context))
+
+        return json.dumps({"results": [outcome["result"] for outcome in outcomes]}, indent=2)
+
+    return run_parallel
@@ -1,16 +1,27 @@
+import os
 import random
 import json
 
 from google.adk.tools import ToolContext
+from adk_web_agent.search.index import get_index
 from adk_web_agent.tools.thought_tools import _emit_tool_thought, _complete_tool_thought
 
+SEARCH_TOP_K = int(os.environ.get("SEARCH_TOP_K", "3"))
+MAX_TOP_K = 20
 
-def search_knowledge_base(query: str, tool_context: ToolContext) -> str:
+
+def knowledge_base_version() -> str:
+    """Generation of the knowledge base index, for keying cached searches."""
+    return get_index().generation
+
+
+def search_knowledge_base(query: str, tool_context: ToolContext, top_k: int = SEARCH_TOP_K) -> str:
     """Search the internal knowledge base for information relevant to the query.
 
     Args:
         query: The search query to find relevant information.
         tool_context: The tool context for accessing shared state.
+        top_k: Maximum number of results to return.
 
     Returns:
         A JSON string with search results.
@@ -21,17 +32,25 @@ def search_knowledge_base(query: str, tool_context: ToolContext) -> str:
         f"Searching knowledge base for: {query}"
     )
 
-    # Simulated knowledge base results
+    top_k = max(1, min(int(top_k), MAX_TOP_K))
+    found = get_index().search(query, top_k=top_k)
+    hits = found.hits
+
     results = {
         "query": query,
-        "results_found": random.randint(3, 15),
-        "sources": ["internal_docs", "faq_database", "product_catalog"],
+        "results_found": found.total_matches,
+        "sources": sorted({hit.source for hit in hits}),
         "top_results": [
-            f"Result 1: Relevant information about '{query}' from internal documentation.",
-            f"Result 2: FAQ entry related to '{query}'.",
-            f"Result 3: Product details matching '{query}'.",
+            {
+                "title": hit.title,
+                "source": hit.source,
+                "score": hit.score,
+                "snippet": hit.snippet,
+            }
+            for hit in hits
         ],
-        "confidence": round(random.uniform(0.75, 0.98), 2),
+        # How much of the query the best match covers, weighted by term rarity
+        "confidence": round(hits[0].coverage, 2) if hits else 0.0,
     }
 
     # Emit "completed" thought
@@ -0,0 +1,163 @@
+"""Prompt-level cache of final answers, checked before the root agent's first model call.
+
+Opt-in with ``LLM_CACHE_ENABLED=1``.  A conversation's opening prompt is
+looked up in two steps:
+
+1. exact match on the prompt with case and whitespace normalized;
+2. near-duplicate match: Jaccard similarity at or above
+   ``LLM_CACHE_SIMILARITY`` of the prompts' word-bigram shingles (stopwords
+   dropped, with start and end markers).  Bigrams keep word order, so
+   "convert USD to EUR" never matches "convert EUR to USD".  Candidates come
+   from a shingle -> entries index, so only entries sharing a shingle with
+   the prompt are compared.
+
+Entries are scoped per user (``LLM_CACHE_SCOPE=user``, the default: the
+owner of the conversation's ``sessions`` row) or shared by everyone
+(``global``), expire after ``LLM_CACHE_TTL`` seconds and
+are evicted least-recently-used beyond ``LLM_CACHE_SIZE``.  Each entry keeps
+the thought-stream entries of the run that produced it so a hit can replay
+the timeline.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from adk_web_agent.search.segment import tokenize
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "0") == "1"
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_SCOPE = os.environ.get("LLM_CACHE_SCOPE", "user")
+LLM_CACHE_SIMILARITY = float(os.environ.get("LLM_CACHE_SIMILARITY", "0.85"))
+
+
+@dataclass
+class CachedResponse:
+    scope: str
+    text: str
+    agent: str | None
+    thoughts: list[dict]
+    shingles: frozenset[str]
+    expires_at: float
+
+
+def _shingles(prompt: str) -> frozenset[str]:
+    """Adjacent content-word pairs of a prompt, including its first and last word."""
+    tokens = tokenize(prompt)
+    if not tokens:
+        return frozenset()
+    words = ["^", *tokens, "$"]
+    return frozenset(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+def _exact_key(scope: str, prompt: str) -> str:
+    normalized = " ".join(prompt.casefold().split())
+    return hashlib.sha256(f"{scope}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU of final answers with exact and near-duplicate lookup."""
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_SIZE,
+        ttl: float = LLM_CACHE_TTL,
+        similarity: float = LLM_CACHE_SIMILARITY,
+    ):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._similarity = similarity
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        # (scope, shingle) -> exact keys of entries containing that shingle
+        self._postings: dict[tuple[str, str], set[str]] = {}
+        self._stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+
+    def scope_for(self, owner: str | None) -> str | None:
+        """Scope for a conversation's owner; None if entries are per user and there is no owner."""
+        if LLM_CACHE_SCOPE != "user":
+            return "global"
+        return f"user:{owner}" if owner else None
+
+    def lookup(self, scope: str, prompt: str) -> CachedResponse | None:
+        now = time.time()
+        key = _exact_key(scope, prompt)
+        entry = self._live(key, now)
+        if entry is not None:
+            self._stats["exact_hits"] += 1
+            return entry
+
+        shingles = _shingles(prompt)
+        best, best_score = None, 0.0
+        if shingles:
+            candidates = set()
+            for shingle in shingles:
+                candidates |= self._postings.get((scope, shingle), set())
+            for candidate in candidates:
+                other = self._live(candidate, now, touch=False)
+                if other is None:
+                    continue
+                score = len(shingles & other.shingles) / len(shingles | other.shingles)
+                if score > best_score:
+                    best, best_score = candidate, score
+        if best is not None and best_score >= self._similarity:
+            self._stats["similar_hits"] += 1
+            return self._live(best, now)
+        self._stats["misses"] += 1
+        return None
+
+    def store(self, scope: str, prompt: str, text: str, agent: str | None, thoughts: list[dict]) -> None:
+        key = _exact_key(scope, prompt)
+        self._remove(key)
+        entry = CachedResponse(
+            scope=scope,
+            text=text,
+            agent=agent,
+            thoughts=thoughts,
+            shingles=_shingles(prompt),
+            expires_at=time.time() + self._ttl,
+        )
+        self._entries[key] = entry
+        for shingle in entry.shingles:
+            self._postings.setdefault((scope, shingle), set()).add(key)
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _live(self, key: str, now: float, touch: bool = True) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        if touch:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for shingle in entry.shingles:
+            keys = self._postings.get((entry.scope, shingle))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[(entry.scope, shingle)]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "max_entries": self._max_entries, **self._stats}
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Return the process-wide cache, or None when it is disabled."""
+    global _cache
+    if _cache is None and LLM_CACHE_ENABLED:
+        _cache = ResponseCache()
+    return _cache
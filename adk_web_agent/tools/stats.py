@@ -0,0 +1,233 @@
+"""Streaming numeric parsing and summary statistics for ``calculate_metrics``.
+
+Values are parsed straight out of the input string into fixed-size
+``array('d')`` chunks, never into a list of substrings, and each chunk is
+folded into a ``StatsAccumulator``:
+
+- count, sum, min, max, mean and variance are exact for any input size
+  (chunk moments are merged with Chan et al.'s parallel update).  Moments
+  are kept in units of a power of two large enough that squared deviations
+  of values up to the float maximum cannot overflow; a result that is
+  itself out of float range raises ``OverflowError``;
+- percentiles and the histogram come from the values themselves while there
+  are at most ``sample_size`` of them, and from a uniform reservoir sample
+  (Vitter/Li "Algorithm L") beyond that, so memory stays bounded.
+"""
+
+import math
+import random
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator
+
+CHUNK_SIZE = 8192
+# Values below 2**SAFE_EXPONENT are used unscaled (their squares fit easily)
+SAFE_EXPONENT = 256
+SAMPLE_SIZE = 100_000
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+# Values may be separated by commas, whitespace or newlines (pasted columns)
+_TOKEN_RE = re.compile(r"[^,\s]+")
+
+
+class NumericParseError(ValueError):
+    """Raised for a token that is not a finite number."""
+
+    def __init__(self, token: str, position: int):
+        self.token = token
+        self.position = position
+        super().__init__(f"Value #{position} is not a finite number: {token[:40]!r}")
+
+
+def iter_chunks(values: str, chunk_size: int = CHUNK_SIZE) -> Iterator[array]:
+    """Parse ``values`` into chunks of at most ``chunk_size`` floats."""
+    chunk = array("d")
+    position = 0
+    for match in _TOKEN_RE.finditer(values):
+        position += 1
+        token = match.group()
+        try:
+            value = float(token)
+        except ValueError:
+            raise NumericParseError(token, position) from None
+        if not math.isfinite(value):
+            raise NumericParseError(token, position)
+        chunk.append(value)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = array("d")
+    if chunk:
+        yield chunk
+
+
+def _sig(x: float, digits: int = 6) -> float:
+    return float(f"{x:.{digits}g}")
+
+
+class StatsAccumulator:
+    """Single-pass reducer over chunks of floats."""
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE, seed: int | None = None):
+        self.count = 0
+        # Sum, mean and M2 in units of 2**_exponent (M2 in its square); the
+        # sum carries the rounding error of its last update in _total_error
+        self._exponent = 0
+        self._total = 0.0
+        self._total_error = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sample_size = sample_size
+        self._sample = array("d")
+        self._rng = random.Random(seed)
+        self._w = 0.0
+        self._next_replace = 0
+
+    @property
+    def total(self) -> float:
+        return _unscale(self._total, self._exponent, "sum")
+
+    @property
+    def mean(self) -> float:
+        return _unscale(self._mean, self._exponent, "mean")
+
+    @property
+    def exact(self) -> bool:
+        """True while the sample still holds every value seen."""
+        return self.count <= self._sample_size
+
+    def add(self, chunk: array) -> None:
+        n = len(chunk)
+        if not n:
+            return
+        self.min = min(self.min, min(chunk))
+        self.max = max(self.max, max(chunk))
+        self._rescale(max(-self.min, self.max))
+        exponent = self._exponent
+        scaled = [math.ldexp(x, -exponent) for x in chunk] if exponent else chunk
+        chunk_mean = math.fsum(scaled) / n
+        chunk_m2 = math.fsum((x - chunk_mean) ** 2 for x in scaled)
+
+        total = self.count + n
+        delta = chunk_mean - self._mean
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self._mean += delta * n / total
+        total_sum = math.fsum([self._total, self._total_error, *scaled])
+        self._total_error = math.fsum([self._total, self._total_error, *scaled, -total_sum])
+        self._total = total_sum
+
+        self._add_to_sample(chunk)
+        self.count = total
+
+    def _rescale(self, largest: float) -> None:
+        """Grow the unit so values up to ``largest`` stay below 2**SAFE_EXPONENT."""
+        exponent = max(0, math.frexp(largest)[1] - SAFE_EXPONENT)
+        if exponent <= self._exponent:
+            return
+        shift = exponent - self._exponent
+        self._total = math.ldexp(self._total, -shift)
+        self._total_error = math.ldexp(self._total_error, -shift)
+        self._mean = math.ldexp(self._mean, -shift)
+        self._m2 = math.ldexp(self._m2, -2 * shift)
+        self._exponent = exponent
+
+    def _add_to_sample(self, chunk: array) -> None:
+        start = self.count  # global index of chunk[0]
+        room = self._sample_size - len(self._sample)
+        if room > 0:
+            self._sample.extend(chunk[:room])
+            if len(self._sample) < self._sample_size:
+                return
+            self._start_skipping(start + room - 1)
+        # Algorithm L: jump straight to the next index that enters the sample
+        end = start + len(chunk)
+        while self._next_replace < end:
+            self._sample[self._rng.randrange(self._sample_size)] = chunk[self._next_replace - start]
+            self._start_skipping(self._next_replace)
+
+    def _uniform(self) -> float:
+        # log() needs (0, 1); random() can return exactly 0.0
+        return self._rng.random() or 1e-300
+
+    def _start_skipping(self, index: int) -> None:
+        k = self._sample_size
+        self._w = (self._w or 1.0) * math.exp(math.log(self._uniform()) / k)
+        self._next_replace = index + int(math.log(self._uniform()) / math.log(1 - self._w)) + 1
+
+    def variance(self) -> float:
+        """Sample variance (n - 1 denominator)."""
+        return _unscale(self._scaled_variance(), 2 * self._exponent, "variance")
+
+    def std_dev(self) -> float:
+        """Sample standard deviation, which fits a float whenever the values do."""
+        return _unscale(math.sqrt(self._scaled_variance()), self._exponent, "standard deviation")
+
+    def _scaled_variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def summary(self, bins: int = 10) -> dict:
+        if not self.count:
+            raise ValueError("No numeric values provided")
+        ordered = array("d", sorted(self._sample))
+        result = {
+            "count": self.count,
+            "sum": self.total,
+            "mean": _sig(self.mean),
+            "min": _sig(self.min),
+            "max": _sig(self.max),
+            "range": _sig(_finite(self.max - self.min, "range")),
+            "std_dev": _sig(self.std_dev()),
+            "median": _sig(_percentile(ordered, 50)),
+            "percentiles": {f"p{p}": _sig(_percentile(ordered, p)) for p in PERCENTILES},
+            "histogram": _histogram(ordered, self.min, self.max, bins, self.count),
+        }
+        if not self.exact:
+            result["approximate"] = ["median", "percentiles", "histogram"]
+            result["sample_size"] = len(ordered)
+        return result
+
+
+def _unscale(value: float, exponent: int, name: str) -> float:
+    try:
+        return math.ldexp(value, exponent)
+    except OverflowError:
+        raise OverflowError(f"The {name} of the values is too large to represent") from None
+
+
+def _finite(value: float, name: str) -> float:
+    if math.isinf(value):
+        raise OverflowError(f"The {name} of the values is too large to represent")
+    return value
+
+
+def _percentile(ordered: array, p: float) -> float:
+    """Linear-interpolated percentile of sorted values."""
+    position = (len(ordered) - 1) * p / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _histogram(ordered: array, low: float, high: float, bins: int, count: int) -> list[dict]:
+    """Equal-width bins over [low, high], scaled to ``count`` if sampled."""
+    if high == low:
+        return [{"start": _sig(low), "end": _sig(high), "count": count}]
+    width = (high - low) / bins
+    edges = [low + i * width for i in range(bins)] + [high]
+    # Bins are half-open except the last, which also counts the maximum
+    positions = [bisect_left(ordered, edge) for edge in edges[:-1]] + [bisect_right(ordered, high)]
+    scale = count / len(ordered)
+    return [
+        {"start": _sig(edges[i]), "end": _sig(edges[i + 1]), "count": round((positions[i + 1] - positions[i]) * scale)}
+        for i in range(bins)
+    ]
+
+
+def summarize(values: str, bins: int = 10, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Parse and summarise a delimited string of numbers in bounded memory."""
+    stats = StatsAccumulator()
+    for chunk in iter_chunks(values, chunk_size):
+        stats.add(chunk)
+    return stats.summary(bins)
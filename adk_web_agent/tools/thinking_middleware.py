@@ -4,11 +4,57 @@ These callbacks are attached to all LlmAgents to:
 1. Extract thought summary parts (part.thought == True) from Gemini responses
 2. Track which agent (root or sub-agent) is currently handling the work
 3. Inject both into the agent session state so they propagate via AG-UI to the frontend
+4. Collect each turn (prompt, answer, thoughts, tokens) and hand it to the
+   write-behind persister so it outlives the in-memory ADK session
+5. Optionally answer repeated opening prompts from the response cache,
+   replaying the cached run's thought stream
+6. Time every agent run, model call and tool call of a turn (with the token
+   counts of each model call) into spans persisted with the turn and into
+   the process metrics served at ``/metrics``
+7. Keep thought summaries in state short: the stream and ``thought_summary``
+   carry a preview, and the full text is persisted for
+   ``GET /api/sessions/{id}/thoughts/{thought_id}``
 """
 
+import asyncio
+import logging
+import time
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from adk_web_agent.database.db import PoolTimeout, get_pool
+from adk_web_agent.database.persister import ThoughtTextRecord, TurnRecord, get_persister
+from adk_web_agent.observability.logs import bind_log_context
+from adk_web_agent.observability.metrics import (
+    AGENT_DURATION,
+    MODEL_CALL_DURATION,
+    MODEL_CALL_TOKENS,
+    MODEL_TOKENS,
+    TOOL_CALL_DURATION,
+    TURN_DURATION,
+)
+from adk_web_agent.tools.response_cache import get_response_cache
+from adk_web_agent.tools.thought_tools import (
+    BRANCH_STATE_KEY,
+    get_thought_stream,
+    publish_thought_stream,
+    reset_thought_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+# ag_ui_adk stores the AG-UI thread id (our sessions.session_id) in state
+THREAD_ID_STATE_KEY = "_ag_ui_thread_id"
+MAX_OPEN_TURNS = 1000
+# Spans kept per turn for persistence; metrics still count the rest
+MAX_SPANS_PER_TURN = 500
+TOKEN_KINDS = ("prompt", "candidates", "thoughts")
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -18,6 +64,332 @@ def _short_id() -> str:
     return str(uuid.uuid4())[:8]
 
 
+# ---------------------------------------------------------------------------
+# Per-turn collection for persistence
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Turn:
+    """What one invocation produced so far, keyed by invocation id."""
+
+    entry_agent: str
+    session_id: str
+    user_text: str
+    started_at: str
+    started: float = field(default_factory=time.monotonic)
+    # Delegation tree: node id -> {"id", "agent", "parent", "lane", "status", ...}
+    nodes: OrderedDict[str, dict] = field(default_factory=OrderedDict)
+    # Open node ids per execution lane.  "" is the main (transfer) lane; each
+    # parallel fan-out branch runs in its own lane, so branches never pop
+    # each other's agents.
+    lanes: dict[str, list[str]] = field(default_factory=dict)
+    lane_tokens: dict[str, int] = field(default_factory=dict)
+    thoughts: list[str] = field(default_factory=list)
+    thinking_tokens: int = 0
+    model_calls: int = 0
+    final_text: str = ""
+    final_agent: str | None = None
+    stream_start: int = 0
+    # Stream version last published from a model callback (see before_model_callback)
+    stream_version: int = 0
+    # Set when the response cache missed, so the answer is stored at the end
+    cache_scope: str | None = None
+    # Timing: finished spans, open spans by key with their monotonic start,
+    # and the monotonic start of each delegation node
+    spans: list[dict] = field(default_factory=list)
+    open_spans: dict[str, tuple[float, dict]] = field(default_factory=dict)
+    node_started: dict[str, float] = field(default_factory=dict)
+    tokens: dict[str, int] = field(default_factory=lambda: dict.fromkeys(TOKEN_KINDS, 0))
+    spans_dropped: int = 0
+
+    def chain(self, lane: str = "") -> list[str]:
+        """Agent names from the outermost to the innermost open agent of a lane."""
+        return [self.nodes[node_id]["agent"] for node_id in self.lanes.get(lane, [])]
+
+
+_turns: OrderedDict[str, _Turn] = OrderedDict()
+# Submissions waiting for room in the persister queue
+_pending_submits: set[asyncio.Task] = set()
+
+
+def _content_text(content) -> str:
+    if content is None or not content.parts:
+        return ""
+    return "".join(p.text for p in content.parts if p.text and not getattr(p, "thought", False))
+
+
+def _branch_of(callback_context) -> dict | None:
+    return callback_context.state.get(BRANCH_STATE_KEY)
+
+
+def _turn_of(callback_context) -> _Turn | None:
+    """The turn a callback belongs to; fan-out branches report to their parent."""
+    branch = _branch_of(callback_context)
+    invocation_id = branch["invocation_id"] if branch else callback_context.invocation_id
+    return _turns.get(invocation_id)
+
+
+def _lane_of(callback_context) -> str:
+    branch = _branch_of(callback_context)
+    return branch["lane"] if branch else ""
+
+
+def _start_turn(callback_context) -> _Turn:
+    branch = _branch_of(callback_context)
+    turn = _turn_of(callback_context)
+    if turn is None:
+        session = callback_context.session
+        turn = _Turn(
+            entry_agent=callback_context.agent_name,
+            session_id=session.state.get(THREAD_ID_STATE_KEY) or session.id,
+            user_text=_content_text(callback_context.user_content),
+            started_at=_now_iso(),
+        )
+        _turns[branch["invocation_id"] if branch else callback_context.invocation_id] = turn
+        reset_thought_stream(callback_context)
+        stream = get_thought_stream(callback_context)
+        turn.stream_start = stream.next_seq
+        turn.stream_version = stream.version
+        # Turns abandoned by errors/cancellation must not accumulate forever
+        while len(_turns) > MAX_OPEN_TURNS:
+            _turns.popitem(last=False)
+
+    lane = branch["lane"] if branch else ""
+    stack = turn.lanes.setdefault(lane, [])
+    parent = stack[-1] if stack else (branch["parent_node"] if branch else None)
+    node = {
+        "id": _short_id(),
+        "agent": callback_context.agent_name,
+        "parent": parent,
+        "lane": lane or None,
+        "status": "running",
+        "started_at": _now_iso(),
+    }
+    turn.nodes[node["id"]] = node
+    turn.node_started[node["id"]] = time.monotonic()
+    stack.append(node["id"])
+    return turn
+
+
+def _close_node(turn: _Turn, node_id: str, status: str) -> None:
+    node = turn.nodes[node_id]
+    node["status"] = status
+    node["completed_at"] = _now_iso()
+    started = turn.node_started.pop(node_id, None)
+    if started is not None:
+        elapsed = time.monotonic() - started
+        node["duration_ms"] = int(elapsed * 1000)
+        AGENT_DURATION.observe(elapsed, agent=node["agent"], status=status)
+
+
+def _end_node(turn: _Turn, lane: str, agent_name: str) -> None:
+    stack = turn.lanes.get(lane, [])
+    if stack and turn.nodes[stack[-1]]["agent"] == agent_name:
+        _close_node(turn, stack.pop(), "completed")
+
+
+def _open_span(turn: _Turn, key: str, kind: str, name: str, callback_context) -> None:
+    lane = _lane_of(callback_context)
+    turn.open_spans[key] = (time.monotonic(), {
+        "kind": kind,
+        "name": name,
+        "agent": callback_context.agent_name,
+        "lane": lane or None,
+        "started_at": _now_iso(),
+    })
+
+
+def _close_span(turn: _Turn, key: str, status: str, **fields) -> tuple[dict, float] | None:
+    """Finish an open span; returns it with its duration in seconds."""
+    opened = turn.open_spans.pop(key, None)
+    if opened is None:
+        return None
+    started, span = opened
+    elapsed = time.monotonic() - started
+    span.update(fields, status=status, completed_at=_now_iso(), duration_ms=int(elapsed * 1000))
+    if len(turn.spans) < MAX_SPANS_PER_TURN:
+        turn.spans.append(span)
+    else:
+        turn.spans_dropped += 1
+    return span, elapsed
+
+
+def _model_span_key(callback_context) -> str:
+    # One model call at a time per agent and lane; parallel branches may run
+    # the same agent concurrently, each in its own lane
+    return f"model:{_lane_of(callback_context)}:{callback_context.agent_name}"
+
+
+def _record_usage(turn: _Turn, agent_name: str, usage) -> dict:
+    counts = {
+        "prompt": getattr(usage, "prompt_token_count", None) or 0,
+        "candidates": getattr(usage, "candidates_token_count", None) or 0,
+        "thoughts": getattr(usage, "thoughts_token_count", None) or 0,
+    }
+    for kind, count in counts.items():
+        turn.tokens[kind] += count
+        MODEL_CALL_TOKENS.observe(count, agent=agent_name, kind=kind)
+        MODEL_TOKENS.inc(count, agent=agent_name, kind=kind)
+    return counts
+
+
+def _add_thought_summary(callback_context, turn: _Turn | None, entry: dict) -> None:
+    """Append a thought summary to the stream and the turn.
+
+    The stream stores a preview; the full text goes to ``thought_texts``.
+    """
+    text = entry["message"]
+    stored = get_thought_stream(callback_context).append(entry)
+    callback_context.state["thought_summary"] = stored["message"]
+    callback_context.state["thought_summary_agent"] = stored["agent_name"]
+    callback_context.state["thought_summary_id"] = stored["id"]
+    if turn is None:
+        return
+    turn.thoughts.append(text)
+    persister = get_persister()
+    if persister is None or not stored.get("truncated"):
+        return
+    record = ThoughtTextRecord(
+        session_id=turn.session_id,
+        thought_id=stored["id"],
+        agent_name=stored["agent_name"],
+        content=text,
+        created_at=stored["timestamp"],
+    )
+    if not persister.submit_nowait(record):
+        # Not held for the end of the turn, which a failed turn never reaches
+        task = asyncio.get_running_loop().create_task(persister.submit(record))
+        _pending_submits.add(task)
+        task.add_done_callback(_pending_submits.discard)
+
+
+def _publish_stream(callback_context, turn: _Turn | None) -> None:
+    """Publish the thought stream from a model callback of the turn."""
+    stream = get_thought_stream(callback_context)
+    publish_thought_stream(callback_context, stream)
+    if turn is not None and not _branch_of(callback_context):
+        turn.stream_version = stream.version
+
+
+def _publish_delegation(callback_context, turn: _Turn) -> None:
+    """Mirror the turn's delegation tree into session state for the frontend.
+
+    ``delegation_chain`` / ``delegated_agent`` keep their meaning for the
+    main lane; ``delegation_tree`` also shows parallel branches.
+    """
+    if _branch_of(callback_context):
+        return  # a branch's state never reaches the client
+    chain = turn.chain()
+    callback_context.state["delegation_tree"] = [dict(node) for node in turn.nodes.values()]
+    callback_context.state["delegation_chain"] = chain
+    callback_context.state["delegated_agent"] = chain[-1] if chain else "root_agent"
+
+
+async def _finish_turn(callback_context) -> None:
+    turn = _turn_of(callback_context)
+    if turn is None or callback_context.agent_name != turn.entry_agent or _branch_of(callback_context):
+        return
+
+    del _turns[callback_context.invocation_id]
+    elapsed = time.monotonic() - turn.started
+    TURN_DURATION.observe(elapsed, entry_agent=turn.entry_agent)
+    logger.info(
+        "Turn finished",
+        extra={
+            "duration_ms": int(elapsed * 1000),
+            "model_calls": turn.model_calls,
+            "thinking_tokens": turn.thinking_tokens,
+            "final_agent": turn.final_agent,
+        },
+    )
+    if get_thought_stream(callback_context).version != turn.stream_version:
+        _publish_stream(callback_context, turn)
+    cache = get_response_cache()
+    if cache is not None and turn.cache_scope and turn.final_text:
+        thoughts = get_thought_stream(callback_context).since(turn.stream_start, full_text=True)
+        cache.store(turn.cache_scope, turn.user_text, turn.final_text, turn.final_agent, thoughts)
+    persister = get_persister()
+    if persister is None or not turn.user_text:
+        return
+
+    nodes = list(turn.nodes.values())
+    chain = list(dict.fromkeys(node["agent"] for node in nodes))
+    await persister.submit(TurnRecord(
+        session_id=turn.session_id,
+        user_message_id=str(uuid.uuid4()),
+        user_text=turn.user_text,
+        assistant_message_id=str(uuid.uuid4()),
+        assistant_text=turn.final_text,
+        execution_id=str(uuid.uuid4()),
+        started_at=turn.started_at,
+        completed_at=_now_iso(),
+        duration_ms=int(elapsed * 1000),
+        thought_summary="\n\n".join(turn.thoughts) or None,
+        delegated_agent=turn.final_agent,
+        delegation_chain=chain,
+        thinking_tokens=turn.thinking_tokens,
+        main_agent_data={
+            "agent": turn.entry_agent,
+            "model_calls": turn.model_calls,
+            "tokens": turn.tokens,
+            "spans": turn.spans,
+            "spans_dropped": turn.spans_dropped,
+        },
+        sub_agents_data=[node for node in nodes if node["parent"] is not None],
+    ))
+
+
+def finish_branch(context, lane: str, status: str) -> int:
+    """Close a fan-out branch lane from the parent's tool context.
+
+    Agents still open in the lane (timed out or failed) get ``status`` and
+    the parent's delegation state is refreshed.  Returns the thinking tokens
+    the branch used, for the caller to add to the parent's running total.
+    """
+    turn = _turn_of(context)
+    if turn is None:
+        return 0
+    for node_id in reversed(turn.lanes.pop(lane, [])):
+        _close_node(turn, node_id, status)
+    for key in [key for key, (_, span) in turn.open_spans.items() if span["lane"] == lane]:
+        _close_span(turn, key, status)
+    _publish_delegation(context, turn)
+    return turn.lane_tokens.pop(lane, 0)
+
+
+def current_node(context) -> str | None:
+    """Id of the innermost open agent in the context's lane."""
+    turn = _turn_of(context)
+    branch = _branch_of(context)
+    stack = turn.lanes.get(branch["lane"] if branch else "", []) if turn else []
+    return stack[-1] if stack else None
+
+
+async def _session_owner(session_id: str) -> str | None:
+    """User who owns a conversation, or None if it is not a live ``sessions`` row.
+
+    ADK runs every conversation as the same user, so this is the only
+    reliable owner.
+    """
+    try:
+        async with get_pool().reader() as db:
+            cursor = await db.execute(
+                "SELECT user_id FROM sessions WHERE session_id = ? AND deleted_at IS NULL", (session_id,)
+            )
+            row = await cursor.fetchone()
+    except PoolTimeout:
+        return None
+    return row["user_id"] if row else None
+
+
+def mark_tool_cached(tool_context) -> None:
+    """Flag the running tool call as answered from the tool cache."""
+    turn = _turn_of(tool_context)
+    opened = turn.open_spans.get(f"tool:{tool_context.function_call_id}") if turn else None
+    if opened is not None:
+        opened[1]["cached"] = True
+
+
 # ---------------------------------------------------------------------------
 # Agent delegation tracking
 # ---------------------------------------------------------------------------
@@ -25,27 +397,95 @@ def _short_id() -> str:
 def before_agent_callback(callback_context):
     """Track which agent is currently handling the work.
 
-    Called when an agent (root or sub) begins processing.
-    Pushes the agent name onto the delegation chain.
+    Called when an agent (root or sub) begins processing.  Adds a node for
+    it to the turn's delegation tree, under the agent open in the same lane
+    or, for the first agent of a fan-out branch, under the agent that
+    started the fan-out.
     """
-    chain = list(callback_context.state.get("delegation_chain", []))
-    agent_name = callback_context.agent_name
-    chain.append(agent_name)
-    callback_context.state["delegation_chain"] = chain
-    callback_context.state["delegated_agent"] = agent_name
+    turn = _start_turn(callback_context)
+    # Correlation ids for every log line of this agent run, tools included
+    bind_log_context(
+        session_id=turn.session_id,
+        invocation_id=callback_context.invocation_id,
+        agent=callback_context.agent_name,
+    )
+    _publish_delegation(callback_context, turn)
 
 
-def after_agent_callback(callback_context):
-    """Pop agent from delegation chain when it finishes.
+async def after_agent_callback(callback_context):
+    """Close the agent's node in the delegation tree when it finishes.
 
     Restores the delegated_agent to the parent (or root_agent if empty).
     """
-    chain = list(callback_context.state.get("delegation_chain", []))
-    agent_name = callback_context.agent_name
-    if chain and chain[-1] == agent_name:
-        chain.pop()
-    callback_context.state["delegation_chain"] = chain
-    callback_context.state["delegated_agent"] = chain[-1] if chain else "root_agent"
+    turn = _turn_of(callback_context)
+    if turn is not None:
+        _end_node(turn, _lane_of(callback_context), callback_context.agent_name)
+        _publish_delegation(callback_context, turn)
+    await _finish_turn(callback_context)
+
+
+# ---------------------------------------------------------------------------
+# Model call timing and response cache
+# ---------------------------------------------------------------------------
+
+async def before_model_callback(callback_context, llm_request):
+    """Start timing the model call; answer opening prompts from the response cache.
+
+    Only the entry agent's first model call of a session's first turn is
+    eligible for the cache: later calls depend on tool results and
+    conversation history.  Per-user entries are scoped by the owner of the
+    ``sessions`` row; a conversation without one bypasses the cache.  On a hit the cached answer is returned in place
+    of the model call and the cached run's thoughts are replayed into the
+    thought stream; on a miss the turn is marked so ``_finish_turn`` stores
+    its answer.
+
+    Parallel tool calls each publish the thought stream as they saw it and
+    ADK merges their deltas in call order, so the stream is published again
+    here if it changed since the last model call.
+    """
+    turn = _turn_of(callback_context)
+    if turn is None:
+        return None
+    _open_span(turn, _model_span_key(callback_context), "model", callback_context.agent_name, callback_context)
+    if not _branch_of(callback_context) and get_thought_stream(callback_context).version != turn.stream_version:
+        _publish_stream(callback_context, turn)
+
+    cache = get_response_cache()
+    if (
+        cache is None
+        or _branch_of(callback_context)
+        or callback_context.agent_name != turn.entry_agent
+        or turn.model_calls
+        or len(llm_request.contents) != 1
+        or not turn.user_text
+    ):
+        return None
+
+    scope = cache.scope_for(await _session_owner(turn.session_id))
+    if scope is None:
+        return None
+    cached = cache.lookup(scope, turn.user_text)
+    if cached is None:
+        turn.cache_scope = scope
+        return None
+
+    stream = get_thought_stream(callback_context)
+    for entry in cached.thoughts:
+        replayed = {**entry, "id": _short_id(), "timestamp": _now_iso(), "cached": True}
+        if entry.get("is_thought_summary"):
+            _add_thought_summary(callback_context, turn, replayed)
+        else:
+            stream.append(replayed)
+    _publish_stream(callback_context, turn)
+
+    turn.model_calls += 1
+    turn.final_text = cached.text
+    turn.final_agent = cached.agent
+    # ADK skips after_model_callback for a response returned here
+    closed = _close_span(turn, _model_span_key(callback_context), "cached")
+    if closed is not None:
+        MODEL_CALL_DURATION.observe(closed[1], agent=callback_context.agent_name, status="cached")
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=cached.text)]))
 
 
 # ---------------------------------------------------------------------------
@@ -63,9 +503,26 @@ def after_model_callback(callback_context, llm_response):
     CRITICAL: We return the response unchanged to preserve thought
     signatures required for function calling in Gemini 3 models.
     """
+    turn = _turn_of(callback_context)
+    if turn is not None and not llm_response.partial:
+        status = "error" if llm_response.error_code else "completed"
+        tokens = None
+        if llm_response.usage_metadata:
+            tokens = _record_usage(turn, callback_context.agent_name, llm_response.usage_metadata)
+        closed = _close_span(turn, _model_span_key(callback_context), status, tokens=tokens)
+        if closed is not None:
+            MODEL_CALL_DURATION.observe(closed[1], agent=callback_context.agent_name, status=status)
+
     if llm_response.content is None or llm_response.content.parts is None:
         return llm_response  # Nothing to extract
 
+    if turn is not None and not llm_response.partial:
+        turn.model_calls += 1
+        text = _content_text(llm_response.content)
+        if text:
+            turn.final_text = text
+            turn.final_agent = callback_context.agent_name
+
     thought_parts = []
     for part in llm_response.content.parts:
         if hasattr(part, "thought") and part.thought and part.text:
@@ -74,33 +531,78 @@ def after_model_callback(callback_context, llm_response):
     if thought_parts:
         # Join multiple thought parts (rare but possible)
         thought_summary = "\n".join(thought_parts)
-        agent_name = callback_context.agent_name
 
-        # Set the latest thought summary in state (overwritten per turn)
-        callback_context.state["thought_summary"] = thought_summary
-        callback_context.state["thought_summary_agent"] = agent_name
-
-        # Also append to the thought_stream for timeline display
-        stream = list(callback_context.state.get("thought_stream", []))
-        stream.append({
+        # Set the latest thought summary in state (overwritten per turn) and
+        # append it to the thought_stream for timeline display
+        _add_thought_summary(callback_context, turn, {
             "id": _short_id(),
-            "agent_name": agent_name,
+            "agent_name": callback_context.agent_name,
             "message": thought_summary,
             "status": "completed",
             "timestamp": _now_iso(),
             "is_thought_summary": True,
         })
-        # Cap stream size
-        if len(stream) > 100:
-            stream = stream[-100:]
-        callback_context.state["thought_stream"] = stream
+        _publish_stream(callback_context, turn)
 
     # Extract thinking token count if available
     if llm_response.usage_metadata:
         thoughts_tokens = getattr(llm_response.usage_metadata, "thoughts_token_count", None)
         if thoughts_tokens is not None:
-            prev = callback_context.state.get("thinking_tokens_total", 0)
-            callback_context.state["thinking_tokens_total"] = prev + thoughts_tokens
+            branch = _branch_of(callback_context)
+            if branch is None:
+                prev = callback_context.state.get("thinking_tokens_total", 0)
+                callback_context.state["thinking_tokens_total"] = prev + thoughts_tokens
+            elif turn is not None:
+                # Concurrent branches can't all add to the same state value;
+                # the fan-out tool adds each branch's total when it finishes
+                turn.lane_tokens[branch["lane"]] = turn.lane_tokens.get(branch["lane"], 0) + thoughts_tokens
+            if turn is not None:
+                turn.thinking_tokens += thoughts_tokens
 
     # CRITICAL: Return unchanged to preserve thought signatures
     return llm_response
+
+
+def on_model_error_callback(callback_context, llm_request, error):
+    """Close the model call's span when the call raised; the error propagates."""
+    turn = _turn_of(callback_context)
+    if turn is not None:
+        closed = _close_span(turn, _model_span_key(callback_context), "error", error=str(error))
+        if closed is not None:
+            MODEL_CALL_DURATION.observe(closed[1], agent=callback_context.agent_name, status="error")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Tool call timing
+# ---------------------------------------------------------------------------
+
+def before_tool_callback(tool, args, tool_context):
+    """Start timing a tool call, keyed by its function call id."""
+    turn = _turn_of(tool_context)
+    if turn is not None:
+        _open_span(turn, f"tool:{tool_context.function_call_id}", "tool", tool.name, tool_context)
+    return None
+
+
+def _end_tool_span(tool, tool_context, status: str, **fields) -> None:
+    turn = _turn_of(tool_context)
+    if turn is None:
+        return
+    closed = _close_span(turn, f"tool:{tool_context.function_call_id}", status, **fields)
+    if closed is not None:
+        span, elapsed = closed
+        TOOL_CALL_DURATION.observe(elapsed, tool=tool.name, status="cached" if span.get("cached") else status)
+        logger.debug("Tool %s %s in %d ms", tool.name, status, span["duration_ms"])
+
+
+def after_tool_callback(tool, args, tool_context, tool_response):
+    """Close the tool call's span; the response is returned unchanged."""
+    _end_tool_span(tool, tool_context, "completed")
+    return None
+
+
+def on_tool_error_callback(tool, args, tool_context, error):
+    """Close the tool call's span when the tool raised; the error propagates."""
+    _end_tool_span(tool, tool_context, "error", error=str(error))
+    return None
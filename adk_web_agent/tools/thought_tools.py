@@ -1,21 +1,221 @@
-"""Thought stream emission tools for real-time agent reasoning visibility."""
+"""Thought stream emission tools for real-time agent reasoning visibility.
 
+The stream for each session lives in an in-process ``ThoughtStream``: a
+fixed-capacity ring buffer with an id index and a per-agent index of running
+thoughts, so emitting or completing a thought is O(1).
+
+Every change is published by writing the stream to the ``thought_stream``
+state key (``publish_thought_stream``), which is what the frontend renders.
+ag_ui_adk sends each changed state key whole, so that list is also the unit
+on the wire; it stays small because the buffer is bounded and long entries
+are cut to a preview.  Since state always holds what was last published, a
+failed or cancelled turn leaves nothing to reconcile: the next turn reloads
+the stream from state.
+
+Thought summaries can run to several kilobytes, so entries flagged
+``is_thought_summary`` carry at most ``THOUGHT_PREVIEW_CHARS`` characters of
+the text, with ``truncated`` and ``full_length`` set when it was cut.  The
+stream keeps the full text of buffered entries (``full_text``); the agent
+callbacks persist it to ``thought_texts``, where
+``GET /api/sessions/{id}/thoughts/{thought_id}`` serves it.
+"""
+
+import os
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Iterator
 from google.adk.tools import ToolContext
 
+STREAM_CAPACITY = 100
+MAX_CACHED_STREAMS = 1024
+THOUGHT_PREVIEW_CHARS = int(os.environ.get("THOUGHT_PREVIEW_CHARS", "280"))
+
+
+def preview_text(text: str, limit: int = THOUGHT_PREVIEW_CHARS) -> str:
+    """Cut ``text`` to at most ``limit`` characters, at a word break if possible."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "\u2026"
+
+
+class ThoughtStream:
+    """Ring buffer of thought entries with O(1) lookup by id and by running agent."""
+
+    def __init__(self, capacity: int = STREAM_CAPACITY, preview_chars: int = THOUGHT_PREVIEW_CHARS):
+        self.capacity = capacity
+        self.preview_chars = preview_chars
+        self._slots: list[dict | None] = [None] * capacity
+        self._next_seq = 0          # sequence number of the next appended entry
+        self._count = 0
+        self._seq_by_id: dict[str, int] = {}
+        self._running: dict[str, dict[str, None]] = {}  # agent -> ordered running ids
+        self._full_text: dict[str, str] = {}  # id -> untruncated message
+        self._version = 0  # bumped on every change
+
+    @classmethod
+    def from_list(cls, entries: list[dict], capacity: int = STREAM_CAPACITY) -> "ThoughtStream":
+        """Rebuild a stream from a state snapshot."""
+        stream = cls(capacity)
+        for entry in entries[-capacity:]:
+            stream._insert(dict(entry))
+        return stream
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_list(self) -> list[dict]:
+        """Entries oldest-first, as stored in the ``thought_stream`` state key."""
+        first = self._next_seq - self._count
+        return [self._slots[seq % self.capacity] for seq in range(first, self._next_seq)]
+
+    @property
+    def version(self) -> int:
+        """Change counter: equal values mean the same contents."""
+        return self._version
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next appended entry will get."""
+        return self._next_seq
+
+    def since(self, seq: int, full_text: bool = False) -> list[dict]:
+        """Copies of the still-buffered entries appended at or after ``seq``.
+
+        With ``full_text`` truncated messages are restored, so the entries
+        can be appended to a stream again (e.g. a response-cache replay).
+        """
+        first = max(seq, self._next_seq - self._count)
+        entries = [dict(self._slots[s % self.capacity]) for s in range(first, self._next_seq)]
+        if full_text:
+            for entry in entries:
+                if entry["id"] in self._full_text:
+                    entry["message"] = self._full_text[entry["id"]]
+                    entry.pop("truncated", None)
+                    entry.pop("full_length", None)
+        return entries
+
+    def full_text(self, thought_id: str) -> str | None:
+        """Untruncated message of a buffered entry."""
+        entry = self.get(thought_id)
+        if entry is None:
+            return None
+        return self._full_text.get(thought_id, entry["message"])
+
+    def get(self, thought_id: str) -> dict | None:
+        seq = self._seq_by_id.get(thought_id)
+        return None if seq is None else self._slots[seq % self.capacity]
+
+    def append(self, entry: dict) -> dict:
+        """Add an entry (thought summaries are truncated); returns it as stored."""
+        if entry.get("is_thought_summary") and len(entry["message"]) > self.preview_chars:
+            self._full_text[entry["id"]] = entry["message"]
+            entry = {
+                **entry,
+                "message": preview_text(entry["message"], self.preview_chars),
+                "truncated": True,
+                "full_length": len(entry["message"]),
+            }
+        self._insert(entry)
+        return entry
+
+    def update(self, thought_id: str, **changes) -> bool:
+        """Update an entry in place; returns False if it is no longer buffered."""
+        seq = self._seq_by_id.get(thought_id)
+        if seq is None:
+            return False
+        entry = self._slots[seq % self.capacity]
+        if "status" in changes and changes["status"] != "running":
+            self._running.get(entry["agent_name"], {}).pop(thought_id, None)
+        if any(entry.get(key) != value for key, value in changes.items()):
+            # Replace rather than mutate: published lists may share the old dict
+            self._slots[seq % self.capacity] = {**entry, **changes}
+            self._version += 1
+        return True
+
+    def latest_running(self, agent_name: str) -> str | None:
+        """Id of the most recent still-running thought for an agent."""
+        running = self._running.get(agent_name)
+        return next(reversed(running)) if running else None
+
+    def _insert(self, entry: dict) -> None:
+        if self._count == self.capacity:
+            self._evict_oldest()
+        seq = self._next_seq
+        self._slots[seq % self.capacity] = entry
+        self._next_seq += 1
+        self._count += 1
+        self._seq_by_id[entry["id"]] = seq
+        if entry.get("status") == "running":
+            self._running.setdefault(entry["agent_name"], {})[entry["id"]] = None
+        self._version += 1
+
+    def _evict_oldest(self) -> None:
+        seq = self._next_seq - self._count
+        old = self._slots[seq % self.capacity]
+        self._slots[seq % self.capacity] = None
+        self._count -= 1
+        self._seq_by_id.pop(old["id"], None)
+        self._full_text.pop(old["id"], None)
+        self._running.get(old["agent_name"], {}).pop(old["id"], None)
 
-def _get_thought_stream(tool_context: ToolContext) -> list:
-    """Get the current thought stream from state, initializing if needed."""
-    return tool_context.state.get("thought_stream", [])
 
+# Set while a tool call is being recorded for replay (see ``record_tool_thoughts``)
+_recording: ContextVar[list | None] = ContextVar("thought_recording", default=None)
 
-def _set_thought_stream(tool_context: ToolContext, stream: list) -> None:
-    """Persist the thought stream back to state."""
-    # Cap at 100 entries to prevent unbounded growth
-    if len(stream) > 100:
-        stream = stream[-100:]
-    tool_context.state["thought_stream"] = stream
+# Session-state marker identifying a parallel fan-out branch session (see
+# ``fanout.py``): {"session_id", "invocation_id", "lane", "parent_node"} of
+# the turn that started it
+BRANCH_STATE_KEY = "_fanout_branch"
+
+# Session id -> live stream, bounded so idle sessions fall out
+_streams: OrderedDict[str, ThoughtStream] = OrderedDict()
+
+
+def get_thought_stream(context) -> ThoughtStream:
+    """Get the live stream for the context's session, loading it from state if needed.
+
+    Fan-out branches run in their own throwaway session; their thoughts go
+    to the stream of the session that started the branch.
+    """
+    branch = context.state.get(BRANCH_STATE_KEY)
+    session_id = branch["session_id"] if branch else context.session.id
+    stream = _streams.get(session_id)
+    if stream is None:
+        stream = ThoughtStream.from_list(context.state.get("thought_stream", []))
+        _streams[session_id] = stream
+        while len(_streams) > MAX_CACHED_STREAMS:
+            _streams.popitem(last=False)
+    else:
+        _streams.move_to_end(session_id)
+    return stream
+
+
+def reset_thought_stream(context) -> None:
+    """Reload the stream from the state snapshot (start of a turn).
+
+    The turn may be running on a different worker than the previous one, so
+    the state snapshot, not the local cache, is the source of truth.
+    """
+    _streams.pop(context.session.id, None)
+    get_thought_stream(context)
+
+
+def publish_thought_stream(context, stream: ThoughtStream) -> None:
+    """Write the stream into this event's state delta.
+
+    Skipped in a fan-out branch: the branch's events never reach the client,
+    so the fan-out tool publishes the stream in the parent.
+    """
+    if context.state.get(BRANCH_STATE_KEY):
+        return
+    context.state["thought_stream"] = stream.to_list()
 
 
 def emit_thought(
@@ -38,25 +238,13 @@ def emit_thought(
     Returns:
         A dict confirming the thought was emitted.
     """
-    stream = _get_thought_stream(tool_context)
-
-    if status in ("completed", "error"):
-        # Update the most recent running thought for this agent
-        updated = False
-        for thought in reversed(stream):
-            if thought["agent_name"] == agent_name and thought["status"] == "running":
-                thought["status"] = status
-                thought["message"] = message
-                break
-        # If no running thought found, add as a new entry anyway
-        if not updated:
-            stream.append({
-                "id": str(uuid.uuid4())[:8],
-                "agent_name": agent_name,
-                "message": message,
-                "status": status,
-                "timestamp": datetime.now().isoformat(),
-            })
+    stream = get_thought_stream(tool_context)
+
+    # Update the most recent running thought for this agent; if there is
+    # none, add the completion as a new entry anyway
+    running_id = stream.latest_running(agent_name) if status in ("completed", "error") else None
+    if running_id is not None:
+        stream.update(running_id, status=status, message=message)
     else:
         stream.append({
             "id": str(uuid.uuid4())[:8],
@@ -66,7 +254,7 @@ def emit_thought(
             "timestamp": datetime.now().isoformat(),
         })
 
-    _set_thought_stream(tool_context, stream)
+    publish_thought_stream(tool_context, stream)
     return {"status": "ok", "thought_count": len(stream)}
 
 
@@ -80,8 +268,11 @@ def _emit_tool_thought(
 
     Returns the thought ID so callers can update it later.
     """
-    stream = _get_thought_stream(tool_context)
+    stream = get_thought_stream(tool_context)
     thought_id = str(uuid.uuid4())[:8]
+    recording = _recording.get()
+    if recording is not None:
+        recording.append(("emit", thought_id, agent_name, message, status))
     stream.append({
         "id": thought_id,
         "agent_name": agent_name,
@@ -89,7 +280,7 @@ def _emit_tool_thought(
         "status": status,
         "timestamp": datetime.now().isoformat(),
     })
-    _set_thought_stream(tool_context, stream)
+    publish_thought_stream(tool_context, stream)
     return thought_id
 
 
@@ -100,10 +291,35 @@ def _complete_tool_thought(
     status: str = "completed",
 ) -> None:
     """Internal helper to mark a previously emitted thought as completed."""
-    stream = _get_thought_stream(tool_context)
-    for thought in stream:
-        if thought["id"] == thought_id:
-            thought["status"] = status
-            thought["message"] = message
-            break
-    _set_thought_stream(tool_context, stream)
+    recording = _recording.get()
+    if recording is not None:
+        recording.append(("complete", thought_id, None, message, status))
+    stream = get_thought_stream(tool_context)
+    stream.update(thought_id, status=status, message=message)
+    publish_thought_stream(tool_context, stream)
+
+
+@contextmanager
+def record_tool_thoughts() -> Iterator[list[tuple]]:
+    """Record the ``_emit_tool_thought`` / ``_complete_tool_thought`` calls made
+    inside the block, so they can be replayed with ``replay_tool_thoughts``."""
+    recording: list[tuple] = []
+    token = _recording.set(recording)
+    try:
+        yield recording
+    finally:
+        _recording.reset(token)
+
+
+def replay_tool_thoughts(tool_context: ToolContext, recording: list, suffix: str = "") -> None:
+    """Re-emit recorded tool thoughts under fresh ids.
+
+    ``suffix`` is appended to the final message of each thought (e.g.
+    " (cached)") so the timeline shows where a result came from.
+    """
+    ids = {}
+    for kind, thought_id, agent_name, message, status in recording:
+        if kind == "emit":
+            ids[thought_id] = _emit_tool_thought(tool_context, agent_name, message, status)
+        elif thought_id in ids:
+            _complete_tool_thought(tool_context, ids[thought_id], message + suffix, status)
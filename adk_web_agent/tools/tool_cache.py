@@ -0,0 +1,256 @@
+"""Memoization of deterministic tool calls.
+
+``cached_tool(func, ttl=...)`` wraps a tool function so that calls with the
+same normalized arguments return the stored result instead of running the
+tool again.  Entries are shared across sessions and users, expire after a
+per-tool TTL and are evicted least-recently-used beyond ``TOOL_CACHE_SIZE``.
+
+When ``TOOL_CACHE_DB`` points at a file, entries are also written to a small
+SQLite database there, so they survive restarts and are shared between
+worker processes; memory is checked first and disk only on a memory miss.
+
+The thoughts a tool emits while it runs are stored with its result and
+replayed on a hit, so the UI timeline looks the same for cached calls.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from adk_web_agent.tools.thinking_middleware import mark_tool_cached
+from adk_web_agent.tools.thought_tools import record_tool_thoughts, replay_tool_thoughts
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_SIZE = int(os.environ.get("TOOL_CACHE_SIZE", "1024"))
+TOOL_CACHE_DB = os.environ.get("TOOL_CACHE_DB", "")
+TOOL_CACHE_ENABLED = os.environ.get("TOOL_CACHE_ENABLED", "1") != "0"
+
+
+@dataclass
+class _Entry:
+    tool: str
+    value: str
+    thoughts: list
+    expires_at: float
+
+
+def _normalize(value: Any, casefold: bool) -> Any:
+    """Canonical form of an argument: whitespace collapsed, optionally casefolded."""
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.casefold() if casefold else value
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v, casefold) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v, casefold) for k, v in sorted(value.items())}
+    return value
+
+
+def cache_key(tool: str, args: dict, casefold: bool = False, version: Any = None) -> str:
+    payload = json.dumps([tool, _normalize(args, casefold), version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_error(value: str) -> bool:
+    """True for results a tool reports as failed, which are never cached."""
+    try:
+        result = json.loads(value)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(result, dict) and "error" in result
+
+
+class _DiskStore:
+    """Synchronous SQLite store; tools are sync, so this can't use the async pool."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=2000")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tool_cache (
+                   key TEXT PRIMARY KEY,
+                   tool TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   thoughts TEXT NOT NULL,
+                   expires_at REAL NOT NULL
+               )"""
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> _Entry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tool, value, thoughts, expires_at FROM tool_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return _Entry(row[0], row[1], [tuple(t) for t in json.loads(row[2])], row[3])
+
+    def put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, tool, value, thoughts, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.tool, entry.value, json.dumps(entry.thoughts), entry.expires_at),
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM tool_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tool_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ToolCache:
+    """Size-bounded LRU of tool results with optional SQLite write-through."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_SIZE, db_path: str = TOOL_CACHE_DB):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskStore(db_path) if db_path else None
+        if self._disk is not None:
+            self._disk.purge_expired()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, tool: str, counter: str) -> None:
+        counters = self._stats.setdefault(tool, {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0})
+        counters[counter] += 1
+
+    def get(self, tool: str, key: str) -> _Entry | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count(tool, "hits")
+                return entry
+
+        entry = self._disk.get(key) if self._disk is not None else None
+        with self._lock:
+            if entry is not None and entry.expires_at > now:
+                self._count(tool, "disk_hits")
+                self._store(key, entry)
+                return entry
+            self._count(tool, "misses")
+        return None
+
+    def put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._store(key, entry)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, entry)
+            except sqlite3.Error:
+                logger.exception("Failed to persist tool cache entry for %s", entry.tool)
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._count(evicted.tool, "evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "persistent": self._disk is not None,
+                "tools": {tool: dict(counters) for tool, counters in self._stats.items()},
+            }
+
+
+_cache: ToolCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    """Return the process-wide tool cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ToolCache()
+    return _cache
+
+
+def get_tool_cache_stats() -> dict:
+    """Hit/miss/eviction counters per tool (empty until the cache is used)."""
+    return _cache.stats() if _cache is not None else {}
+
+
+def cached_tool(
+    func: Callable[..., str],
+    ttl: float,
+    casefold: bool = False,
+    version: Callable[[], Any] | None = None,
+) -> Callable[..., str]:
+    """Wrap a tool function with the shared result cache.
+
+    Only use this for tools whose result depends on their arguments alone,
+    or on their arguments and data whose ``version`` can be checked cheaply.
+    The wrapper keeps the function's name, docstring and signature, which
+    ADK uses to build the tool declaration.
+
+    Args:
+        func: The tool function; it must take ``tool_context`` and return a string.
+        ttl: Seconds a result stays valid.
+        casefold: Treat string arguments case-insensitively (e.g. search queries).
+        version: Returns the current version of the data the tool reads.  It
+            is part of the cache key, so results cached before a change are
+            never served after it (they expire with their TTL).
+    """
+    if not TOOL_CACHE_ENABLED:
+        return func
+    signature = inspect.signature(func)
+    tool = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        tool_context = bound.arguments.pop("tool_context")
+        key = cache_key(tool, bound.arguments, casefold, version() if version is not None else None)
+
+        cache = get_tool_cache()
+        entry = cache.get(tool, key)
+        if entry is not None:
+            mark_tool_cached(tool_context)
+            replay_tool_thoughts(tool_context, entry.thoughts, suffix=" (cached)")
+            return entry.value
+
+        with record_tool_thoughts() as thoughts:
+            value = func(*args, **kwargs)
+        if not _is_error(value):
+            cache.put(key, _Entry(tool, value, thoughts, time.time() + ttl))
+        return value
+
+    return wrapper
@@ -0,0 +1 @@
+# Offline benchmarks: local model stand-in, test server and load generator
@@ -0,0 +1,174 @@
+"""Deterministic local stand-in for Gemini.
+
+``ScriptedLlm`` replays a fixed script per agent instead of calling the API,
+so the whole FastAPI + ADK stack can be load-tested for free and with the
+same model behaviour on every run.  Each step of a script is either a
+function call or a text answer; the step is picked by how many tool results
+the agent has seen since the user's message, exactly as a real model would
+move through a tool-using turn.
+
+Responses take ``first_token_ms`` before the first chunk and ``chunk_ms``
+per further chunk.  When ADK asks for streaming, text answers arrive as
+``chunks`` partial responses followed by the aggregated final response.
+Every response starts with a thought part, like Gemini with
+``include_thoughts=True``, unless ``thoughts`` is off.
+
+Select it with ``AGENT_MODEL=bench-fake`` (read by agent.py) after calling
+``register_fake_model()``.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+FAKE_MODEL_NAME = "bench-fake"
+# ADK labels every request with the calling agent's name
+AGENT_LABEL = "adk_agent_name"
+
+ANSWER = (
+    "Based on the knowledge base, refunds are available within 30 days of purchase "
+    "for unused items. Contact support with your order number to start a return; "
+    "the refund is issued to the original payment method within five business days."
+)
+
+# Scenario -> agent -> steps
+SCENARIOS: dict[str, dict[str, list[dict]]] = {
+    # Root plans, delegates to research, which searches and answers
+    "delegate": {
+        "root_agent": [
+            {"call": "emit_thought", "args": {"agent_name": "root_agent", "message": "Planning the answer", "status": "running"}},
+            {"call": "transfer_to_agent", "args": {"agent_name": "research_agent"}},
+        ],
+        "research_agent": [
+            {"call": "search_knowledge_base", "args": {"query": "refund policy"}},
+            {"text": ANSWER},
+        ],
+    },
+    # Root fans out to research and analysis, then combines the results
+    "parallel": {
+        "root_agent": [
+            {"call": "run_parallel", "args": {
+                "agents": ["research_agent", "analysis_agent"],
+                "requests": ["Find the refund policy", "Summarize the values 4, 8, 15, 16, 23, 42"],
+            }},
+            {"text": ANSWER},
+        ],
+        "research_agent": [
+            {"call": "search_knowledge_base", "args": {"query": "refund policy"}},
+            {"text": "Refunds within 30 days for unused items."},
+        ],
+        "analysis_agent": [
+            {"call": "calculate_metrics", "args": {"values": "4, 8, 15, 16, 23, 42"}},
+            {"text": "Mean 18, median 15.5."},
+        ],
+    },
+    # Root answers directly: measures the stack without tools or delegation
+    "direct": {
+        "root_agent": [{"text": ANSWER}],
+    },
+}
+
+
+@dataclass(frozen=True)
+class FakeModelConfig:
+    scenario: str = "delegate"
+    first_token_ms: float = 300.0
+    chunk_ms: float = 20.0
+    chunks: int = 8
+    thoughts: bool = True
+
+    @classmethod
+    def from_env(cls) -> "FakeModelConfig":
+        return cls(
+            scenario=os.environ.get("BENCH_SCENARIO", cls.scenario),
+            first_token_ms=float(os.environ.get("BENCH_FIRST_TOKEN_MS", cls.first_token_ms)),
+            chunk_ms=float(os.environ.get("BENCH_CHUNK_MS", cls.chunk_ms)),
+            chunks=int(os.environ.get("BENCH_CHUNKS", cls.chunks)),
+            thoughts=os.environ.get("BENCH_THOUGHTS", "1") != "0",
+        )
+
+
+def _split(text: str, chunks: int) -> list[str]:
+    """Split text into at most ``chunks`` pieces on word boundaries."""
+    words = text.split(" ")
+    size = max(1, -(-len(words) // max(1, chunks)))
+    pieces = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+    return [piece + " " for piece in pieces[:-1]] + pieces[-1:]
+
+
+def _tokens(text: str) -> int:
+    # Roughly four characters per token, as for Gemini on English text
+    return max(1, len(text) // 4)
+
+
+class ScriptedLlm(BaseLlm):
+    """Replays the configured scenario's script for the calling agent."""
+
+    model: str = FAKE_MODEL_NAME
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [FAKE_MODEL_NAME]
+
+    async def generate_content_async(
+        self, llm_request, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        config = FakeModelConfig.from_env()
+        labels = (llm_request.config.labels if llm_request.config else None) or {}
+        agent = labels.get(AGENT_LABEL, "root_agent")
+        script = SCENARIOS[config.scenario].get(agent) or [{"text": f"{agent} has nothing to add."}]
+
+        # Tool results since the user's message decide how far into the script we are
+        step_index = 0
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            if any(p.function_response for p in parts):
+                step_index += 1
+            elif content.role == "user":
+                break
+        step = script[min(step_index, len(script) - 1)]
+
+        prompt_tokens = sum(
+            _tokens(p.text) for c in llm_request.contents for p in (c.parts or []) if p.text
+        )
+        thought = types.Part(text=f"{agent}: working on step {step_index + 1}", thought=True)
+        thought_parts = [thought] if config.thoughts else []
+        await asyncio.sleep(config.first_token_ms / 1000)
+
+        if "call" in step:
+            call = types.Part(function_call=types.FunctionCall(name=step["call"], args=step.get("args", {})))
+            yield self._response(thought_parts + [call], prompt_tokens, 8, thought_parts)
+            return
+
+        text = step["text"]
+        if stream:
+            pieces = _split(text, config.chunks)
+            if thought_parts:
+                yield LlmResponse(content=types.Content(role="model", parts=thought_parts), partial=True)
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(config.chunk_ms / 1000)
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=piece)]), partial=True)
+        yield self._response(thought_parts + [types.Part(text=text)], prompt_tokens, _tokens(text), thought_parts)
+
+    @staticmethod
+    def _response(parts: list, prompt_tokens: int, candidate_tokens: int, thought_parts: list) -> LlmResponse:
+        return LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=candidate_tokens,
+                thoughts_token_count=sum(_tokens(p.text) for p in thought_parts),
+            ),
+        )
+
+
+def register_fake_model() -> None:
+    """Make ``AGENT_MODEL=bench-fake`` resolve to ``ScriptedLlm``."""
+    LLMRegistry.register(ScriptedLlm)
@@ -0,0 +1,308 @@
+"""Load generator for the API server running on the fake model.
+
+    python -m benchmarks.loadtest --users 20 --duration 30
+    python -m benchmarks.loadtest --compare bench_baseline.json
+
+Starts ``benchmarks.serve`` on a free port with a throwaway database (or
+targets ``--url``), creates one account per virtual user, then has every
+user log in once and repeat until the time is up:
+
+1. ``POST /api/sessions`` - create a chat session
+2. ``POST /``             - run the agent in it over AG-UI, reading the
+                            event stream to ``RUN_FINISHED``
+3. ``GET /api/sessions``  - list the user's sessions
+
+Reports p50/p95/p99 latency per operation (plus time to the first AG-UI
+event), requests/sec and the server's event-loop lag.  The report is
+appended to ``bench_output.txt`` and, with ``--json``, written as JSON
+tagged with the git commit, so runs can be compared across commits with
+``--compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_FILE = REPO_ROOT / "bench_output.txt"
+PROMPT = "What is our refund policy?"
+PASSWORD = "bench-password"
+SERVER_START_TIMEOUT = 60.0
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def add(self, op: str, seconds: float) -> None:
+        self.latencies.setdefault(op, []).append(seconds)
+
+    def error(self, op: str) -> None:
+        self.errors[op] = self.errors.get(op, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        ops = {}
+        for op in sorted(set(self.latencies) | set(self.errors)):
+            ordered = sorted(self.latencies.get(op, []))
+            ops[op] = {
+                "count": len(ordered),
+                "errors": self.errors.get(op, 0),
+                "per_sec": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            }
+        # The time-to-first-event sample is part of an agent run, not a request
+        requests = sum(v["count"] for op, v in ops.items() if op != "agent_first_event")
+        return {"requests": requests, "requests_per_sec": round(requests / elapsed, 2), "operations": ops}
+
+
+async def timed(recorder: Recorder, op: str, request) -> httpx.Response | None:
+    started = time.perf_counter()
+    try:
+        response = await request
+        response.raise_for_status()
+    except httpx.HTTPError:
+        recorder.error(op)
+        return None
+    recorder.add(op, time.perf_counter() - started)
+    return response
+
+
+async def run_agent(client: httpx.AsyncClient, recorder: Recorder, token: str, thread_id: str) -> None:
+    payload = {
+        "threadId": thread_id,
+        "runId": str(uuid.uuid4()),
+        "state": {},
+        "messages": [{"id": str(uuid.uuid4()), "role": "user", "content": PROMPT}],
+        "tools": [],
+        "context": [],
+        "forwardedProps": {},
+    }
+    headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
+    started = time.perf_counter()
+    first_event = None
+    finished = False
+    try:
+        async with client.stream("POST", "/", json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if first_event is None:
+                    first_event = time.perf_counter() - started
+                # Read to the end of the stream: the server finishes its
+                # cleanup after sending RUN_FINISHED
+                event_type = json.loads(line[5:]).get("type")
+                if event_type == "RUN_ERROR":
+                    finished = False
+                    break
+                if event_type == "RUN_FINISHED":
+                    finished = True
+    except (httpx.HTTPError, json.JSONDecodeError):
+        pass
+    if not finished:
+        recorder.error("agent_run")
+        return
+    recorder.add("agent_run", time.perf_counter() - started)
+    recorder.add("agent_first_event", first_event)
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, user_id: str, deadline: float) -> None:
+    response = await timed(recorder, "login", client.post(
+        "/api/auth/login", json={"user_id": user_id, "password": PASSWORD}
+    ))
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    while time.monotonic() < deadline:
+        response = await timed(recorder, "create_session", client.post("/api/sessions", json={}, headers=headers))
+        if response is None:
+            continue
+        await run_agent(client, recorder, headers["Authorization"][7:], response.json()["session"]["session_id"])
+        await timed(recorder, "list_sessions", client.get("/api/sessions", params={"limit": 20}, headers=headers))
+
+
+async def create_users(client: httpx.AsyncClient, count: int, admin: tuple[str, str]) -> list[str]:
+    response = await client.post("/api/auth/login", json={"user_id": admin[0], "password": admin[1]})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    run_id = uuid.uuid4().hex[:8]
+    users = [f"bench-{run_id}-{i}@example.com" for i in range(count)]
+    for user_id in users:
+        response = await client.post(
+            "/api/admin/users", json={"user_id": user_id, "password": PASSWORD}, headers=headers
+        )
+        response.raise_for_status()
+    return users
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        users = await create_users(client, args.users, (args.admin_email, args.admin_password))
+        await client.post("/bench/loop-lag/reset")
+        recorder = Recorder()
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(virtual_user(client, recorder, user, deadline) for user in users))
+        elapsed = time.monotonic() - started
+        loop_lag = (await client.get("/bench/loop-lag")).json()
+    return {**recorder.summary(elapsed), "elapsed_s": round(elapsed, 2), "loop_lag": loop_lag}
+
+
+def git_revision() -> dict:
+    def git(*cmd: str) -> str:
+        result = subprocess.run(["git", *cmd], cwd=REPO_ROOT, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "-uno"))}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, db_path: str) -> subprocess.Popen:
+    port = free_port()
+    env = {
+        **os.environ,
+        "APP_DB_PATH": db_path,
+        "ADMIN_EMAIL": args.admin_email,
+        "ADMIN_PASSWORD": args.admin_password,
+        "BENCH_SCENARIO": args.scenario,
+        "BENCH_FIRST_TOKEN_MS": str(args.first_token_ms),
+        "BENCH_CHUNK_MS": str(args.chunk_ms),
+        "BENCH_CHUNKS": str(args.chunks),
+        "BENCH_THOUGHTS": "1" if args.thoughts else "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", "--port", str(port)], cwd=REPO_ROOT, env=env
+    )
+    args.url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Benchmark server exited with code {server.returncode}")
+        try:
+            response = httpx.get(f"{args.url}/healthz", timeout=1)
+            if response.status_code == 200 and response.json()["agent_loaded"]:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Benchmark server did not start in time")
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    config = report["config"]
+    lines = [
+        f"== {report['timestamp']}  commit {report['commit']}{' (dirty)' if report['dirty'] else ''}",
+        "   " + "  ".join(f"{k}={v}" for k, v in config.items()),
+        f"   {report['results']['requests']} requests in {report['results']['elapsed_s']}s"
+        f" = {report['results']['requests_per_sec']} req/s",
+        f"   {'operation':<18}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    base_ops = baseline["results"]["operations"] if baseline else {}
+    for op, stats in report["results"]["operations"].items():
+        line = (
+            f"   {op:<18}{stats['count']:>7}{stats['errors']:>5}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+        base = base_ops.get(op)
+        if base and base["p95_ms"]:
+            line += f"   p95 {100 * (stats['p95_ms'] - base['p95_ms']) / base['p95_ms']:+.1f}% vs {baseline['commit']}"
+        lines.append(line)
+    lag = report["results"]["loop_lag"]
+    if lag.get("samples"):
+        lines.append(
+            f"   event-loop lag: p50 {lag['p50_ms']} ms  p95 {lag['p95_ms']} ms"
+            f"  p99 {lag['p99_ms']} ms  max {lag['max_ms']} ms"
+        )
+    if baseline:
+        base_rps = baseline["results"]["requests_per_sec"]
+        if base_rps:
+            change = 100 * (report["results"]["requests_per_sec"] - base_rps) / base_rps
+            lines.append(f"   throughput {change:+.1f}% vs {baseline['commit']}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API server on the fake model.")
+    parser.add_argument("--url", help="Target a running benchmarks.serve instead of starting one")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after setup")
+    parser.add_argument("--scenario", default="delegate", choices=["delegate", "parallel", "direct"])
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--chunk-ms", type=float, default=20.0)
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--no-thoughts", dest="thoughts", action="store_false")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--admin-email", default="admin@example.com")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON here")
+    parser.add_argument("--compare", type=Path, help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    config = {
+        "users": args.users,
+        "duration_s": args.duration,
+        "scenario": args.scenario,
+        "first_token_ms": args.first_token_ms,
+        "chunk_ms": args.chunk_ms,
+        "chunks": args.chunks,
+        "thoughts": args.thoughts,
+    }
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.url:
+            server = start_server(args, str(Path(tmp) / "bench.db"))
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": results,
+    }
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    text = format_report(report, baseline)
+    print(text, end="")
+    with OUTPUT_FILE.open("a") as f:
+        f.write(text)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
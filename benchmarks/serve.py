@@ -0,0 +1,96 @@
+"""Run the API server with the fake model, for load tests.
+
+    python -m benchmarks.serve --port 8765
+
+Serves ``create_app()`` with every agent on ``ScriptedLlm`` and adds an
+event-loop lag probe: a task that sleeps for ``LAG_INTERVAL`` seconds and
+records how late it wakes up.  The load generator starts and resets it with
+``POST /bench/loop-lag/reset`` and reads it from ``GET /bench/loop-lag``.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import deque
+
+LAG_INTERVAL = 0.02
+MAX_LAG_SAMPLES = 200_000
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=MAX_LAG_SAMPLES)
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0}
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+        return {
+            "samples": len(ordered),
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+def build_app():
+    os.environ.setdefault("AGENT_MODEL", "bench-fake")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Load the agent before accepting requests so warm-up isn't measured
+    os.environ.setdefault("AGENT_WARMUP", "eager")
+
+    from fastapi import APIRouter
+
+    from adk_web_agent.server import create_app
+    from benchmarks.fake_llm import register_fake_model
+
+    register_fake_model()
+    monitor = LoopLagMonitor()
+    router = APIRouter(prefix="/bench")
+
+    @router.get("/loop-lag")
+    async def loop_lag():
+        return monitor.summary()
+
+    @router.post("/loop-lag/reset")
+    async def reset_loop_lag():
+        # Started here rather than in a lifespan hook, which create_app owns
+        monitor.start()
+        monitor.samples.clear()
+        return {"reset_at": time.time()}
+
+    return create_app(routers=[router])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(build_app(), host=args.host, port=args.port, log_config=None, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
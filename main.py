@@ -1,5 +1,4 @@
-def main():
-    print("Hello from my-adk-agent!")
+from adk_web_agent.server import main
 
 
 if __name__ == "__main__":
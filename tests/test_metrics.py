@@ -0,0 +1,29 @@
+"""Monotonic tallies are exported as Prometheus counters."""
+
+import unittest
+
+from adk_web_agent.observability.metrics import REGISTRY, Registry
+from adk_web_agent.routes import metrics  # noqa: F401 - registers the server metrics
+
+
+class CounterTypeTest(unittest.TestCase):
+    def test_counter_callback_renders_as_counter(self):
+        registry = Registry()
+        registry.counter_callback("jobs_total", "Jobs.", ["outcome"], lambda: {"done": 3})
+        self.assertEqual(
+            registry.render().splitlines(),
+            ["# HELP jobs_total Jobs.", "# TYPE jobs_total counter", 'jobs_total{outcome="done"} 3'],
+        )
+
+    def test_server_counters_are_typed_counter(self):
+        types = dict(
+            line.split()[2:4] for line in REGISTRY.render().splitlines() if line.startswith("# TYPE")
+        )
+        for name in ("bcrypt_pool_jobs_finished_total", "tool_cache_events_total", "response_cache_events_total"):
+            self.assertEqual(types[name], "counter", name)
+        for name, kind in types.items():
+            self.assertEqual(kind == "counter", name.endswith("_total"), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
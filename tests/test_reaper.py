@@ -0,0 +1,87 @@
+"""Reaping a deleted session removes the ADK conversation behind it."""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from adk_web_agent.database import db as dbmod
+from adk_web_agent.database import session_repository as repo
+from adk_web_agent.database.reaper import Reaper
+from adk_web_agent.database.session_service import SqliteSessionService
+
+APP = "agent_studio"
+ADK_USER = "demo_user"
+
+
+def _event(author: str, text: str) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(author=author, invocation_id="inv", content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+class ReapSessionTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self._db_path = dbmod.DB_PATH
+        dbmod.DB_PATH = str(Path(self._tmp.name) / "app.db")
+        await dbmod.init_db()
+        await dbmod.init_pool()
+        self.sessions = SqliteSessionService()
+
+    async def asyncTearDown(self):
+        await dbmod.close_pool()
+        dbmod.DB_PATH = self._db_path
+
+    async def _conversation(self, thread_id: str, events: int) -> str:
+        """An ADK session linked to ``thread_id`` like ag_ui_adk links it."""
+        session = await self.sessions.create_session(
+            app_name=APP, user_id=ADK_USER, state={"_ag_ui_thread_id": thread_id, "topic": "x"}
+        )
+        for i in range(events):
+            await self.sessions.append_event(session, _event("user" if i % 2 == 0 else "root_agent", f"m{i}"))
+        return session.id
+
+    async def _count(self, table: str, adk_session_id: str) -> int:
+        async with dbmod.get_pool().reader() as db:
+            cursor = await db.execute(f"SELECT COUNT(*) FROM {table} WHERE session_id = ?", (adk_session_id,))
+            return (await cursor.fetchone())[0]
+
+    async def test_reaping_deletes_and_archives_adk_rows(self):
+        async with dbmod.get_pool().writer() as db:
+            for session_id in ("doomed", "kept"):
+                await repo.create_session(db, session_id, "admin@example.com", session_id, "2026-01-01T00:00:00")
+            await db.commit()
+        doomed = await self._conversation("doomed", events=7)
+        kept = await self._conversation("kept", events=3)
+
+        async with dbmod.get_pool().writer() as db:
+            self.assertTrue(await repo.delete_session(db, "doomed", "admin@example.com", "2026-01-02T00:00:00"))
+            await db.commit()
+
+        archive_dir = Path(self._tmp.name) / "archive"
+        reaper = Reaper(batch_size=2, batch_pause=0, archive_dir=str(archive_dir))
+        while await reaper.reap_next():
+            pass
+
+        for table in ("adk_events", "adk_sessions", "adk_state"):
+            self.assertEqual(await self._count(table, doomed), 0, table)
+        self.assertEqual(await self._count("adk_events", kept), 3)
+        self.assertIsNone(await self.sessions.get_session(app_name=APP, user_id=ADK_USER, session_id=doomed))
+        self.assertIsNotNone(await self.sessions.get_session(app_name=APP, user_id=ADK_USER, session_id=kept))
+
+        with gzip.open(archive_dir / "session-doomed.jsonl.gz", "rt") as archive:
+            tables = [json.loads(line)["table"] for line in archive]
+        self.assertEqual(tables.count("adk_events"), 7)
+        self.assertEqual(tables.count("adk_sessions"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""The response cache never answers one user with another user's cached run."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from google.adk.sessions.state import State
+from google.genai import types
+
+from adk_web_agent.database import db as dbmod
+from adk_web_agent.database import session_repository as repo
+from adk_web_agent.tools import thinking_middleware, thought_tools
+from adk_web_agent.tools.response_cache import ResponseCache
+
+ADK_USER = "demo_user"
+
+
+def _context(thread_id: str | None, invocation_id: str, prompt: str):
+    """A root-agent callback context; ag_ui_adk runs every thread as ``demo_user``."""
+    session_state = {"_ag_ui_thread_id": thread_id} if thread_id else {}
+    return SimpleNamespace(
+        state=State(session_state, {}),
+        session=SimpleNamespace(id=f"adk-{invocation_id}", state=session_state),
+        agent_name="root_agent",
+        invocation_id=invocation_id,
+        user_id=ADK_USER,
+        user_content=types.Content(role="user", parts=[types.Part(text=prompt)]),
+    )
+
+
+class NearDuplicateTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(similarity=0.85)
+        self.cache.store("global", "Convert 100 USD to EUR", "88 EUR", "root_agent", [])
+
+    def test_reordered_prompt_does_not_hit(self):
+        self.assertIsNone(self.cache.lookup("global", "Convert 100 EUR to USD"))
+        self.assertIsNone(self.cache.lookup("global", "convert eur to usd 100"))
+
+    def test_rephrased_prompt_hits(self):
+        self.assertEqual(self.cache.lookup("global", "convert 100 usd to eur?").text, "88 EUR")
+        self.assertEqual(self.cache.lookup("global", "Convert the 100 USD to EUR").text, "88 EUR")
+        self.assertEqual(self.cache.stats()["similar_hits"], 2)
+
+
+class OwnerScopeTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.addCleanup(setattr, dbmod, "DB_PATH", dbmod.DB_PATH)
+        dbmod.DB_PATH = str(Path(self._tmp.name) / "app.db")
+        await dbmod.init_db()
+        await dbmod.init_pool()
+        self.addAsyncCleanup(dbmod.close_pool)
+        async with dbmod.get_pool().writer() as db:
+            for session_id, owner in (("alice-thread", "alice@example.com"), ("bob-thread", "bob@example.com")):
+                await db.execute("INSERT INTO users (user_id, password_hash) VALUES (?, 'x')", (owner,))
+                await repo.create_session(db, session_id, owner, session_id, "2026-01-01T00:00:00")
+            await db.commit()
+
+        self.cache = ResponseCache()
+        patcher = mock.patch.object(thinking_middleware, "get_response_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        thinking_middleware._turns.clear()
+        thought_tools._streams.clear()
+
+    async def _ask(self, thread_id: str | None, invocation_id: str, prompt: str):
+        """Run the root agent's first model callback; returns the cached answer or None."""
+        context = _context(thread_id, invocation_id, prompt)
+        thinking_middleware.before_agent_callback(context)
+        request = SimpleNamespace(contents=[context.user_content])
+        return await thinking_middleware.before_model_callback(context, request), context
+
+    async def test_scope_is_the_session_owner(self):
+        response, context = await self._ask("alice-thread", "inv-1", "What is our refund policy?")
+        self.assertIsNone(response)
+        turn = thinking_middleware._turn_of(context)
+        self.assertEqual(turn.cache_scope, "user:alice@example.com")
+        self.cache.store(turn.cache_scope, turn.user_text, "Alice's answer", "root_agent", [])
+
+        response, _ = await self._ask("bob-thread", "inv-2", "What is our refund policy?")
+        self.assertIsNone(response)
+        response, _ = await self._ask("alice-thread", "inv-3", "What is our refund policy?")
+        self.assertEqual(response.content.parts[0].text, "Alice's answer")
+
+    async def test_conversation_without_owner_bypasses_cache(self):
+        self.cache.store("user:None", "What is our refund policy?", "stale", "root_agent", [])
+        for thread_id in (None, "no-such-thread"):
+            response, context = await self._ask(thread_id, f"inv-{thread_id}", "What is our refund policy?")
+            self.assertIsNone(response)
+            self.assertIsNone(thinking_middleware._turn_of(context).cache_scope)
+
+
+if __name__ == "__main__":
+    unittest.main()
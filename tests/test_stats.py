@@ -0,0 +1,56 @@
+"""calculate_metrics sums exactly and stays finite near the float limits."""
+
+import json
+import math
+import unittest
+from fractions import Fraction
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from adk_web_agent.tools import thought_tools
+from adk_web_agent.tools.analysis_tools import calculate_metrics
+from adk_web_agent.tools.stats import summarize
+
+
+class SumTest(unittest.TestCase):
+    def test_sum_is_not_rounded(self):
+        self.assertEqual(summarize("123456789.125,0.25")["sum"], 123456789.375)
+
+    def test_sum_is_exact_across_chunks(self):
+        self.assertEqual(summarize("1e16,1,1", chunk_size=1)["sum"], 1e16 + 2)
+        self.assertEqual(summarize(",".join(["0.1"] * 10), chunk_size=3)["sum"], 1.0)
+
+
+class HugeValuesTest(unittest.TestCase):
+    def test_deviations_do_not_overflow(self):
+        result = summarize("1e160,2")
+        self.assertEqual(result["mean"], 5e159)
+        self.assertAlmostEqual(result["std_dev"] / 7.07107e159, 1, places=5)
+
+        result = summarize("1e200,-1e200")
+        self.assertEqual(result["mean"], 0.0)
+        self.assertEqual(result["range"], 2e200)
+        self.assertAlmostEqual(result["std_dev"] / (math.sqrt(2) * 1e200), 1, places=5)
+
+    def test_chunks_merge_across_a_rescale(self):
+        values = [1.0, 2.0, 3.0] + [1e300, 3e300] * 4
+        result = summarize(",".join(map(repr, values)), chunk_size=3)
+        exact = [Fraction(x) for x in values]
+        mean = sum(exact) / len(exact)
+        variance = sum((x - mean) ** 2 for x in exact) / (len(exact) - 1)
+        self.assertEqual(result["count"], 11)
+        self.assertEqual(result["mean"], float(f"{float(mean):.6g}"))
+        std_dev = math.sqrt(variance / 10**600) * 1e300
+        self.assertEqual(result["std_dev"], float(f"{std_dev:.6g}"))
+
+    def test_unrepresentable_result_is_a_tool_error(self):
+        thought_tools._streams.clear()
+        context = SimpleNamespace(state=State({}, {}), session=SimpleNamespace(id="s1"))
+        for values in ("1e308,1e308", "1e308,-1e308"):
+            result = json.loads(calculate_metrics(values, context))
+            self.assertIn("too large to represent", result["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
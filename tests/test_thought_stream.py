@@ -0,0 +1,76 @@
+"""The thought stream published to state stays consistent across turns."""
+
+import unittest
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from adk_web_agent.tools import thought_tools
+from adk_web_agent.tools.thought_tools import (
+    ThoughtStream,
+    _complete_tool_thought,
+    _emit_tool_thought,
+    get_thought_stream,
+    publish_thought_stream,
+    reset_thought_stream,
+)
+
+
+def _context(session_state: dict, session_id: str = "s1"):
+    """A tool context for one event, sharing ``session_state`` like ADK does."""
+    delta = {}
+    return SimpleNamespace(state=State(session_state, delta), session=SimpleNamespace(id=session_id), delta=delta)
+
+
+class ThoughtStreamTest(unittest.TestCase):
+    def setUp(self):
+        thought_tools._streams.clear()
+
+    def test_every_event_carries_the_full_stream(self):
+        session_state = {}
+        first = _context(session_state)
+        thought_id = _emit_tool_thought(first, "research_agent", "Searching")
+        second = _context(session_state)
+        _emit_tool_thought(second, "research_agent", "Reading")
+        _complete_tool_thought(second, thought_id, "Searched")
+
+        self.assertEqual([e["message"] for e in first.delta["thought_stream"]], ["Searching"])
+        self.assertEqual(
+            [(e["message"], e["status"]) for e in second.delta["thought_stream"]],
+            [("Searched", "completed"), ("Reading", "running")],
+        )
+        self.assertNotIn("thought_stream_ops", second.delta)
+
+    def test_failed_turn_leaves_state_consistent(self):
+        session_state = {}
+        context = _context(session_state)
+        _emit_tool_thought(context, "root_agent", "Planning")
+        # A tool that raises after appending: its event never reaches the session
+        get_thought_stream(context).append(
+            {"id": "lost", "agent_name": "root_agent", "message": "x", "status": "running", "timestamp": ""}
+        )
+
+        next_turn = _context(session_state)
+        reset_thought_stream(next_turn)
+        _emit_tool_thought(next_turn, "root_agent", "Answering")
+        self.assertEqual([e["message"] for e in next_turn.delta["thought_stream"]], ["Planning", "Answering"])
+
+    def test_update_does_not_rewrite_published_lists(self):
+        stream = ThoughtStream(capacity=2)
+        stream.append({"id": "a", "agent_name": "x", "message": "one", "status": "running", "timestamp": ""})
+        published = stream.to_list()
+        version = stream.version
+        stream.update("a", status="completed")
+        self.assertEqual(published[0]["status"], "running")
+        self.assertGreater(stream.version, version)
+        stream.update("a", status="completed")
+        self.assertEqual(stream.version, version + 1)
+
+    def test_branch_does_not_publish(self):
+        context = _context({thought_tools.BRANCH_STATE_KEY: {"session_id": "parent"}})
+        publish_thought_stream(context, get_thought_stream(context))
+        self.assertEqual(context.delta, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
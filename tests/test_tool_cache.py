@@ -0,0 +1,78 @@
+"""Cached knowledge-base searches never outlive the index they came from."""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from adk_web_agent.search import index as index_module
+from adk_web_agent.search.corpus import sync_corpus
+from adk_web_agent.search.index import KnowledgeIndex
+from adk_web_agent.tools import thought_tools, tool_cache
+from adk_web_agent.tools.research_tools import knowledge_base_version, search_knowledge_base
+from adk_web_agent.tools.tool_cache import ToolCache, cached_tool
+
+
+class KnowledgeBaseCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.corpus = Path(tmp.name) / "kb"
+        (self.corpus / "internal_docs").mkdir(parents=True)
+        self.index_dir = str(Path(tmp.name) / "index")
+
+        saved_index, saved_cache = index_module._index, tool_cache._cache
+        self.addCleanup(setattr, index_module, "_index", saved_index)
+        self.addCleanup(setattr, tool_cache, "_cache", saved_cache)
+        index_module._index = KnowledgeIndex(self.index_dir)
+        tool_cache._cache = ToolCache(db_path=str(Path(tmp.name) / "tool_cache.db"))
+        thought_tools._streams.clear()
+
+        self.search = cached_tool(search_knowledge_base, ttl=3600, casefold=True, version=knowledge_base_version)
+
+    def _write(self, text: str) -> None:
+        path = self.corpus / "internal_docs" / "refunds.md"
+        path.write_text(f"# Refunds\n{text}\n", encoding="utf-8")
+        # Same size within the same mtime tick would look unchanged to the sync
+        os.utime(path, ns=(path.stat().st_mtime_ns + 1_000_000_000,) * 2)
+
+    def _snippets(self, query: str) -> list[str]:
+        context = SimpleNamespace(
+            state=State({}, {}), session=SimpleNamespace(id="s1"), invocation_id="i1", function_call_id="c1"
+        )
+        return [hit["snippet"] for hit in json.loads(self.search(query, context))["top_results"]]
+
+    def test_sync_changes_invalidate_cached_results(self):
+        self._write("Refunds take fourteen days.")
+        sync_corpus(index_module._index, str(self.corpus))
+        self.assertIn("fourteen", self._snippets("refunds")[0])
+        self.assertIn("fourteen", self._snippets("refunds")[0])
+
+        self._write("Refunds take thirty days.")
+        sync_corpus(index_module._index, str(self.corpus))
+        self.assertIn("thirty", self._snippets("refunds")[0])
+
+    def test_changes_from_another_process_invalidate_cached_results(self):
+        self._write("Refunds take fourteen days.")
+        sync_corpus(index_module._index, str(self.corpus))
+        self.assertIn("fourteen", self._snippets("refunds")[0])
+
+        self._write("Refunds take thirty days.")
+        sync_corpus(KnowledgeIndex(self.index_dir), str(self.corpus))
+        self.assertIn("thirty", self._snippets("refunds")[0])
+
+    def test_unchanged_sync_keeps_cached_results(self):
+        self._write("Refunds take fourteen days.")
+        sync_corpus(index_module._index, str(self.corpus))
+        self._snippets("refunds")
+        sync_corpus(index_module._index, str(self.corpus))
+        self._snippets("refunds")
+        self.assertEqual(tool_cache._cache.stats()["tools"]["search_knowledge_base"]["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()